@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de sendBill contra el billService local.
+
+El servicio simulado corre en otro proceso con latencia y errores
+configurables; el cliente envía documentos desde varios hilos (o con el
+cliente asíncrono) y se reportan throughput, latencias y fallos.
+
+Uso:
+    python benchmarks/bench_load.py [--documents N] [--concurrency N] [--latency S]
+                                    [--error-rate R] [--retries N] [--fast-path] [--async]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_signing import build_invoice
+from greenter.ws.async_soap_client import AsyncSoapClient, ConcurrencyLimit
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.mock_bill_service import MockBillService
+from greenter.ws.retry import RetryPolicy
+from greenter.ws.soap_client import SoapClient
+
+
+def serve(url_queue, latency, jitter, error_rate):
+    """Proceso servidor: billService simulado."""
+    service = MockBillService(latency=latency, latency_jitter=jitter, error_rate=error_rate)
+    service.start()
+    url_queue.put(service.url)
+    service._thread.join()
+
+
+def configure(client, url, retries):
+    client.set_credentials('20000000001MODDATOS', 'moddatos')
+    client.set_service(url)
+    if retries:
+        client.set_retry_policy(RetryPolicy(max_attempts=retries + 1, base_delay=0.01))
+    return client
+
+
+def run_threads(url, xml, documents, concurrency, fast_path, retries):
+    """Enviar con SoapClient desde un pool de hilos; devuelve (latencias, fallos)."""
+    client = configure(SoapClient(), url, retries)
+    client.set_session_pool(HttpSessionPool(pool_maxsize=concurrency))
+    client.set_fast_path(fast_path)
+    client.connect()
+    
+    def send(n):
+        start = time.perf_counter()
+        result = client.send(f'20000000001-01-F001-{n}', xml)
+        return time.perf_counter() - start, bool(result and result['success'])
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(send, range(1, documents + 1)))
+    return [latency for latency, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+
+def run_async(url, xml, documents, concurrency, retries):
+    """Enviar con AsyncSoapClient; devuelve (latencias, fallos)."""
+    client = configure(AsyncSoapClient(limit=ConcurrencyLimit(concurrency), max_connections=concurrency), url, retries)
+    
+    async def send(n):
+        start = time.perf_counter()
+        result = await client.send_async(f'20000000001-01-F001-{n}', xml)
+        return time.perf_counter() - start, bool(result and result['success'])
+    
+    async def main():
+        async with client:
+            return await asyncio.gather(*(send(n) for n in range(1, documents + 1)))
+    
+    outcomes = asyncio.run(main())
+    return [latency for latency, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--retries', type=int, default=0)
+    parser.add_argument('--lines', type=int, default=10)
+    parser.add_argument('--fast-path', action='store_true')
+    parser.add_argument('--async', dest='use_async', action='store_true')
+    args = parser.parse_args()
+    
+    url_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(
+        target=serve, args=(url_queue, args.latency, args.jitter, args.error_rate), daemon=True
+    )
+    server.start()
+    url = url_queue.get()
+    
+    xml = build_invoice(args.lines)
+    try:
+        start = time.perf_counter()
+        if args.use_async:
+            latencies, failures = run_async(url, xml, args.documents, args.concurrency, args.retries)
+        else:
+            latencies, failures = run_threads(url, xml, args.documents, args.concurrency,
+                                              args.fast_path, args.retries)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+    
+    print(f"Documentos:   {args.documents} ({args.concurrency} concurrentes)")
+    print(f"Throughput:   {args.documents / elapsed:.0f} docs/s")
+    print(f"Latencia p50: {statistics.median(latencies) * 1000:.1f} ms")
+    print(f"Latencia p95: {percentile(latencies, 0.95) * 1000:.1f} ms")
+    print(f"Latencia p99: {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print(f"Fallos:       {failures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda del placeholder de firma en documentos grandes.
+
+Compara la búsqueda anterior (XPath '//' recompilado en cada llamada y
+búsqueda de ds:Signature en todo el árbol) con las expresiones precompiladas
+ancladas en los hijos de la raíz.
+
+Uso:
+    python benchmarks/bench_placeholder_lookup.py [--iterations N] [--lines N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import lxml.etree as etree
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+from conftest import create_pkcs12
+from bench_signing import build_invoice
+from greenter.signer.crypto_signer import CryptoXmlSigner
+
+NAMESPACES = {
+    'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
+    'ds': 'http://www.w3.org/2000/09/xmldsig#'
+}
+
+
+def previous_lookup(doc):
+    """Búsqueda anterior: dos recorridos '//' y un find('.//ds:Signature')."""
+    for _ in range(2):
+        doc.xpath('//ext:UBLExtensions/ext:UBLExtension/ext:ExtensionContent', namespaces=NAMESPACES)
+    doc.find('.//{http://www.w3.org/2000/09/xmldsig#}Signature')
+
+
+def timed(function, iterations):
+    """Ejecutar N veces y devolver milisegundos por llamada."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) * 1000.0 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=10000)
+    args = parser.parse_args()
+    
+    xml = build_invoice(args.lines)
+    doc = etree.fromstring(xml.encode('utf-8'))
+    signer = CryptoXmlSigner()
+    
+    print(f"Documento: {args.lines} líneas, {len(xml)} caracteres")
+    before = timed(lambda: previous_lookup(doc), args.iterations)
+    after = timed(lambda: signer._find_signature_placeholder(doc), args.iterations)
+    print(f"{'anterior':>12}: {before:8.3f} ms/doc")
+    print(f"{'precompilado':>12}: {after:8.3f} ms/doc  ({before / after:.0f}x)")
+    
+    signer.set_certificate(create_pkcs12(os.path.join(tempfile.mkdtemp(), 'bench.pfx')), '123456')
+    metrics = signer.enable_metrics()
+    for _ in range(10):
+        signer.sign(xml)
+    phases = metrics.snapshot()['phases']
+    print(f"Firma completa: {phases['total']['mean_ms']:.3f} ms/doc, xpath {phases['xpath']['mean_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de CPU por petición sendBill: zeep vs transporte SOAP directo.
+
+El billService simulado corre en otro proceso, así el tiempo de CPU medido
+corresponde solo al cliente.
+
+Uso:
+    python benchmarks/bench_raw_soap.py [--iterations N] [--lines N]
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_signing import build_invoice
+from greenter.ws.soap_client import SoapClient
+
+
+def build_response():
+    """Respuesta sendBill con un CDR comprimido."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('R-20000000001-01-F001-1.xml', '<ApplicationResponse>' + 'x' * 2000 + '</ApplicationResponse>')
+    return (
+        '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body>'
+        '<br:sendBillResponse xmlns:br="http://service.sunat.gob.pe">'
+        f'<applicationResponse>{base64.b64encode(buffer.getvalue()).decode()}</applicationResponse>'
+        '</br:sendBillResponse></soap-env:Body></soap-env:Envelope>'
+    ).encode()
+
+
+def serve(port_queue):
+    """Proceso servidor: billService simulado con keep-alive."""
+    payload = build_response()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def run(client, xml, iterations):
+    """Enviar N documentos y devolver (CPU, pared) por petición en ms."""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        client.send('20000000001-01-F001-1', xml)  # warm-up
+        cpu, wall = time.process_time(), time.perf_counter()
+        for _ in range(iterations):
+            assert client.send('20000000001-01-F001-1', xml)['success']
+        cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+    return cpu * 1000 / iterations, wall * 1000 / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=10)
+    args = parser.parse_args()
+    
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    url = f'http://127.0.0.1:{port_queue.get()}/billService'
+    
+    xml = build_invoice(args.lines)
+    print(f"{'ruta':>8} {'CPU ms/pet':>12} {'pared ms/pet':>14}")
+    try:
+        for name, fast_path in (('zeep', False), ('directa', True)):
+            client = SoapClient()
+            client.set_credentials('20000000001MODDATOS', 'moddatos')
+            client.set_service(url)
+            client.set_fast_path(fast_path)
+            cpu, wall = run(client, xml, args.iterations)
+            print(f"{name:>8} {cpu:12.3f} {wall:14.3f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
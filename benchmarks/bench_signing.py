@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark de firma: backend xmlsec vs backend puro (lxml + cryptography).
+
+Uso:
+    python benchmarks/bench_signing.py [--iterations N] [--lines N] [--phases]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+from conftest import INVOICE_XML, create_pkcs12
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from greenter.signer.crypto_signer import CryptoXmlSigner
+
+
+def build_invoice(lines):
+    """Generar una factura con N líneas de detalle."""
+    line = (
+        '    <cac:InvoiceLine>\n'
+        '        <cbc:ID>{0}</cbc:ID>\n'
+        '        <cbc:InvoicedQuantity unitCode="NIU">1</cbc:InvoicedQuantity>\n'
+        '        <cbc:LineExtensionAmount currencyID="PEN">100.00</cbc:LineExtensionAmount>\n'
+        '    </cac:InvoiceLine>\n'
+    )
+    body = ''.join(line.format(i) for i in range(1, lines + 1))
+    return INVOICE_XML.replace('</Invoice>', body + '</Invoice>')
+
+
+def run(signer, xml, iterations):
+    """Firmar N veces y devolver documentos por segundo."""
+    signer.sign(xml)  # warm-up
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        signer.sign(xml)
+    elapsed = time.perf_counter() - start
+    
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--lines', type=int, default=10)
+    parser.add_argument('--phases', action='store_true', help='Mostrar tiempo por fase de firma')
+    args = parser.parse_args()
+    
+    xml = build_invoice(args.lines)
+    certificate = create_pkcs12(os.path.join(tempfile.mkdtemp(), 'bench.pfx'))
+    
+    backends = [('cryptography', CryptoXmlSigner()), ('streaming', CryptoXmlSigner(streaming=True))]
+    if XMLSEC_AVAILABLE:
+        backends.insert(0, ('xmlsec', XmlSigner()))
+    
+    print(f"Documento: {args.lines} líneas, {len(xml)} caracteres")
+    for name, signer in backends:
+        signer.set_certificate(certificate, '123456')
+        rate = run(signer, xml, args.iterations)
+        print(f"{name:>14}: {rate:8.1f} docs/s  ({1000.0 / rate:.3f} ms/doc)")
+        
+        if args.phases:
+            metrics = signer.enable_metrics()
+            run(signer, xml, args.iterations)
+            for phase, timer in metrics.snapshot()['phases'].items():
+                print(f"{'':>16}{phase:<10} {timer['mean_ms']:8.3f} ms  (max {timer['max_ms']:.3f} ms)")
+
+
+if __name__ == "__main__":
+    main()
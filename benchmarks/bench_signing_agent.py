@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga: firma en proceso vs agente de firma por socket Unix.
+
+Uso:
+    python benchmarks/bench_signing_agent.py [--iterations N] [--clients N] [--lines N]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+from conftest import create_pkcs12
+from bench_signing import build_invoice
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.agent_signer import AgentXmlSigner
+from greenter.signer.signing_agent import SigningAgent
+
+
+def sign_in_worker(args):
+    """Proceso cliente: firmar N documentos contra el agente."""
+    socket_path, xml, iterations = args
+    signer = AgentXmlSigner(socket_path)
+    results = signer.sign_many([xml] * iterations)
+    signer.close()
+    return sum(1 for result in results if result is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--clients', type=int, default=4, help='Procesos cliente concurrentes')
+    parser.add_argument('--lines', type=int, default=10)
+    args = parser.parse_args()
+    
+    directory = tempfile.mkdtemp()
+    certificate = create_pkcs12(os.path.join(directory, 'bench.pfx'))
+    xml = build_invoice(args.lines)
+    
+    local = CryptoXmlSigner()
+    local.set_certificate(certificate, '123456')
+    local.sign(xml)  # warm-up
+    
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        local.sign(xml)
+    print(f"{'en proceso':>22}: {args.iterations / (time.perf_counter() - start):8.1f} docs/s")
+    
+    agent_signer = CryptoXmlSigner()
+    agent_signer.set_certificate(certificate, '123456')
+    
+    with SigningAgent(os.path.join(directory, 'agent.sock'), agent_signer) as agent:
+        client = AgentXmlSigner(agent.socket_path)
+        client.sign(xml)  # warm-up
+        
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            client.sign(xml)
+        print(f"{'agente secuencial':>22}: {args.iterations / (time.perf_counter() - start):8.1f} docs/s")
+        
+        start = time.perf_counter()
+        client.sign_many([xml] * args.iterations)
+        print(f"{'agente pipelining':>22}: {args.iterations / (time.perf_counter() - start):8.1f} docs/s")
+        client.close()
+        
+        per_client = args.iterations // args.clients
+        with multiprocessing.Pool(args.clients) as pool:
+            start = time.perf_counter()
+            signed = sum(pool.map(sign_in_worker, [(agent.socket_path, xml, per_client)] * args.clients))
+            elapsed = time.perf_counter() - start
+        print(f"{f'agente {args.clients} procesos':>22}: {signed / elapsed:8.1f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark de verificación de firmas en lote.
+
+Uso:
+    python benchmarks/bench_verify.py [--documents N] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests'))
+
+from conftest import INVOICE_XML, create_pkcs12
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.xml_verifier import XmlVerifier, get_certificate_fingerprint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    
+    signer = CryptoXmlSigner()
+    signer.set_certificate(create_pkcs12(os.path.join(tempfile.mkdtemp(), 'bench.pfx')), '123456')
+    signed = signer.sign(INVOICE_XML).encode('utf-8')
+    documents = [signed] * args.documents
+    
+    fingerprint = get_certificate_fingerprint(signer.certificate_content)
+    
+    with XmlVerifier(trusted_fingerprints=[fingerprint]) as verifier:
+        for workers in sorted({1, args.workers}):
+            verifier.verify_many(documents[:256], workers=workers)  # warm-up
+            
+            start = time.perf_counter()
+            results = verifier.verify_many(documents, workers=workers)
+            elapsed = time.perf_counter() - start
+            
+            assert all(result.is_valid() for result in results)
+            print(f"workers={workers:>3}: {args.documents / elapsed:9.1f} verificaciones/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark del contentFile de sendBill: ZIP + sobre SOAP por documento.
+
+Compara el camino anterior (ZIP codificado en base64 y vuelto a codificar
+por el transporte) con ZipPayloadBuilder en varios niveles de compresión.
+
+Uso:
+    python benchmarks/bench_zip_payload.py [--iterations N] [--lines N]
+"""
+
+import argparse
+import base64
+import io
+import os
+import sys
+import time
+import zipfile
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_signing import build_invoice
+from greenter.ws import raw_soap
+from greenter.ws.zip_payload import ZipPayloadBuilder
+
+
+def legacy_payload(filename, xml):
+    """ZIP como lo armaba SoapClient._compress_xml antes del cambio."""
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(f"{filename}.xml", xml.encode('utf-8'))
+    return base64.b64encode(zip_buffer.getvalue())
+
+
+def run(build, xml, iterations):
+    """Armar N sobres y devolver (documentos/s, bytes del sobre)."""
+    envelope = b''
+    start = time.perf_counter()
+    for _ in range(iterations):
+        payload = build('20000000001-01-F001-1', xml)
+        envelope = raw_soap.build_send_bill_envelope('20000000001MODDATOS', 'moddatos', 'a.zip', payload)
+    return iterations / (time.perf_counter() - start), len(envelope)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--lines', type=int, default=50)
+    args = parser.parse_args()
+    
+    xml = build_invoice(args.lines)
+    cases = [('anterior', legacy_payload)]
+    for level in (1, 6, 9):
+        cases.append((f'deflate {level}', ZipPayloadBuilder(compresslevel=level).build))
+    cases.append(('stored', ZipPayloadBuilder(zipfile.ZIP_STORED).build))
+    
+    print(f"XML: {len(xml.encode('utf-8'))} bytes")
+    print(f"{'ZIP':>10} {'docs/s':>10} {'bytes sobre':>12}")
+    for name, build in cases:
+        rate, size = run(build, xml, args.iterations)
+        print(f"{name:>10} {rate:10.0f} {size:12d}")
+
+
+if __name__ == "__main__":
+    main()
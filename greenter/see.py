@@ -4,16 +4,30 @@ Main entry point for the Greenter system.
 Migrated from packages/lite/src/Greenter/See.php
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import asyncio
 import logging
 
 from .core.models.document_interface import DocumentInterface
 from .core.models.sale import BaseSale
 from .xml.builder import XmlBuilder
 from .ws.soap_client import SoapClient
+from .ws.async_soap_client import AsyncSoapClient
 from .ws.sunat_response import SunatResponse
-from .signer.xml_signer import XmlSigner
+from .ws.retry import RetryPolicy
+from .ws.rate_limit import RateLimiter
+from .ws.zip_payload import ZipPayloadBuilder
+from .ws.ticket_scheduler import TicketScheduler
+from .ws.outbound_queue import OutboundQueue, KIND_BILL, KIND_SUMMARY
+from .ws.submission_registry import SubmissionRegistry
+from .signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from .signer.crypto_signer import CryptoXmlSigner
+from .signer.agent_signer import AgentXmlSigner
+from .signer.sign_result import SignResult
+from .signer.warmup_report import WarmupReport
+from .signer.certificate_store import CertificateStore, SigningCredential
 from .validator.error_code_provider import ErrorCodeProviderInterface
 
 
@@ -30,7 +44,12 @@ class See:
         """Initialize the SEE system with default components."""
         self.xml_builder: Optional[XmlBuilder] = None
         self.soap_client: Optional[SoapClient] = None
+        self.async_soap_client: Optional[AsyncSoapClient] = None
         self.xml_signer: Optional[XmlSigner] = None
+        self.certificate_store: Optional[CertificateStore] = None
+        self.ticket_scheduler: Optional[TicketScheduler] = None
+        self.outbound_queue: Optional[OutboundQueue] = None
+        self.submission_registry: Optional[SubmissionRegistry] = None
         self.error_code_provider: Optional[ErrorCodeProviderInterface] = None
         
         # Twig/Jinja2 render options
@@ -47,7 +66,9 @@ class See:
         try:
             self.xml_builder = XmlBuilder(self.builder_options)
             self.soap_client = SoapClient()
-            self.xml_signer = XmlSigner()
+            self.async_soap_client = AsyncSoapClient()
+            # Pure-Python backend when libxmlsec1 is not installed
+            self.xml_signer = XmlSigner() if XMLSEC_AVAILABLE else CryptoXmlSigner()
         except ImportError as e:
             logger.warning(f"Could not initialize component: {e}")
     
@@ -85,6 +106,30 @@ class See:
         if self.xml_signer:
             self.xml_signer.set_certificate(certificate, password)
     
+    def set_signer(self, signer: Optional[XmlSigner]) -> None:
+        """
+        Set XML signer backend.
+        
+        Args:
+            signer: XmlSigner instance (xmlsec or pure-Python backend)
+        """
+        self.xml_signer = signer
+    
+    def set_certificate_store(self, store: Optional[CertificateStore]) -> None:
+        """
+        Set multi-tenant certificate store.
+        
+        Documents are signed with the certificate registered for their
+        issuer RUC. A document without an issuer RUC, or whose RUC has no
+        valid certificate in the store, is not signed: the certificate set
+        with set_certificate is never used as a fallback. The signing agent
+        keeps its own store, so this one is not used with AgentXmlSigner.
+        
+        Args:
+            store: CertificateStore instance, None to disable
+        """
+        self.certificate_store = store
+    
     def set_credentials(self, ruc: str, user: str, password: str) -> None:
         """
         Set SOAP credentials with RUC.
@@ -96,6 +141,8 @@ class See:
         """
         if self.soap_client:
             self.soap_client.set_credentials(f"{ruc}{user}", password)
+        if self.async_soap_client:
+            self.async_soap_client.set_credentials(f"{ruc}{user}", password)
     
     def set_clave_sol(self, ruc: str, user: str, password: str) -> None:
         """
@@ -117,6 +164,76 @@ class See:
         """
         if self.soap_client:
             self.soap_client.set_service(service_url)
+        if self.async_soap_client:
+            self.async_soap_client.set_service(service_url)
+    
+    def set_retry_policy(self, retry_policy: Optional[RetryPolicy]) -> None:
+        """
+        Set the retry policy for SUNAT calls.
+        
+        Both SOAP clients share it, and with it the per-endpoint circuit breakers.
+        
+        Args:
+            retry_policy: RetryPolicy, None to make a single attempt
+        """
+        if self.soap_client:
+            self.soap_client.set_retry_policy(retry_policy)
+        if self.async_soap_client:
+            self.async_soap_client.set_retry_policy(retry_policy)
+    
+    def set_rate_limiter(self, rate_limiter: Optional[RateLimiter]) -> None:
+        """
+        Set the rate limiter pacing SUNAT calls per RUC and per endpoint.
+        
+        Args:
+            rate_limiter: RateLimiter, None for no limit
+        """
+        if self.soap_client:
+            self.soap_client.set_rate_limiter(rate_limiter)
+        if self.async_soap_client:
+            self.async_soap_client.set_rate_limiter(rate_limiter)
+    
+    def set_payload_builder(self, payload_builder: ZipPayloadBuilder) -> None:
+        """
+        Set the builder of the ZIP uploaded to SUNAT.
+        
+        Args:
+            payload_builder: ZipPayloadBuilder, e.g. ZipPayloadBuilder(compresslevel=1)
+        """
+        if self.soap_client:
+            self.soap_client.set_payload_builder(payload_builder)
+        if self.async_soap_client:
+            self.async_soap_client.set_payload_builder(payload_builder)
+    
+    def set_ticket_scheduler(self, scheduler: Optional[TicketScheduler]) -> None:
+        """
+        Set the scheduler that polls the tickets returned by send_pack.
+        
+        Args:
+            scheduler: TicketScheduler, None to leave tickets to the caller
+        """
+        self.ticket_scheduler = scheduler
+    
+    def set_outbound_queue(self, queue: Optional[OutboundQueue]) -> None:
+        """
+        Set the durable queue used by enqueue.
+        
+        Args:
+            queue: OutboundQueue, e.g. OutboundQueue(see.soap_client, 'outbox.db')
+        """
+        self.outbound_queue = queue
+    
+    def set_submission_registry(self, registry: Optional[SubmissionRegistry]) -> None:
+        """
+        Set the registry of accepted documents.
+        
+        send returns the stored CDR of documents already accepted instead
+        of sending them again.
+        
+        Args:
+            registry: SubmissionRegistry, e.g. SubmissionRegistry(CdrStore('cdrs.db'))
+        """
+        self.submission_registry = registry
     
     def set_error_code_provider(self, provider: Optional[ErrorCodeProviderInterface]) -> None:
         """
@@ -127,12 +244,43 @@ class See:
         """
         self.error_code_provider = provider
     
-    def get_xml_signed(self, document: DocumentInterface) -> Optional[str]:
+    def warm_up(self, iterations: int = 3, ruc: Optional[str] = None) -> WarmupReport:
+        """
+        Check the signing certificate and warm up the signer.
+        
+        Intended for startup and readiness probes: a wrong password or an
+        expired certificate is reported here instead of on a live request.
+        
+        Args:
+            iterations: Number of test signatures
+            ruc: Tenant RUC in the certificate store, None for the configured certificate
+            
+        Returns:
+            WarmupReport, not ready for a RUC without its own certificate
+        """
+        if not self.xml_signer:
+            return WarmupReport(error="XML Signer not initialized")
+        
+        if ruc and self.certificate_store is None:
+            return WarmupReport(error=f"No certificate store configured for RUC {ruc}")
+        
+        try:
+            credential = self._get_credential(None, ruc) if ruc else None
+        except ValueError as e:
+            return WarmupReport(error=str(e))
+        
+        report = self.xml_signer.warm_up(iterations, credential)
+        if not report.ready:
+            logger.error(f"Signer warm-up failed: {report.error}")
+        return report
+    
+    def get_xml_signed(self, document: DocumentInterface, ruc: Optional[str] = None) -> Optional[str]:
         """
         Get signed XML from document.
         
         Args:
             document: Document to convert to XML
+            ruc: Tenant RUC in the certificate store, defaults to the issuer RUC
             
         Returns:
             Signed XML string or None if error
@@ -147,10 +295,115 @@ class See:
             
             # Sign XML if signer is available
             if self.xml_signer and xml_content:
-                xml_content = self.xml_signer.sign(xml_content)
+                xml_content = self.xml_signer.sign(xml_content, *self._get_signing_args(document, ruc))
+            
+            return xml_content
+            
+        except Exception as e:
+            logger.error(f"Error generating signed XML: {e}")
+            return None
+    
+    def get_xml_signed_result(self, document: DocumentInterface,
+                              ruc: Optional[str] = None) -> Optional[SignResult]:
+        """
+        Get signed XML from document along with its signature values.
+        
+        The DigestValue (hash code) needed by printed representations and
+        QR codes is captured while signing, so the XML is not parsed again.
+        
+        Args:
+            document: Document to convert to XML
+            ruc: Tenant RUC in the certificate store, defaults to the issuer RUC
+            
+        Returns:
+            SignResult or None if error
+        """
+        if not self.xml_builder:
+            logger.error("XML Builder not initialized")
+            return None
+        
+        if not self.xml_signer:
+            logger.error("XML Signer not initialized")
+            return None
+        
+        try:
+            # Generate XML
+            xml_content = self.xml_builder.build(document)
+            if not xml_content:
+                return None
+            
+            return self.xml_signer.sign_with_result(xml_content, *self._get_signing_args(document, ruc))
+        
+        except Exception as e:
+            logger.error(f"Error generating signed XML: {e}")
+            return None
+    
+    async def get_xml_signed_async(self, document: DocumentInterface,
+                                   ruc: Optional[str] = None) -> Optional[str]:
+        """
+        Get signed XML from document without blocking the event loop.
+        
+        The XML is built and the certificate loaded in the loop's default
+        executor; signing runs in the signer executor (see
+        XmlSigner.set_executor).
+        
+        Args:
+            document: Document to convert to XML
+            ruc: Tenant RUC in the certificate store, defaults to the issuer RUC
+            
+        Returns:
+            Signed XML string or None if error
+        """
+        if not self.xml_builder:
+            logger.error("XML Builder not initialized")
+            return None
+        
+        try:
+            # Generate XML
+            xml_content, signing_args = await asyncio.get_running_loop().run_in_executor(
+                None, self._build_for_signing, document, ruc
+            )
+            
+            # Sign XML if signer is available
+            if self.xml_signer and xml_content:
+                xml_content = await self.xml_signer.sign_async(xml_content, *signing_args)
             
             return xml_content
+        
+        except Exception as e:
+            logger.error(f"Error generating signed XML: {e}")
+            return None
+    
+    async def get_xml_signed_result_async(self, document: DocumentInterface,
+                                          ruc: Optional[str] = None) -> Optional[SignResult]:
+        """
+        Get signed XML and signature values without blocking the event loop.
+        
+        Args:
+            document: Document to convert to XML
+            ruc: Tenant RUC in the certificate store, defaults to the issuer RUC
+            
+        Returns:
+            SignResult or None if error
+        """
+        if not self.xml_builder:
+            logger.error("XML Builder not initialized")
+            return None
+        
+        if not self.xml_signer:
+            logger.error("XML Signer not initialized")
+            return None
+        
+        try:
+            # Generate XML
+            xml_content, signing_args = await asyncio.get_running_loop().run_in_executor(
+                None, self._build_for_signing, document, ruc
+            )
+            if not xml_content:
+                return None
             
+            return await self.xml_signer.sign_with_result_async(xml_content, *signing_args)
+        
         except Exception as e:
             logger.error(f"Error generating signed XML: {e}")
             return None
@@ -165,15 +418,22 @@ class See:
         Returns:
             SunatResponse object
         """
+        key = self._get_submission_key(document)
+        if key:
+            accepted = self.submission_registry.get_accepted(*key)
+            if accepted:
+                logger.debug("Document %s already accepted, returning stored CDR", self._get_filename(document))
+                return SunatResponse.create_success(
+                    accepted['response_code'], "Comprobante aceptado previamente", accepted['cdr_response']
+                )
+        
         if not self.soap_client:
             logger.error("SOAP Client not initialized")
-            print("SOAP client not initialized")
             return SunatResponse.create_error("SOAP Client not initialized")
         
         # Verificar si el SOAP client está realmente funcional
-        if not hasattr(self.soap_client, 'client') or not self.soap_client.client:
+        if not self.soap_client.connect():
             logger.error("SOAP Client not properly configured")
-            print("SOAP client not properly configured")
             return SunatResponse.create_error("SOAP Client not properly configured")
         
         try:
@@ -188,23 +448,209 @@ class See:
             # Send via SOAP
             response = self.soap_client.send(filename, xml_content)
             
-            if response:
-                # Convert dictionary response to SunatResponse
-                return SunatResponse(
-                    success=response.get('success', False),
-                    code=response.get('code'),
-                    description=response.get('description'),
-                    error=response.get('error'),
-                    cdr_response=response.get('cdr_response'),
-                    ticket=response.get('ticket')
-                )
-            else:
-                return SunatResponse.create_error("No response from SUNAT")
+            if key and response and response.get('success'):
+                self.submission_registry.record(*key, response.get('cdr_zip'), response.get('cdr_response'))
+            
+            return self._create_response(response)
+            
+        except Exception as e:
+            logger.error(f"Error sending document: {e}")
+            return SunatResponse.create_error(f"Error sending document: {e}")
+    
+    def enqueue(self, document: DocumentInterface, summary: bool = False) -> bool:
+        """
+        Sign a document and store it in the outbound queue for delivery.
+        
+        Returns as soon as the signed XML is committed to disk, so sales are
+        accepted at full speed while SUNAT is unavailable. Follow delivery
+        with outbound_queue.get(filename) or outbound_queue.on_result.
+        
+        Args:
+            document: Document to send
+            summary: Deliver with sendSummary (summaries and voided documents)
             
+        Returns:
+            True if queued, False on error or if the document was already queued
+        """
+        if self.outbound_queue is None:
+            logger.error("Outbound queue not set")
+            return False
+        
+        try:
+            xml_content = self.get_xml_signed(document)
+            if not xml_content:
+                logger.error("Could not generate signed XML")
+                return False
+            
+            return self.outbound_queue.enqueue(
+                self._get_filename(document), xml_content, KIND_SUMMARY if summary else KIND_BILL
+            )
+        
+        except Exception as e:
+            logger.error(f"Error queuing document: {e}")
+            return False
+    
+    def send_pack(self, documents: List[DocumentInterface], correlativo: int = 1,
+                  ruc: Optional[str] = None, max_workers: Optional[int] = None) -> SunatResponse:
+        """
+        Send several documents (e.g. boletas) to SUNAT in one sendPack request.
+        
+        Documents are built and signed in parallel, then written one by one
+        into the pack ZIP {RUC}-LT-{YYYYMMDD}-{correlativo}. The returned
+        ticket is added to the ticket scheduler when one is set.
+        
+        Args:
+            documents: Documents of the same issuer
+            correlativo: Pack number of the day
+            ruc: Issuer RUC, defaults to the RUC of the documents; must match it if given
+            max_workers: Signing threads, None for the executor default
+            
+        Returns:
+            SunatResponse object with the ticket to query with get_status
+        """
+        if not documents:
+            return SunatResponse.create_error("No documents to send")
+        
+        if not self.soap_client or not self.soap_client.connect():
+            logger.error("SOAP Client not properly configured")
+            return SunatResponse.create_error("SOAP Client not properly configured")
+        
+        rucs = {getattr(getattr(document, 'company', None), 'ruc', None) for document in documents}
+        document_ruc = next(iter(rucs))
+        if len(rucs) > 1 or not (ruc or document_ruc):
+            return SunatResponse.create_error("All documents of a pack must have the same issuer RUC")
+        if ruc and document_ruc and ruc != document_ruc:
+            # The pack name and the signing certificate must match the issuer
+            return SunatResponse.create_error(f"RUC {ruc} does not match the issuer RUC {document_ruc} of the documents")
+        ruc = ruc or document_ruc
+        
+        try:
+            filenames = [self._get_filename(document) for document in documents]
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='greenter-pack') as executor:
+                xml_contents = list(executor.map(lambda document: self.get_xml_signed(document, ruc), documents))
+            
+            failed = [filename for filename, xml_content in zip(filenames, xml_contents) if not xml_content]
+            if failed:
+                return SunatResponse.create_error(f"Could not generate signed XML: {', '.join(failed)}")
+            
+            filename = f"{ruc}-LT-{datetime.now().strftime('%Y%m%d')}-{correlativo}"
+            response = self.soap_client.send_pack(filename, zip(filenames, xml_contents))
+            
+            ticket = response.get('ticket') if response else None
+            if ticket and self.ticket_scheduler is not None:
+                self.ticket_scheduler.add(ticket, {'filename': filename, 'documents': filenames})
+            
+            return self._create_response(response)
+        
+        except Exception as e:
+            logger.error(f"Error sending pack: {e}")
+            return SunatResponse.create_error(f"Error sending pack: {e}")
+    
+    async def send_async(self, document: DocumentInterface, timeout: Optional[float] = None) -> SunatResponse:
+        """
+        Send document to SUNAT without blocking the event loop.
+        
+        Calls share the async client concurrency limit, so many documents
+        can be awaited together (e.g. with asyncio.gather).
+        
+        Args:
+            document: Document to send
+            timeout: Seconds allowed for the SOAP call, defaults to the client timeout
+            
+        Returns:
+            SunatResponse object
+        """
+        if not self.async_soap_client or not self.async_soap_client.connect():
+            logger.error("Async SOAP Client not properly configured")
+            return SunatResponse.create_error("Async SOAP Client not properly configured")
+        
+        try:
+            # Get signed XML
+            xml_content = await self.get_xml_signed_async(document)
+            if not xml_content:
+                return SunatResponse.create_error("Could not generate signed XML")
+            
+            response = await self.async_soap_client.send_async(self._get_filename(document), xml_content, timeout)
+            return self._create_response(response)
+        
         except Exception as e:
             logger.error(f"Error sending document: {e}")
             return SunatResponse.create_error(f"Error sending document: {e}")
     
+    async def send_summary_async(self, document: DocumentInterface,
+                                 timeout: Optional[float] = None) -> SunatResponse:
+        """
+        Send summary or voided document to SUNAT without blocking the event loop.
+        
+        Args:
+            document: Summary or voided document
+            timeout: Seconds allowed for the SOAP call, defaults to the client timeout
+            
+        Returns:
+            SunatResponse object with the ticket to query with get_status_async
+        """
+        if not self.async_soap_client or not self.async_soap_client.connect():
+            logger.error("Async SOAP Client not properly configured")
+            return SunatResponse.create_error("Async SOAP Client not properly configured")
+        
+        try:
+            # Get signed XML
+            xml_content = await self.get_xml_signed_async(document)
+            if not xml_content:
+                return SunatResponse.create_error("Could not generate signed XML")
+            
+            response = await self.async_soap_client.send_summary_async(self._get_filename(document), xml_content, timeout)
+            return self._create_response(response)
+        
+        except Exception as e:
+            logger.error(f"Error sending summary: {e}")
+            return SunatResponse.create_error(f"Error sending summary: {e}")
+    
+    async def get_status_async(self, ticket: Optional[str],
+                               timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get status of submitted document without blocking the event loop.
+        
+        Args:
+            ticket: Ticket ID from submission
+            timeout: Seconds allowed for the SOAP call, defaults to the client timeout
+            
+        Returns:
+            Status response, a fault dictionary, or None if error
+        """
+        if not self.async_soap_client:
+            logger.error("Async SOAP Client not initialized")
+            return None
+        
+        try:
+            return await self.async_soap_client.get_status_async(ticket, timeout)
+        
+        except Exception as e:
+            logger.error(f"Error getting status: {e}")
+            return None
+    
+    def _create_response(self, response: Optional[Dict[str, Any]]) -> SunatResponse:
+        """
+        Convert a SOAP client response dictionary to SunatResponse.
+        
+        Args:
+            response: Response dictionary or None
+            
+        Returns:
+            SunatResponse object
+        """
+        if not response:
+            return SunatResponse.create_error("No response from SUNAT")
+        
+        return SunatResponse(
+            success=response.get('success', False),
+            code=response.get('code'),
+            description=response.get('description'),
+            error=response.get('error'),
+            cdr_response=response.get('cdr_response'),
+            ticket=response.get('ticket')
+        )
+    
     def send_xml(self, document_type: str, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
         """
         Send pre-generated XML.
@@ -267,7 +713,7 @@ class See:
             ticket: Ticket ID from submission
             
         Returns:
-            Status response or None if error
+            Status response, a fault dictionary, or None if error
         """
         if not self.soap_client:
             logger.error("SOAP Client not initialized")
@@ -281,6 +727,99 @@ class See:
             logger.error(f"Error getting status: {e}")
             return None
     
+    def _build_for_signing(self, document: DocumentInterface,
+                           ruc: Optional[str] = None) -> Tuple[Optional[str], Tuple]:
+        """
+        Build the XML of a document and get its signing arguments.
+        
+        Both can block (template rendering, PKCS#12 decryption), so the
+        async methods run this in an executor.
+        
+        Args:
+            document: Document to convert to XML
+            ruc: Tenant RUC in the certificate store, defaults to the issuer RUC
+            
+        Returns:
+            Tuple of (XML content, signer arguments)
+        """
+        xml_content = self.xml_builder.build(document)
+        if not xml_content or not self.xml_signer:
+            return xml_content, ()
+        return xml_content, self._get_signing_args(document, ruc)
+    
+    def _get_signing_args(self, document: DocumentInterface, ruc: Optional[str] = None) -> Tuple:
+        """
+        Get the arguments that select the certificate in the signer call.
+        
+        The signing agent holds the tenant certificates itself, so it gets
+        the issuer RUC and rejects RUCs it has no certificate for; local
+        signers get the credential from the certificate store.
+        
+        Args:
+            document: Document instance
+            ruc: Tenant RUC, defaults to the issuer RUC
+            
+        Returns:
+            (credential,) for local signers, (None, RUC) for the signing agent
+            
+        Raises:
+            ValueError: If the store has no valid certificate for the RUC
+        """
+        if isinstance(self.xml_signer, AgentXmlSigner):
+            return None, ruc or getattr(getattr(document, 'company', None), 'ruc', None)
+        return (self._get_credential(document, ruc),)
+    
+    def _get_credential(self, document: DocumentInterface,
+                        ruc: Optional[str] = None) -> Optional[SigningCredential]:
+        """
+        Get signing credential for a document from the certificate store.
+        
+        Args:
+            document: Document instance
+            ruc: Tenant RUC, defaults to the issuer RUC
+            
+        Returns:
+            SigningCredential, or None to use the configured certificate
+            when no store is set
+            
+        Raises:
+            ValueError: If the store has no valid certificate for the RUC
+        """
+        if self.certificate_store is None:
+            return None
+        
+        # Never fall back to the default certificate or another tenant's
+        ruc = ruc or getattr(getattr(document, 'company', None), 'ruc', None)
+        if not ruc:
+            raise ValueError("Document has no issuer RUC to select a certificate")
+        if ruc not in self.certificate_store:
+            raise ValueError(f"No certificate registered for RUC {ruc}")
+        
+        credential = self.certificate_store.get(ruc)
+        if credential is None:
+            raise ValueError(f"No valid certificate for RUC {ruc}")
+        
+        return credential
+    
+    def _get_submission_key(self, document: DocumentInterface) -> Optional[Tuple[str, str, str, str]]:
+        """
+        Get the submission registry key of a document.
+        
+        Args:
+            document: Document instance
+            
+        Returns:
+            (ruc, tipo, serie, correlativo), or None without a registry or
+            for documents that are not sent with sendBill
+        """
+        if self.submission_registry is None or not isinstance(document, BaseSale):
+            return None
+        
+        ruc = getattr(document.company, 'ruc', None)
+        if not (ruc and document.tipo_doc and document.serie and str(document.correlativo or '').isdigit()):
+            return None
+        return ruc, document.tipo_doc, document.serie, document.correlativo
+    
     def _get_filename(self, document: DocumentInterface) -> str:
         """
         Generate filename for document.
@@ -0,0 +1,296 @@
+"""
+XML signer backed by a signing agent.
+Delegates signatures to a SigningAgent over its Unix socket.
+"""
+
+from typing import Optional, Dict, List
+from concurrent.futures import Future
+import itertools
+import logging
+import os
+import socket
+import threading
+
+from .xml_signer import XmlSigner
+from .sign_result import SignResult
+from .certificate_store import SigningCredential
+from .signing_agent import pack_frame, read_frame, OP_PING, OP_SIGN, STATUS_OK
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgentXmlSigner(XmlSigner):
+    """
+    XML Digital Signer that sends documents to a signing agent.
+    
+    Keys stay in the agent process. One connection is shared by all
+    threads using this signer and requests are pipelined on it: callers
+    send without waiting and a reader thread matches responses by id.
+    """
+    
+    def __init__(self, socket_path: str, ruc: Optional[str] = None, timeout: float = 30.0):
+        """
+        Initialize agent signer.
+        
+        Args:
+            socket_path: Path of the agent Unix socket
+            ruc: RUC to sign for, None to use the agent default certificate
+            timeout: Seconds to wait for each signature
+        """
+        self.socket_path = socket_path
+        self.ruc = ruc
+        self.timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._ids = itertools.count(1)
+        
+        super().__init__()
+    
+    def is_available(self) -> bool:
+        """
+        Check whether the signing backend can be used.
+        
+        Returns:
+            True if the agent socket exists
+        """
+        return os.path.exists(self.socket_path)
+    
+    def set_certificate(self, certificate: str, password: Optional[str] = None):
+        """Certificates are configured in the agent, not in the client."""
+        logger.warning("AgentXmlSigner ignores set_certificate; configure the signing agent instead")
+    
+    def sign(self, xml_content: str, credential: Optional[SigningCredential] = None,
+             ruc: Optional[str] = None) -> Optional[str]:
+        """
+        Sign XML content in the agent.
+        
+        Unlike the local backends, an unreachable agent never yields the
+        XML unsigned.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Not supported, keys are held by the agent
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            Signed XML content or None if error
+        """
+        result = self.sign_with_result(xml_content, credential, ruc)
+        return result.xml if result else None
+    
+    async def sign_async(self, xml_content: str, credential: Optional[SigningCredential] = None,
+                         ruc: Optional[str] = None) -> Optional[str]:
+        """
+        Sign XML content in the agent without blocking the event loop.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Not supported, keys are held by the agent
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            Signed XML content or None if error
+        """
+        return await self._get_executor().submit('sign', xml_content, credential, ruc)
+    
+    async def sign_with_result_async(self, xml_content: str,
+                                     credential: Optional[SigningCredential] = None,
+                                     ruc: Optional[str] = None) -> Optional[SignResult]:
+        """
+        Sign XML content in the agent without blocking the event loop, capturing signature values.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Not supported, keys are held by the agent
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            SignResult or None if error
+        """
+        return await self._get_executor().submit('sign_with_result', xml_content, credential, ruc)
+    
+    def sign_with_result(self, xml_content: str,
+                         credential: Optional[SigningCredential] = None,
+                         ruc: Optional[str] = None) -> Optional[SignResult]:
+        """
+        Sign XML content in the agent.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Not supported, keys are held by the agent
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            SignResult or None if error
+        """
+        if credential is not None:
+            logger.error("AgentXmlSigner cannot sign with local credentials")
+            return None
+        
+        try:
+            future = self.submit(xml_content, ruc)
+            return future.result(self.timeout)
+        
+        except Exception as e:
+            logger.error(f"Error signing XML in agent: {e}")
+            return None
+    
+    def sign_many(self, xml_contents: List[str], ruc: Optional[str] = None) -> List[Optional[SignResult]]:
+        """
+        Sign several documents, sending all requests before waiting.
+        
+        Args:
+            xml_contents: XML documents to sign
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            SignResult (or None if error) per document, in order
+        """
+        futures = []
+        for xml_content in xml_contents:
+            try:
+                futures.append(self.submit(xml_content, ruc))
+            except Exception as e:
+                logger.error(f"Error sending XML to agent: {e}")
+                futures.append(None)
+        
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(self.timeout) if future is not None else None)
+            except Exception as e:
+                logger.error(f"Error signing XML in agent: {e}")
+                results.append(None)
+        return results
+    
+    def submit(self, xml_content: str, ruc: Optional[str] = None) -> Future:
+        """
+        Send a sign request without waiting for the response.
+        
+        Args:
+            xml_content: XML content to sign
+            ruc: RUC to sign for, defaults to the signer RUC
+            
+        Returns:
+            Future resolving to a SignResult
+        """
+        ruc = ruc if ruc is not None else self.ruc
+        return self._request(OP_SIGN, [(ruc or '').encode('utf-8'), xml_content.encode('utf-8')])
+    
+    def ping(self) -> bool:
+        """
+        Check that the agent answers.
+        
+        Returns:
+            True if the agent responded
+        """
+        try:
+            return self._request(OP_PING, []).result(self.timeout) is None
+        except Exception as e:
+            logger.error(f"Signing agent not responding: {e}")
+            return False
+    
+    def close(self) -> None:
+        """Close the agent connection."""
+        with self._send_lock:
+            sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+    
+    def _request(self, op: int, fields: List[bytes]) -> Future:
+        """Send a frame and register its pending future."""
+        future: Future = Future()
+        # Sending and resolving use separate locks so the reader never waits on a blocked send
+        with self._send_lock:
+            sock = self._connect()
+            pending = self._pending
+            request_id = next(self._ids) & 0xFFFFFFFF
+            with self._lock:
+                pending[request_id] = future
+            try:
+                sock.sendall(pack_frame(request_id, op, fields))
+            except OSError:
+                with self._lock:
+                    pending.pop(request_id, None)
+                self._socket = None
+                sock.close()
+                raise
+        return future
+    
+    def _connect(self) -> socket.socket:
+        """Get the connection, opening it and its reader thread if needed (send lock held)."""
+        if self._socket is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            self._socket = sock
+            self._pending = {}
+            threading.Thread(target=self._read_responses, args=(sock, self._pending),
+                             name='greenter-agent-client', daemon=True).start()
+        return self._socket
+    
+    def _read_responses(self, sock: socket.socket, pending: Dict[int, Future]) -> None:
+        """Resolve pending futures as responses arrive."""
+        error: Exception = ConnectionError("Signing agent closed the connection")
+        try:
+            with sock.makefile('rb') as stream:
+                while True:
+                    frame = read_frame(stream)
+                    if frame is None:
+                        break
+                    
+                    request_id, status, fields = frame
+                    with self._lock:
+                        future = pending.pop(request_id, None)
+                    if future is None:
+                        continue
+                    
+                    if status != STATUS_OK:
+                        future.set_exception(RuntimeError(fields[0].decode('utf-8') if fields else "Agent error"))
+                    elif not fields:
+                        future.set_result(None)
+                    else:
+                        xml_bytes, digest_value, signature_value, serial = fields
+                        future.set_result(SignResult(
+                            xml_bytes=xml_bytes,
+                            digest_value=digest_value.decode('ascii') or None,
+                            signature_value=signature_value.decode('ascii') or None,
+                            certificate_serial=int(serial) if serial else None
+                        ))
+        except (OSError, ValueError) as e:
+            error = e
+        finally:
+            # Fail whatever is still waiting on this connection
+            if self._socket is sock:
+                self._socket = None
+            with self._lock:
+                waiting = list(pending.values())
+                pending.clear()
+            for future in waiting:
+                future.set_exception(error)
+    
+    def __getstate__(self):
+        """Each process opens its own connection to the agent."""
+        state = super().__getstate__()
+        state['_socket'] = None
+        state['_send_lock'] = None
+        state['_lock'] = None
+        state['_pending'] = {}
+        state['_ids'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+    
+    def __del__(self):
+        if getattr(self, '_send_lock', None) is not None:
+            self.close()
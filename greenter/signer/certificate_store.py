@@ -0,0 +1,320 @@
+"""
+Multi-tenant certificate store.
+Keeps decoded signing keys per RUC in a bounded LRU cache.
+"""
+
+from typing import Optional, Dict, Any, List, Union
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import os
+import threading
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+    logging.warning("cryptography not available. Certificate store will not work.")
+
+
+logger = logging.getLogger(__name__)
+
+
+class SigningCredential:
+    """
+    Decoded private key and certificate of one signer.
+    """
+    
+    def __init__(self, private_key, certificate):
+        """
+        Initialize signing credential.
+        
+        Args:
+            private_key: cryptography private key
+            certificate: cryptography X.509 certificate
+        """
+        self.private_key = private_key
+        self.certificate = certificate
+        self.certificate_der: bytes = certificate.public_bytes(serialization.Encoding.DER)
+        self.fingerprint: str = hashlib.sha256(self.certificate_der).hexdigest()
+        self.serial_number: int = certificate.serial_number
+        self.not_valid_after: datetime = _not_valid_after(certificate)
+        
+        # Backend specific key objects (e.g. xmlsec.Key), built on first use
+        self.backend_cache: Dict[str, Any] = {}
+        self._key_pem: Optional[bytes] = None
+        self._certificate_pem: Optional[bytes] = None
+    
+    @classmethod
+    def from_pkcs12(cls, data: bytes, password: Optional[str] = None) -> "SigningCredential":
+        """
+        Decrypt a PKCS#12 (.pfx/.p12) bundle.
+        
+        Args:
+            data: PKCS#12 bytes
+            password: PKCS#12 password
+            
+        Returns:
+            SigningCredential
+        """
+        private_key, certificate, _ = pkcs12.load_key_and_certificates(
+            data,
+            password.encode('utf-8') if password else None
+        )
+        if private_key is None or certificate is None:
+            raise ValueError("PKCS#12 does not contain a private key and certificate")
+        return cls(private_key, certificate)
+    
+    @property
+    def key_pem(self) -> bytes:
+        """Private key as unencrypted PKCS#8 PEM."""
+        if self._key_pem is None:
+            self._key_pem = self.private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption()
+            )
+        return self._key_pem
+    
+    @property
+    def certificate_pem(self) -> bytes:
+        """Certificate as PEM."""
+        if self._certificate_pem is None:
+            self._certificate_pem = self.certificate.public_bytes(serialization.Encoding.PEM)
+        return self._certificate_pem
+    
+    def is_expired(self, now: Optional[datetime] = None) -> bool:
+        """
+        Check if the certificate is expired.
+        
+        Args:
+            now: Reference time (UTC), defaults to current time
+            
+        Returns:
+            True if expired
+        """
+        return (now or datetime.now(timezone.utc)) >= self.not_valid_after
+    
+    def expires_within(self, days: int) -> bool:
+        """
+        Check if the certificate expires within the given days.
+        
+        Args:
+            days: Number of days
+            
+        Returns:
+            True if it expires within the period
+        """
+        return datetime.now(timezone.utc) + timedelta(days=days) >= self.not_valid_after
+    
+    def __getstate__(self):
+        """Pickle as PEM so credentials can cross process boundaries."""
+        return {'key_pem': self.key_pem, 'certificate_pem': self.certificate_pem}
+    
+    def __setstate__(self, state):
+        """Restore from PEM."""
+        from cryptography import x509
+        
+        self.__init__(
+            serialization.load_pem_private_key(state['key_pem'], password=None),
+            x509.load_pem_x509_certificate(state['certificate_pem'])
+        )
+
+
+class CertificateStore:
+    """
+    Certificate store keyed by RUC.
+    
+    PKCS#12 sources are registered up front and decrypted lazily on first
+    use; decoded credentials live in a bounded LRU cache.
+    """
+    
+    def __init__(self, max_keys: int = 64, expiry_warning_days: int = 30):
+        """
+        Initialize certificate store.
+        
+        Args:
+            max_keys: Maximum number of decoded credentials kept in memory
+            expiry_warning_days: Warn when a loaded certificate expires within this period
+        """
+        self.max_keys = max_keys
+        self.expiry_warning_days = expiry_warning_days
+        self._sources: Dict[str, Dict[str, Any]] = {}
+        self._credentials: "OrderedDict[str, SigningCredential]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        # RUC -> expiry of certificates found expired, not decrypted again
+        self._expired: Dict[str, datetime] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def add(self, ruc: str, certificate: Union[str, bytes], password: Optional[str] = None) -> None:
+        """
+        Register a PKCS#12 certificate for a RUC.
+        
+        Args:
+            ruc: Company RUC
+            certificate: Path to .pfx/.p12 file or PKCS#12 bytes
+            password: PKCS#12 password
+        """
+        with self._lock:
+            self._sources[ruc] = {'certificate': certificate, 'password': password}
+            # Re-registering replaces any decoded key
+            self._credentials.pop(ruc, None)
+            self._expired.pop(ruc, None)
+    
+    def remove(self, ruc: str) -> None:
+        """
+        Unregister the certificate of a RUC.
+        
+        Args:
+            ruc: Company RUC
+        """
+        with self._lock:
+            self._sources.pop(ruc, None)
+            self._credentials.pop(ruc, None)
+            self._expired.pop(ruc, None)
+    
+    def get(self, ruc: str) -> Optional[SigningCredential]:
+        """
+        Get decoded credential for a RUC, loading it if needed.
+        
+        Args:
+            ruc: Company RUC
+            
+        Returns:
+            SigningCredential or None if not registered, invalid or expired
+        """
+        with self._lock:
+            expired = self._expired.get(ruc)
+            credential = self._credentials.get(ruc)
+            if expired is not None:
+                self.hits += 1
+            elif credential is not None:
+                self._credentials.move_to_end(ruc)
+                self.hits += 1
+            else:
+                self.misses += 1
+                load_lock = self._load_locks.setdefault(ruc, threading.Lock())
+        
+        if expired is not None:
+            logger.error(f"Certificate for RUC {ruc} expired on {expired:%Y-%m-%d}")
+            return None
+        
+        if credential is None:
+            # One decryption per RUC even with concurrent callers
+            try:
+                with load_lock:
+                    with self._lock:
+                        credential = self._credentials.get(ruc)
+                    if credential is None:
+                        credential = self._load(ruc)
+                        if credential is None:
+                            return None
+                        self._put(ruc, credential)
+            finally:
+                # Waiters already hold the lock object; later callers find the cache
+                with self._lock:
+                    if self._load_locks.get(ruc) is load_lock:
+                        del self._load_locks[ruc]
+        
+        if credential.is_expired():
+            logger.error(f"Certificate for RUC {ruc} expired on {credential.not_valid_after:%Y-%m-%d}")
+            with self._lock:
+                self._credentials.pop(ruc, None)
+                if ruc in self._sources:
+                    self._expired[ruc] = credential.not_valid_after
+            return None
+        
+        return credential
+    
+    def expiring(self, days: Optional[int] = None) -> List[str]:
+        """
+        Get RUCs whose loaded certificate expires within the given days.
+        
+        Args:
+            days: Number of days, defaults to expiry_warning_days
+            
+        Returns:
+            List of RUCs
+        """
+        days = self.expiry_warning_days if days is None else days
+        with self._lock:
+            return [ruc for ruc, credential in self._credentials.items() if credential.expires_within(days)]
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with registered, loaded, hits, misses and evictions
+        """
+        with self._lock:
+            return {
+                'registered': len(self._sources),
+                'loaded': len(self._credentials),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+    
+    def __contains__(self, ruc: str) -> bool:
+        return ruc in self._sources
+    
+    def __len__(self) -> int:
+        return len(self._sources)
+    
+    def _load(self, ruc: str) -> Optional[SigningCredential]:
+        """
+        Read and decrypt the registered PKCS#12 of a RUC.
+        
+        Args:
+            ruc: Company RUC
+            
+        Returns:
+            SigningCredential or None if error
+        """
+        source = self._sources.get(ruc)
+        if source is None:
+            return None
+        
+        try:
+            data = source['certificate']
+            if isinstance(data, str) and os.path.isfile(data):
+                with open(data, 'rb') as f:
+                    data = f.read()
+            
+            credential = SigningCredential.from_pkcs12(data, source['password'])
+            
+            if credential.expires_within(self.expiry_warning_days):
+                logger.warning(
+                    f"Certificate for RUC {ruc} expires on {credential.not_valid_after:%Y-%m-%d}"
+                )
+            
+            return credential
+        
+        except Exception as e:
+            logger.error(f"Error loading certificate for RUC {ruc}: {e}")
+            return None
+    
+    def _put(self, ruc: str, credential: SigningCredential) -> None:
+        """Insert credential in the LRU cache, evicting the least recently used."""
+        with self._lock:
+            if ruc not in self._sources:
+                return
+            self._credentials[ruc] = credential
+            self._credentials.move_to_end(ruc)
+            while len(self._credentials) > self.max_keys:
+                self._credentials.popitem(last=False)
+                self.evictions += 1
+
+
+def _not_valid_after(certificate) -> datetime:
+    """Get certificate expiry as an aware UTC datetime."""
+    if hasattr(certificate, 'not_valid_after_utc'):
+        return certificate.not_valid_after_utc
+    return certificate.not_valid_after.replace(tzinfo=timezone.utc)
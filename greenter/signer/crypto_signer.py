@@ -0,0 +1,282 @@
+"""
+Pure-Python XML Digital Signer using lxml C14N and cryptography.
+Alternative to the xmlsec backend for environments without libxmlsec1.
+"""
+
+from typing import Optional, Dict, Tuple
+import base64
+import hashlib
+import logging
+import time
+
+import lxml.etree as etree
+
+from .xml_signer import XmlSigner, DS_NS
+from .certificate_store import SigningCredential
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+    logging.warning("cryptography not available. Pure-Python XML signing will not work.")
+
+
+logger = logging.getLogger(__name__)
+
+
+C14N_INCLUSIVE = 'http://www.w3.org/TR/2001/REC-xml-c14n-20010315'
+C14N_EXCLUSIVE = 'http://www.w3.org/2001/10/xml-exc-c14n#'
+
+# Marker used once per namespace context to split the canonical SignedInfo
+_DIGEST_MARKER = 'GREENTER-DIGEST-PLACEHOLDER'
+
+
+class CryptoXmlSigner(XmlSigner):
+    """
+    XML Digital Signer for SUNAT documents without native dependencies.
+    
+    Produces the same enveloped signature as XmlSigner (same template,
+    algorithms and base64 layout), computing the digest with lxml C14N
+    and the signature with cryptography's RSA.
+    """
+    
+    def __init__(self, exclusive: bool = False, streaming: bool = False):
+        """
+        Initialize pure-Python XML signer.
+        
+        Args:
+            exclusive: Use exclusive C14N instead of inclusive C14N
+            streaming: Feed the canonical document to the hash in chunks
+                instead of building it in memory (for very large documents)
+        """
+        self.exclusive = exclusive
+        self.streaming = streaming
+        self._private_key = None
+        self._certificate_der: Optional[bytes] = None
+        self._loaded_from: Optional[Tuple[Optional[str], Optional[str]]] = None
+        
+        # Canonical SignedInfo split around DigestValue, per namespace context
+        self._signed_info_cache: Dict[Tuple, Tuple[bytes, bytes]] = {}
+        
+        super().__init__()
+    
+    def is_available(self) -> bool:
+        """
+        Check whether the signing backend can be used.
+        
+        Returns:
+            True if lxml and cryptography are installed
+        """
+        return CRYPTOGRAPHY_AVAILABLE
+    
+    def __getstate__(self):
+        """Key objects are not picklable; worker copies reload them from PEM."""
+        state = super().__getstate__()
+        state['_private_key'] = None
+        state['_loaded_from'] = None
+        return state
+    
+    def _create_signature_template(self, doc, signature_node):
+        """
+        Create signature template.
+        
+        Args:
+            doc: XML document
+            signature_node: Node where signature will be placed
+            
+        Returns:
+            Signature template
+        """
+        signature = super()._create_signature_template(doc, signature_node)
+        
+        if self.exclusive:
+            c14n_method = signature.find(f'{{{DS_NS}}}SignedInfo/{{{DS_NS}}}CanonicalizationMethod')
+            c14n_method.set('Algorithm', C14N_EXCLUSIVE)
+            
+            transforms = signature.find(f'{{{DS_NS}}}SignedInfo/{{{DS_NS}}}Reference/{{{DS_NS}}}Transforms')
+            enveloped = transforms[0]
+            exc_transform = etree.SubElement(transforms, f'{{{DS_NS}}}Transform', Algorithm=C14N_EXCLUSIVE)
+            exc_transform.tail = enveloped.tail
+            enveloped.tail = transforms.text
+        
+        return signature
+    
+    def _sign_document(self, doc, signature_template, credential: Optional[SigningCredential] = None,
+                       placeholder=None):
+        """
+        Sign the document using lxml C14N and cryptography.
+        
+        Args:
+            doc: XML document
+            signature_template: Signature template
+            credential: Credential to sign with instead of the configured certificate
+            placeholder: ExtensionContent node already found, None to look it up
+            
+        Returns:
+            Signed document or None if error
+        """
+        try:
+            if credential is not None:
+                private_key, certificate_der = credential.private_key, credential.certificate_der
+            elif self._load_credentials():
+                private_key, certificate_der = self._private_key, self._certificate_der
+            else:
+                logger.error("Certificate or private key not available")
+                return None
+            
+            # Enveloped-signature transform: digest the document before the
+            # signature element exists, which is equivalent to removing it
+            digest_value = self._digest_document(doc)
+            
+            # Insert signature template into the placeholder
+            ext_content = placeholder if placeholder is not None else self._find_signature_placeholder(doc)
+            if ext_content is not None:
+                ext_content.append(signature_template)
+            else:
+                doc.append(signature_template)
+            
+            signed_info = signature_template.find(f'{{{DS_NS}}}SignedInfo')
+            digest_node = signed_info.find(f'{{{DS_NS}}}Reference/{{{DS_NS}}}DigestValue')
+            
+            # Canonical SignedInfo only varies in DigestValue within a namespace context
+            prefix, suffix = self._signed_info_parts(signed_info, digest_node)
+            digest_node.text = digest_value
+            canonical_signed_info = prefix + digest_value.encode('ascii') + suffix
+            
+            metrics = self.metrics
+            start = time.perf_counter() if metrics is not None else 0.0
+            signature_value = private_key.sign(
+                canonical_signed_info,
+                padding.PKCS1v15(),
+                hashes.SHA1()
+            )
+            if metrics is not None:
+                metrics.lap('rsa', start)
+            
+            signature_template.find(f'{{{DS_NS}}}SignatureValue').text = _wrap_base64(signature_value)
+            signature_template.find(
+                f'{{{DS_NS}}}KeyInfo/{{{DS_NS}}}X509Data/{{{DS_NS}}}X509Certificate'
+            ).text = _wrap_base64(certificate_der) + '\n'
+            
+            logger.info("Document signed successfully")
+            return doc
+        
+        except Exception as e:
+            logger.error(f"Error in cryptography signing: {e}")
+            return None
+    
+    def _digest_document(self, doc) -> str:
+        """
+        Compute SHA-1 digest of the canonical document.
+        
+        Args:
+            doc: XML document without signature
+            
+        Returns:
+            Base64 encoded digest
+        """
+        metrics = self.metrics
+        start = time.perf_counter() if metrics is not None else 0.0
+        
+        if self.streaming:
+            # lxml's C14N writer emits small chunks; only the digest state is kept
+            writer = _HashWriter(hashlib.sha1())
+            doc.getroottree().write_c14n(writer, exclusive=self.exclusive, with_comments=False)
+            if metrics is not None:
+                metrics.lap('digest', start)
+            return base64.b64encode(writer.hash.digest()).decode('ascii')
+        
+        canonical = etree.tostring(
+            doc.getroottree(),
+            method='c14n',
+            exclusive=self.exclusive,
+            with_comments=False
+        )
+        if metrics is not None:
+            start = metrics.lap('c14n', start)
+        
+        digest_value = base64.b64encode(hashlib.sha1(canonical).digest()).decode('ascii')
+        if metrics is not None:
+            metrics.lap('digest', start)
+        
+        return digest_value
+    
+    def _signed_info_parts(self, signed_info, digest_node) -> Tuple[bytes, bytes]:
+        """
+        Get canonical SignedInfo split around the DigestValue text.
+        
+        Args:
+            signed_info: SignedInfo element already in the document
+            digest_node: DigestValue element inside SignedInfo
+            
+        Returns:
+            Tuple of (prefix, suffix) canonical bytes
+        """
+        # Inclusive C14N renders every in-scope namespace on SignedInfo
+        key = (self.exclusive, tuple(sorted((k or '', v) for k, v in signed_info.nsmap.items())))
+        
+        parts = self._signed_info_cache.get(key)
+        if parts is None:
+            digest_node.text = _DIGEST_MARKER
+            canonical = etree.tostring(signed_info, method='c14n', exclusive=self.exclusive)
+            prefix, suffix = canonical.split(_DIGEST_MARKER.encode('ascii'))
+            parts = (prefix, suffix)
+            self._signed_info_cache[key] = parts
+        
+        return parts
+    
+    def _load_credentials(self) -> bool:
+        """
+        Load private key and certificate from configured PEM sources.
+        
+        Returns:
+            True if credentials are loaded
+        """
+        source = (self.private_key_path, self.certificate_content)
+        if self._loaded_from == source and self._private_key is not None:
+            return True
+        
+        if not self.private_key_path or not self.certificate_content:
+            return False
+        
+        try:
+            with open(self.private_key_path, 'rb') as f:
+                self._private_key = serialization.load_pem_private_key(f.read(), password=None)
+            
+            certificate = x509.load_pem_x509_certificate(self.certificate_content.encode('utf-8'))
+            self._certificate_der = certificate.public_bytes(serialization.Encoding.DER)
+            self._loaded_from = source
+            return True
+        
+        except Exception as e:
+            logger.error(f"Error loading signing credentials: {e}")
+            self._private_key = None
+            return False
+
+
+class _HashWriter:
+    """File-like object that hashes everything written to it."""
+    
+    def __init__(self, hash_object):
+        self.hash = hash_object
+    
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        return len(data)
+
+
+def _wrap_base64(data: bytes) -> str:
+    """
+    Base64 encode data in 64 character lines, as xmlsec does.
+    
+    Args:
+        data: Raw bytes
+        
+    Returns:
+        Wrapped base64 string
+    """
+    encoded = base64.b64encode(data).decode('ascii')
+    return '\n'.join(encoded[i:i + 64] for i in range(0, len(encoded), 64))
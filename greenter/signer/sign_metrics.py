@@ -0,0 +1,175 @@
+"""
+Signing instrumentation.
+Per-phase timers and counters for XmlSigner, enabled on demand.
+"""
+
+from typing import Optional, Dict, Any, Tuple
+import bisect
+import threading
+import time
+
+
+# Histogram bucket upper bounds in milliseconds
+DEFAULT_BUCKETS_MS: Tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 1000.0
+)
+
+# Phases in signing order
+PHASES = ('parse', 'xpath', 'template', 'c14n', 'digest', 'rsa', 'xmlsec', 'serialize', 'total')
+
+
+class PhaseTimer:
+    """
+    Latency histogram of one signing phase.
+    """
+    
+    def __init__(self, buckets_ms: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize phase timer.
+        
+        Args:
+            buckets_ms: Sorted bucket upper bounds in milliseconds
+        """
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def observe(self, seconds: float) -> None:
+        """
+        Record one duration.
+        
+        Args:
+            seconds: Elapsed time in seconds
+        """
+        self.counts[bisect.bisect_left(self.buckets_ms, seconds * 1000.0)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert timer to dictionary.
+        
+        Returns:
+            Dictionary with count, total, mean and max in milliseconds and
+            cumulative bucket counts keyed by upper bound ('+Inf' last)
+        """
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets_ms + ('+Inf',), self.counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000.0,
+            'mean_ms': self.total * 1000.0 / self.count if self.count else 0.0,
+            'max_ms': self.max * 1000.0,
+            'buckets': buckets,
+        }
+
+
+class SignMetrics:
+    """
+    Per-phase timers and counters of an XmlSigner.
+    
+    Phases are parse, xpath (placeholder lookup), template, c14n, digest
+    and rsa (pure-Python backend) or xmlsec (native backend, which runs
+    c14n, digest and RSA in one call), serialize, and total for the whole
+    successful signature. In streaming mode canonicalization is fed
+    directly to the hash and recorded as digest.
+    
+    Signers only touch this object when metrics are enabled, so a signer
+    without metrics pays a single None check per phase. Metrics are not
+    shared with worker process copies of a signer.
+    """
+    
+    def __init__(self, buckets_ms: Tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize signing metrics.
+        
+        Args:
+            buckets_ms: Sorted histogram bucket upper bounds in milliseconds
+        """
+        self.buckets_ms = buckets_ms
+        self._lock = threading.Lock()
+        self._timers: Dict[str, PhaseTimer] = {}
+        self._counters: Dict[str, int] = {}
+    
+    def lap(self, phase: str, start: float) -> float:
+        """
+        Record the time elapsed since start for a phase.
+        
+        Args:
+            phase: Phase name
+            start: time.perf_counter() value when the phase started
+            
+        Returns:
+            Current time.perf_counter(), the start of the next phase
+        """
+        now = time.perf_counter()
+        with self._lock:
+            timer = self._timers.get(phase)
+            if timer is None:
+                timer = self._timers[phase] = PhaseTimer(self.buckets_ms)
+            timer.observe(now - start)
+        return now
+    
+    def increment(self, counter: str, value: int = 1) -> None:
+        """
+        Increment a counter.
+        
+        Args:
+            counter: Counter name (e.g. 'signed', 'errors', 'bytes_in')
+            value: Amount to add
+        """
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + value
+    
+    def get_histogram(self, phase: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the histogram of a phase.
+        
+        Args:
+            phase: Phase name
+            
+        Returns:
+            Timer dictionary or None if the phase was never recorded
+        """
+        with self._lock:
+            timer = self._timers.get(phase)
+            return timer.to_dict() if timer is not None else None
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get a copy of all timers and counters.
+        
+        Returns:
+            Dictionary with 'phases' (name -> timer dictionary, in signing
+            order) and 'counters'
+        """
+        with self._lock:
+            order = {phase: index for index, phase in enumerate(PHASES)}
+            phases = sorted(self._timers, key=lambda phase: order.get(phase, len(order)))
+            return {
+                'phases': {phase: self._timers[phase].to_dict() for phase in phases},
+                'counters': dict(self._counters),
+            }
+    
+    def reset(self) -> None:
+        """Clear all timers and counters."""
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+    
+    def __str__(self) -> str:
+        snapshot = self.snapshot()
+        lines = [
+            f"{phase}: n={timer['count']} mean={timer['mean_ms']:.3f}ms max={timer['max_ms']:.3f}ms"
+            for phase, timer in snapshot['phases'].items()
+        ]
+        lines.extend(f"{name}={value}" for name, value in snapshot['counters'].items())
+        return "\n".join(lines)
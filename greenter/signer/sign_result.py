@@ -0,0 +1,66 @@
+"""
+Signing result handler.
+"""
+
+from typing import Optional
+
+
+class SignResult:
+    """
+    Result of signing an XML document.
+    Carries the values needed by printed representations and QR codes
+    so they never have to parse the signed XML again.
+    """
+    
+    def __init__(self, xml_bytes: bytes, digest_value: Optional[str] = None,
+                 signature_value: Optional[str] = None,
+                 certificate_serial: Optional[int] = None):
+        """
+        Initialize signing result.
+        
+        Args:
+            xml_bytes: Signed XML as UTF-8 bytes
+            digest_value: Base64 DigestValue (hash code of the document)
+            signature_value: Base64 SignatureValue without line breaks
+            certificate_serial: Serial number of the signing certificate
+        """
+        self._xml_bytes = xml_bytes
+        self._xml: Optional[str] = None
+        self._digest_value = digest_value
+        self._signature_value = signature_value
+        self._certificate_serial = certificate_serial
+    
+    @property
+    def xml_bytes(self) -> bytes:
+        """Signed XML as UTF-8 bytes."""
+        return self._xml_bytes
+    
+    @property
+    def xml(self) -> str:
+        """Signed XML as string."""
+        if self._xml is None:
+            self._xml = self._xml_bytes.decode('utf-8')
+        return self._xml
+    
+    @property
+    def digest_value(self) -> Optional[str]:
+        """DigestValue of the document (hash code)."""
+        return self._digest_value
+    
+    @property
+    def signature_value(self) -> Optional[str]:
+        """SignatureValue of the document."""
+        return self._signature_value
+    
+    @property
+    def certificate_serial(self) -> Optional[int]:
+        """Serial number of the signing certificate."""
+        return self._certificate_serial
+    
+    def get_hash(self) -> Optional[str]:
+        """Get document hash code (DigestValue)."""
+        return self._digest_value
+    
+    def __str__(self):
+        """String representation."""
+        return f"Signed: {len(self._xml_bytes)} bytes, DigestValue {self._digest_value}"
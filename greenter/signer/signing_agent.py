@@ -0,0 +1,322 @@
+"""
+Signing agent.
+Holds signing keys in one process and serves sign requests over a Unix
+domain socket, so pre-fork workers do not each decrypt the PKCS#12.
+
+Run as a daemon with:
+    GREENTER_CERT_PASSWORD=**** python -m greenter.signer.signing_agent \
+        --socket /run/greenter/sign.sock --certificate certificado.pfx
+"""
+
+from typing import Optional, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import logging
+import os
+import signal
+import socketserver
+import struct
+import threading
+
+from .xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from .crypto_signer import CryptoXmlSigner
+from .certificate_store import CertificateStore
+
+
+logger = logging.getLogger(__name__)
+
+
+# Frame header: request id, operation (requests) or status (responses), payload length.
+# The payload is a sequence of fields, each prefixed by its length.
+HEADER = struct.Struct('!IBI')
+FIELD_LENGTH = struct.Struct('!I')
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+OP_PING = 0
+OP_SIGN = 1
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+
+def pack_frame(request_id: int, code: int, fields: List[bytes]) -> bytes:
+    """
+    Build a protocol frame.
+    
+    Args:
+        request_id: Request identifier, echoed in the response
+        code: Operation (request) or status (response)
+        fields: Payload fields
+        
+    Returns:
+        Frame bytes
+    """
+    payload = b''.join(FIELD_LENGTH.pack(len(field)) + field for field in fields)
+    return HEADER.pack(request_id, code, len(payload)) + payload
+
+
+def read_frame(stream) -> Optional[Tuple[int, int, List[bytes]]]:
+    """
+    Read a protocol frame from a binary stream.
+    
+    Args:
+        stream: Buffered binary file object
+        
+    Returns:
+        Tuple of (request_id, code, fields) or None on end of stream
+    """
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    
+    request_id, code, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"Frame too large: {length} bytes")
+    
+    payload = stream.read(length)
+    if len(payload) < length:
+        return None
+    
+    fields = []
+    offset = 0
+    while offset < length:
+        if length - offset < FIELD_LENGTH.size:
+            raise ValueError("Malformed frame: truncated field length")
+        (size,) = FIELD_LENGTH.unpack_from(payload, offset)
+        offset += FIELD_LENGTH.size
+        if size > length - offset:
+            raise ValueError(f"Malformed frame: field of {size} bytes exceeds the payload")
+        fields.append(payload[offset:offset + size])
+        offset += size
+    
+    return request_id, code, fields
+
+
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serves one client connection.
+    
+    Frames are read in order and signed concurrently in the agent pool;
+    responses are written as soon as each signature completes, so clients
+    can pipeline requests on a single connection. When max_pending
+    requests are in flight the handler stops reading, which pushes back on
+    clients through the socket.
+    """
+    
+    def handle(self):
+        agent: SigningAgent = self.server.agent
+        write_lock = threading.Lock()
+        
+        def respond(request_id: int, status: int, fields: List[bytes]):
+            frame = pack_frame(request_id, status, fields)
+            try:
+                with write_lock:
+                    self.wfile.write(frame)
+            except (OSError, ValueError):
+                # Client went away; remaining responses are dropped
+                pass
+        
+        while True:
+            try:
+                frame = read_frame(self.rfile)
+            except (OSError, ValueError) as e:
+                logger.error(f"Signing agent connection error: {e}")
+                return
+            if frame is None:
+                return
+            
+            request_id, op, fields = frame
+            if op == OP_PING:
+                respond(request_id, STATUS_OK, [])
+            elif op == OP_SIGN and len(fields) == 2:
+                agent.submit(request_id, fields, respond)
+            else:
+                respond(request_id, STATUS_ERROR, [f"Unknown operation {op}".encode('utf-8')])
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SigningAgent:
+    """
+    Unix socket server that signs XML with keys held in this process.
+    
+    Requests carry the RUC to sign for; RUCs registered in the certificate
+    store use their own key, an empty RUC uses the signer's certificate.
+    Any other RUC is rejected, never signed with another certificate.
+    """
+    
+    def __init__(self, socket_path: str, signer: Optional[XmlSigner] = None,
+                 certificate_store: Optional[CertificateStore] = None,
+                 workers: Optional[int] = None, max_pending: Optional[int] = None):
+        """
+        Initialize signing agent.
+        
+        Args:
+            socket_path: Path of the Unix domain socket
+            signer: Signer with the default certificate, defaults to the available backend
+            certificate_store: Per-RUC certificates
+            workers: Signing threads
+            max_pending: Requests queued or signing at once across all
+                connections, defaults to four per worker
+        """
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.socket_path = socket_path
+        self.signer = signer or (XmlSigner() if XMLSEC_AVAILABLE else CryptoXmlSigner())
+        self.certificate_store = certificate_store
+        self.max_pending = max_pending or workers * 4
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='greenter-agent')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._server: Optional[_UnixServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    def submit(self, request_id: int, fields: List[bytes], respond) -> None:
+        """
+        Queue a sign request, blocking while max_pending are in flight.
+        
+        Args:
+            request_id: Request identifier
+            fields: Request fields (ruc, xml)
+            respond: Callback taking (request_id, status, fields)
+        """
+        self._slots.acquire()
+        try:
+            self.pool.submit(self._sign_and_release, request_id, fields, respond)
+        except RuntimeError:
+            # Pool shut down while closing
+            self._slots.release()
+            respond(request_id, STATUS_ERROR, [b"Signing agent is shutting down"])
+    
+    def _sign_and_release(self, request_id: int, fields: List[bytes], respond) -> None:
+        """Run handle_sign and free its in-flight slot."""
+        try:
+            self.handle_sign(request_id, fields, respond)
+        finally:
+            self._slots.release()
+    
+    def handle_sign(self, request_id: int, fields: List[bytes], respond) -> None:
+        """
+        Sign one request and send the response.
+        
+        Args:
+            request_id: Request identifier
+            fields: Request fields (ruc, xml)
+            respond: Callback taking (request_id, status, fields)
+        """
+        try:
+            ruc = fields[0].decode('utf-8')
+            credential = None
+            if ruc:
+                # Never fall back to the default certificate for another RUC
+                if self.certificate_store is None or ruc not in self.certificate_store:
+                    raise ValueError(f"No certificate registered for RUC {ruc}")
+                credential = self.certificate_store.get(ruc)
+                if credential is None:
+                    raise ValueError(f"Certificate for RUC {ruc} could not be loaded")
+            
+            result = self.signer.sign_with_result(fields[1].decode('utf-8'), credential)
+            if result is None:
+                raise ValueError("Signing failed")
+            
+            respond(request_id, STATUS_OK, [
+                result.xml_bytes,
+                (result.digest_value or '').encode('ascii'),
+                (result.signature_value or '').encode('ascii'),
+                str(result.certificate_serial or '').encode('ascii'),
+            ])
+        
+        except Exception as e:
+            logger.error(f"Signing agent request failed: {e}")
+            respond(request_id, STATUS_ERROR, [str(e).encode('utf-8')])
+    
+    def start(self) -> None:
+        """Bind the socket and serve in a background thread."""
+        self._bind()
+        self._thread = threading.Thread(target=self._server.serve_forever, name='greenter-agent', daemon=True)
+        self._thread.start()
+    
+    def serve_forever(self) -> None:
+        """Bind the socket and serve until close() is called."""
+        self._bind()
+        self._server.serve_forever()
+    
+    def close(self) -> None:
+        """Stop serving and remove the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.pool.shutdown(wait=False)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _bind(self) -> None:
+        """Create the server socket, readable only by the agent user."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _AgentRequestHandler)
+        finally:
+            os.umask(old_umask)
+        
+        self._server.agent = self
+        logger.info(f"Signing agent listening on {self.socket_path}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Signing agent daemon entry point."""
+    parser = argparse.ArgumentParser(description="Greenter signing agent", allow_abbrev=False)
+    parser.add_argument('--socket', required=True, help="Unix socket path")
+    parser.add_argument('--certificate', help="Default certificate (.pfx/.p12 or .pem)")
+    # Never a password option: command lines are visible to other users
+    parser.add_argument('--password-file',
+                        help="File holding the certificate password (default: $GREENTER_CERT_PASSWORD)")
+    parser.add_argument('--tenant', action='append', default=[], metavar='RUC=PFX',
+                        help="Per-RUC certificate, same password as the default certificate")
+    parser.add_argument('--backend', choices=('xmlsec', 'cryptography'),
+                        default='xmlsec' if XMLSEC_AVAILABLE else 'cryptography')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="Requests in flight before clients are pushed back")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    password = os.environ.get('GREENTER_CERT_PASSWORD')
+    if args.password_file:
+        with open(args.password_file, 'r', encoding='utf-8') as f:
+            password = f.read().rstrip('\r\n')
+    
+    signer = XmlSigner() if args.backend == 'xmlsec' else CryptoXmlSigner()
+    if args.certificate:
+        signer.set_certificate(args.certificate, password)
+    
+    store = None
+    if args.tenant:
+        store = CertificateStore()
+        for tenant in args.tenant:
+            ruc, path = tenant.split('=', 1)
+            store.add(ruc, path, password)
+    
+    agent = SigningAgent(args.socket, signer, store, args.workers, args.max_pending)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=agent._server.shutdown).start())
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Executor for asyncio signing.
+Offloads XmlSigner work to threads or processes with bounded concurrency.
+"""
+
+from typing import Optional, Dict, Any
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+import asyncio
+import functools
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+
+class SigningExecutor:
+    """
+    Runs signer methods in an executor without blocking the event loop.
+    
+    At most max_concurrency signatures are submitted at once; further
+    callers wait on a semaphore and are reported by queue_depth, so
+    producers can apply backpressure.
+    """
+    
+    def __init__(self, signer, executor: Optional[Executor] = None,
+                 max_concurrency: Optional[int] = None, use_processes: bool = False,
+                 max_workers: Optional[int] = None):
+        """
+        Initialize signing executor.
+        
+        Args:
+            signer: XmlSigner whose methods are offloaded
+            executor: Executor to use, None to create one
+            max_concurrency: Maximum signatures submitted at once
+            use_processes: Create a process pool instead of a thread pool
+            max_workers: Workers of the created pool
+        """
+        self.signer = signer
+        self.max_concurrency = max_concurrency or max_workers or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        self._process_signer = False
+        
+        if executor is None and use_processes:
+            # Each worker process keeps its own copy of the signer
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_process_signer,
+                initargs=(signer,)
+            )
+            self._process_signer = True
+        elif executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='greenter-sign')
+        
+        self.executor = executor
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._waiting = 0
+        self._running = 0
+        self.completed = 0
+        self.cancelled = 0
+    
+    @property
+    def queue_depth(self) -> int:
+        """Signatures waiting for a slot or running."""
+        return self._waiting + self._running
+    
+    async def submit(self, method: str, *args) -> Any:
+        """
+        Run a signer method in the executor.
+        
+        Cancelling the awaiting task cancels the pending work if it has
+        not started yet.
+        
+        Args:
+            method: Name of the XmlSigner method
+            *args: Method arguments
+            
+        Returns:
+            Method result
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        
+        self._waiting += 1
+        acquired = False
+        try:
+            async with self._semaphore:
+                self._waiting -= 1
+                acquired = True
+                self._running += 1
+                try:
+                    if self._process_signer:
+                        call = functools.partial(_call_process_signer, method, *args)
+                    else:
+                        call = functools.partial(getattr(self.signer, method), *args)
+                    result = await loop.run_in_executor(self.executor, call)
+                    self.completed += 1
+                    return result
+                finally:
+                    self._running -= 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            if not acquired:
+                self._waiting -= 1
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get executor statistics.
+        
+        Returns:
+            Dictionary with waiting, running, completed, cancelled and max_concurrency
+        """
+        return {
+            'waiting': self._waiting,
+            'running': self._running,
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+            'max_concurrency': self.max_concurrency,
+        }
+    
+    def shutdown(self, wait: bool = True):
+        """
+        Shutdown the executor if it was created here.
+        
+        Args:
+            wait: Wait for pending work to finish
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+
+# Signer copy of a worker process, set by the pool initializer
+_process_signer = None
+
+
+def _init_process_signer(signer):
+    """Keep the signer received by a worker process."""
+    global _process_signer
+    _process_signer = signer
+
+
+def _call_process_signer(method: str, *args):
+    """Call a method of the worker process signer."""
+    return getattr(_process_signer, method)(*args)
@@ -0,0 +1,133 @@
+"""
+Signer warm-up report.
+"""
+
+from typing import Optional, Dict, Any, List
+from datetime import datetime, timezone
+
+
+class WarmupReport:
+    """
+    Result of warming up an XmlSigner.
+    Describes the signing key and the latency of test signatures, so
+    readiness checks can gate traffic on it.
+    """
+    
+    def __init__(self, ready: bool = False, error: Optional[str] = None,
+                 key_algorithm: Optional[str] = None, key_size: Optional[int] = None,
+                 subject: Optional[str] = None, serial_number: Optional[int] = None,
+                 not_valid_after: Optional[datetime] = None,
+                 latencies_ms: Optional[List[float]] = None):
+        """
+        Initialize warm-up report.
+        
+        Args:
+            ready: Whether the signer produced a valid test signature
+            error: Error message if not ready
+            key_algorithm: Public key algorithm (e.g. 'RSA')
+            key_size: Key size in bits
+            subject: Certificate subject
+            serial_number: Certificate serial number
+            not_valid_after: Certificate expiry (UTC)
+            latencies_ms: Latency of each test signature, first one cold
+        """
+        self._ready = ready
+        self._error = error
+        self._key_algorithm = key_algorithm
+        self._key_size = key_size
+        self._subject = subject
+        self._serial_number = serial_number
+        self._not_valid_after = not_valid_after
+        self._latencies_ms = latencies_ms or []
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the signer is ready."""
+        return self._ready
+    
+    @property
+    def error(self) -> Optional[str]:
+        """Error message."""
+        return self._error
+    
+    @property
+    def key_algorithm(self) -> Optional[str]:
+        """Public key algorithm."""
+        return self._key_algorithm
+    
+    @property
+    def key_size(self) -> Optional[int]:
+        """Key size in bits."""
+        return self._key_size
+    
+    @property
+    def subject(self) -> Optional[str]:
+        """Certificate subject."""
+        return self._subject
+    
+    @property
+    def serial_number(self) -> Optional[int]:
+        """Certificate serial number."""
+        return self._serial_number
+    
+    @property
+    def not_valid_after(self) -> Optional[datetime]:
+        """Certificate expiry (UTC)."""
+        return self._not_valid_after
+    
+    @property
+    def latencies_ms(self) -> List[float]:
+        """Latency of each test signature in milliseconds."""
+        return self._latencies_ms
+    
+    @property
+    def cold_latency_ms(self) -> Optional[float]:
+        """Latency of the first test signature."""
+        return self._latencies_ms[0] if self._latencies_ms else None
+    
+    @property
+    def warm_latency_ms(self) -> Optional[float]:
+        """Mean latency of the test signatures after the first one."""
+        warm = self._latencies_ms[1:] or self._latencies_ms
+        return sum(warm) / len(warm) if warm else None
+    
+    def is_ready(self) -> bool:
+        """Check if the signer is ready."""
+        return self._ready
+    
+    def get_days_to_expiry(self, now: Optional[datetime] = None) -> Optional[int]:
+        """
+        Get days until the certificate expires.
+        
+        Args:
+            now: Reference time (UTC), defaults to current time
+            
+        Returns:
+            Number of days, negative if expired, or None if unknown
+        """
+        if self._not_valid_after is None:
+            return None
+        return (self._not_valid_after - (now or datetime.now(timezone.utc))).days
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert report to dictionary."""
+        return {
+            'ready': self._ready,
+            'error': self._error,
+            'key_algorithm': self._key_algorithm,
+            'key_size': self._key_size,
+            'subject': self._subject,
+            'serial_number': self._serial_number,
+            'not_valid_after': self._not_valid_after.isoformat() if self._not_valid_after else None,
+            'days_to_expiry': self.get_days_to_expiry(),
+            'cold_latency_ms': self.cold_latency_ms,
+            'warm_latency_ms': self.warm_latency_ms,
+        }
+    
+    def __str__(self):
+        if not self._ready:
+            return f"WarmupReport(ready=False, error={self._error})"
+        return (
+            f"WarmupReport(ready=True, {self._key_algorithm}-{self._key_size}, "
+            f"expires={self._not_valid_after:%Y-%m-%d}, warm={self.warm_latency_ms:.3f}ms)"
+        )
@@ -4,14 +4,28 @@ Migrated from packages/xmldsig functionality.
 """
 
 from typing import Optional
+from concurrent.futures import Executor
+from datetime import datetime, timezone
+import base64
 import logging
 import tempfile
+import time
 import os
 from pathlib import Path
 
+from .sign_result import SignResult
+from .certificate_store import SigningCredential, _not_valid_after
+from .signing_executor import SigningExecutor
+from .sign_metrics import SignMetrics
+from .warmup_report import WarmupReport
+
+import lxml.etree as etree
+
 try:
     import xmlsec
-    import lxml.etree as etree
+    # Process-wide library setup, once; signing contexts are per call and
+    # need no lock, so threads sign concurrently
+    xmlsec.init()
     XMLSEC_AVAILABLE = True
 except ImportError:
     XMLSEC_AVAILABLE = False
@@ -21,6 +35,34 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+DS_NS = 'http://www.w3.org/2000/09/xmldsig#'
+EXT_NS = 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2'
+DIGEST_VALUE_PATH = f'{{{DS_NS}}}SignedInfo/{{{DS_NS}}}Reference/{{{DS_NS}}}DigestValue'
+SIGNATURE_VALUE_PATH = f'{{{DS_NS}}}SignatureValue'
+
+# UBLExtensions is a child of the document root in every UBL/SUNAT document;
+# the anchored expression avoids a descendant scan of the whole tree and the
+# [1] predicate lets libxml2 stop at the first match instead of testing every
+# root child (invoice lines are root children too)
+_PLACEHOLDER_XPATH = etree.XPath(
+    '/*/ext:UBLExtensions[1]/ext:UBLExtension/ext:ExtensionContent', namespaces={'ext': EXT_NS}
+)
+_PLACEHOLDER_ANY_XPATH = etree.XPath(
+    '//ext:UBLExtensions/ext:UBLExtension/ext:ExtensionContent', namespaces={'ext': EXT_NS}
+)
+
+# Smallest document with a signature placeholder, signed by warm_up()
+WARMUP_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2" '
+    'xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2">'
+    '<ext:UBLExtensions><ext:UBLExtension><ext:ExtensionContent/></ext:UBLExtension></ext:UBLExtensions>'
+    '<cbc:ID>F000-00000000</cbc:ID>'
+    '</Invoice>'
+)
+
+
 class XmlSigner:
     """
     XML Digital Signer for SUNAT documents.
@@ -32,9 +74,23 @@ class XmlSigner:
         self.private_key_path: Optional[str] = None
         self.certificate_content: Optional[str] = None
         self.certificate_password: Optional[str] = None
+        self._certificate_serial = (None, None)
+        self._executor: Optional[SigningExecutor] = None
+        self._owns_temp_files = False
+        self.metrics: Optional[SignMetrics] = None
+        self._certificate_error: Optional[str] = None
         
-        if not XMLSEC_AVAILABLE:
-            logger.warning("xmlsec not available. XML signing disabled.")
+        if not self.is_available():
+            logger.warning(f"{type(self).__name__} backend not available. XML signing disabled.")
+    
+    def is_available(self) -> bool:
+        """
+        Check whether the signing backend can be used.
+        
+        Returns:
+            True if the backend dependencies are installed
+        """
+        return XMLSEC_AVAILABLE
     
     def set_certificate(self, certificate: str, password: Optional[str] = None):
         """
@@ -45,10 +101,13 @@ class XmlSigner:
             password: Certificate password (for .pfx/.p12 files)
         """
         self.certificate_password = password
+        self._certificate_error = None
         
         if os.path.isfile(certificate):
             # It's a file path
             self.certificate_path = certificate
+            # The caller's file: never removed by __del__, even under the temp dir
+            self._owns_temp_files = False
             if certificate.lower().endswith(('.pfx', '.p12')):
                 # For .pfx/.p12 files, we need to extract the certificate and key
                 self._extract_from_pkcs12(certificate, password)
@@ -71,49 +130,271 @@ class XmlSigner:
         """
         self.private_key_path = private_key_path
     
-    def sign(self, xml_content: str) -> Optional[str]:
+    def sign(self, xml_content: str, credential: Optional[SigningCredential] = None) -> Optional[str]:
         """
         Sign XML content.
         
         Args:
             xml_content: XML content to sign
+            credential: Credential to sign with (e.g. from a CertificateStore),
+                defaults to the configured certificate
             
         Returns:
             Signed XML content or None if error
         """
-        if not XMLSEC_AVAILABLE:
-            logger.warning("xmlsec not available. Returning unsigned XML.")
+        if not self.is_available():
+            logger.warning(f"{type(self).__name__} backend not available. Returning unsigned XML.")
             return xml_content
         
-        if not self.certificate_path:
+        result = self.sign_with_result(xml_content, credential)
+        return result.xml if result else None
+    
+    def warm_up(self, iterations: int = 3,
+                credential: Optional[SigningCredential] = None) -> WarmupReport:
+        """
+        Load the key and test-sign a small document.
+        
+        Surfaces certificate errors at startup instead of on the first
+        real request, and leaves the key and caches hot.
+        
+        Args:
+            iterations: Number of test signatures
+            credential: Credential to warm up instead of the configured certificate
+            
+        Returns:
+            WarmupReport with key details, expiry and latency
+        """
+        if not self.is_available():
+            return WarmupReport(error=f"{type(self).__name__} backend not available")
+        
+        if credential is None and self._certificate_error:
+            return WarmupReport(error=self._certificate_error)
+        
+        latencies = []
+        result = None
+        for _ in range(max(1, iterations)):
+            start = time.perf_counter()
+            result = self.sign_with_result(WARMUP_XML, credential)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            if result is None:
+                return WarmupReport(error="Test signature failed", latencies_ms=latencies)
+        
+        try:
+            from cryptography import x509
+            from .xml_verifier import XmlVerifier
+            
+            # Catches backends that fall back to a placeholder signature; the
+            # certificate is our own, so only the signature math is checked
+            verification = XmlVerifier().verify(result.xml_bytes)
+            if not verification.is_intact():
+                return WarmupReport(
+                    error=f"Test signature is not valid: {verification.error}",
+                    latencies_ms=latencies
+                )
+            
+            # Read the certificate from the signature, whichever backend holds the key
+            certificate_b64 = etree.fromstring(result.xml_bytes).findtext(f'.//{{{DS_NS}}}X509Certificate')
+            certificate = x509.load_der_x509_certificate(base64.b64decode(certificate_b64))
+            public_key = certificate.public_key()
+            
+        except Exception as e:
+            logger.error(f"Error checking test signature: {e}")
+            return WarmupReport(error=f"Error checking test signature: {e}", latencies_ms=latencies)
+        
+        not_valid_after = _not_valid_after(certificate)
+        expired = datetime.now(timezone.utc) >= not_valid_after
+        
+        return WarmupReport(
+            ready=not expired,
+            error=f"Certificate expired on {not_valid_after:%Y-%m-%d}" if expired else None,
+            key_algorithm=type(public_key).__name__.replace('PublicKey', '').lstrip('_'),
+            key_size=getattr(public_key, 'key_size', None),
+            subject=certificate.subject.rfc4514_string(),
+            serial_number=certificate.serial_number,
+            not_valid_after=not_valid_after,
+            latencies_ms=latencies
+        )
+    
+    def enable_metrics(self, metrics: Optional[SignMetrics] = None) -> SignMetrics:
+        """
+        Enable per-phase timers and counters.
+        
+        Args:
+            metrics: Metrics to record into, None to create new ones
+            
+        Returns:
+            Metrics being recorded
+        """
+        self.metrics = metrics or SignMetrics()
+        return self.metrics
+    
+    def disable_metrics(self) -> None:
+        """Disable per-phase timers and counters."""
+        self.metrics = None
+    
+    def set_executor(self, executor: Optional[Executor] = None, max_concurrency: Optional[int] = None,
+                     use_processes: bool = False, max_workers: Optional[int] = None):
+        """
+        Configure the executor used by the async signing methods.
+        
+        Args:
+            executor: Thread or process executor, None to create one
+            max_concurrency: Maximum signatures in flight, extra callers wait
+            use_processes: Create a process pool instead of a thread pool
+            max_workers: Workers of the created pool
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = SigningExecutor(self, executor, max_concurrency, use_processes, max_workers)
+    
+    @property
+    def queue_depth(self) -> int:
+        """Async signatures waiting or running, for backpressure."""
+        return self._executor.queue_depth if self._executor is not None else 0
+    
+    async def sign_async(self, xml_content: str,
+                         credential: Optional[SigningCredential] = None) -> Optional[str]:
+        """
+        Sign XML content without blocking the event loop.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Credential to sign with, defaults to the configured certificate
+            
+        Returns:
+            Signed XML content or None if error
+        """
+        return await self._get_executor().submit('sign', xml_content, credential)
+    
+    async def sign_with_result_async(self, xml_content: str,
+                                     credential: Optional[SigningCredential] = None) -> Optional[SignResult]:
+        """
+        Sign XML content without blocking the event loop, capturing signature values.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Credential to sign with, defaults to the configured certificate
+            
+        Returns:
+            SignResult or None if error
+        """
+        return await self._get_executor().submit('sign_with_result', xml_content, credential)
+    
+    def _get_executor(self) -> SigningExecutor:
+        """Get the async executor, creating a thread based one by default."""
+        if self._executor is None:
+            self._executor = SigningExecutor(self)
+        return self._executor
+    
+    def sign_with_result(self, xml_content: str,
+                         credential: Optional[SigningCredential] = None) -> Optional[SignResult]:
+        """
+        Sign XML content and capture the signature values.
+        
+        Args:
+            xml_content: XML content to sign
+            credential: Credential to sign with, defaults to the configured certificate
+            
+        Returns:
+            SignResult with signed bytes, DigestValue, SignatureValue and
+            certificate serial, or None if error
+        """
+        if not self.is_available():
+            logger.error(f"{type(self).__name__} backend not available")
+            return None
+        
+        if credential is None and not self.certificate_path:
             logger.error("No certificate configured")
             return None
         
+        metrics = self.metrics
+        start = begin = time.perf_counter() if metrics is not None else 0.0
+        
         try:
             # Parse XML
-            doc = etree.fromstring(xml_content.encode('utf-8'))
+            xml_bytes = xml_content.encode('utf-8')
+            doc = etree.fromstring(xml_bytes)
+            if metrics is not None:
+                start = metrics.lap('parse', start)
             
             # Find signature placeholder
             signature_node = self._find_signature_placeholder(doc)
             if signature_node is None:
                 logger.error("No signature placeholder found in XML")
+                self._count_error()
                 return None
+            if metrics is not None:
+                start = metrics.lap('xpath', start)
             
             # Create signature template
             signature = self._create_signature_template(doc, signature_node)
+            if metrics is not None:
+                metrics.lap('template', start)
             
-            # Sign the document
-            signed_doc = self._sign_document(doc, signature)
+            # Sign the document (backends record their own phases)
+            signed_doc = self._sign_document(doc, signature, credential, signature_node)
             if signed_doc is None:
+                self._count_error()
                 return None
+            if metrics is not None:
+                start = time.perf_counter()
             
-            # Return signed XML
-            return etree.tostring(signed_doc, encoding='unicode', pretty_print=True)
+            # Never re-indent: whitespace added after digesting is part of the
+            # signed content and breaks the signature of compact documents
+            signed_bytes = etree.tostring(signed_doc, encoding='utf-8')
+            if metrics is not None:
+                metrics.lap('serialize', start)
+                metrics.lap('total', begin)
+                metrics.increment('signed')
+                metrics.increment('bytes_in', len(xml_bytes))
+                metrics.increment('bytes_out', len(signed_bytes))
+            
+            # Values are read from the inserted signature node, not the whole document
+            return SignResult(
+                xml_bytes=signed_bytes,
+                digest_value=signature.findtext(DIGEST_VALUE_PATH),
+                signature_value=''.join((signature.findtext(SIGNATURE_VALUE_PATH) or '').split()),
+                certificate_serial=(
+                    credential.serial_number if credential is not None else self._get_certificate_serial()
+                )
+            )
             
         except Exception as e:
             logger.error(f"Error signing XML: {e}")
+            self._count_error()
             return None
     
+    def _count_error(self) -> None:
+        """Count a failed signature when metrics are enabled."""
+        if self.metrics is not None:
+            self.metrics.increment('errors')
+    
+    def _get_certificate_serial(self) -> Optional[int]:
+        """
+        Get serial number of the configured certificate.
+        
+        Returns:
+            Certificate serial number or None if unknown
+        """
+        if not self.certificate_content:
+            return None
+        
+        cached_content, serial = self._certificate_serial
+        if cached_content == self.certificate_content:
+            return serial
+        
+        try:
+            from cryptography import x509
+            
+            certificate = x509.load_pem_x509_certificate(self.certificate_content.encode('utf-8'))
+            serial = certificate.serial_number
+        except Exception as e:
+            logger.warning(f"Could not read certificate serial: {e}")
+            serial = None
+        
+        self._certificate_serial = (self.certificate_content, serial)
+        return serial
+    
     def _extract_from_pkcs12(self, pkcs12_path: str, password: Optional[str]):
         """
         Extract certificate and private key from PKCS12 file.
@@ -153,6 +434,8 @@ class XmlSigner:
             
         except Exception as e:
             logger.error(f"Error extracting from PKCS12: {e}")
+            # Kept for warm_up(), which reports it instead of a failed signature
+            self._certificate_error = f"Error extracting from PKCS12: {e}"
     
     def _save_certificate_to_temp(self):
         """Save certificate content to temporary file."""
@@ -164,6 +447,7 @@ class XmlSigner:
             with tempfile.NamedTemporaryFile(mode='w', suffix='.pem', delete=False) as f:
                 f.write(self.certificate_content)
                 self.certificate_path = f.name
+                self._owns_temp_files = True
                 
         except Exception as e:
             logger.error(f"Error saving certificate to temp file: {e}")
@@ -189,15 +473,9 @@ class XmlSigner:
         Returns:
             Signature node or None
         """
-        # Look for UBLExtensions/UBLExtension/ExtensionContent
-        namespaces = {
-            'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
-            'ds': 'http://www.w3.org/2000/09/xmldsig#'
-        }
-        
-        # Find extension content for signature
-        ext_content = doc.xpath('//ext:UBLExtensions/ext:UBLExtension/ext:ExtensionContent', 
-                               namespaces=namespaces)
+        # Look for UBLExtensions/UBLExtension/ExtensionContent under the root,
+        # then anywhere for non-standard layouts
+        ext_content = _PLACEHOLDER_XPATH(doc) or _PLACEHOLDER_ANY_XPATH(doc)
         
         if ext_content:
             return ext_content[0]
@@ -243,13 +521,16 @@ class XmlSigner:
         
         return etree.fromstring(signature_template)
     
-    def _sign_document(self, doc, signature_template):
+    def _sign_document(self, doc, signature_template, credential: Optional[SigningCredential] = None,
+                       placeholder=None):
         """
         Sign the document using xmlsec.
         
         Args:
             doc: XML document
             signature_template: Signature template
+            credential: Credential to sign with instead of the configured certificate
+            placeholder: ExtensionContent node already found, None to look it up
             
         Returns:
             Signed document or None if error
@@ -259,11 +540,8 @@ class XmlSigner:
             return doc
         
         try:
-            # Initialize xmlsec library
-            xmlsec.init()
-            
             # Find the signature placeholder and insert signature template
-            ext_content = self._find_signature_placeholder(doc)
+            ext_content = placeholder if placeholder is not None else self._find_signature_placeholder(doc)
             if ext_content is not None:
                 ext_content.append(signature_template)
             else:
@@ -274,26 +552,28 @@ class XmlSigner:
             ctx = xmlsec.SignatureContext()
             
             # Load certificate and private key
-            if self.certificate_path and self.private_key_path:
-                # Load private key
-                key = xmlsec.Key.from_file(self.private_key_path, xmlsec.KeyFormat.PEM)
-                
-                # Load certificate
-                key.load_cert_from_file(self.certificate_path, xmlsec.KeyFormat.PEM)
+            if credential is not None or (self.certificate_path and self.private_key_path):
+                if credential is not None:
+                    # Key decoded once per credential and reused across calls
+                    key = self._get_xmlsec_key(credential)
+                else:
+                    # Load private key
+                    key = xmlsec.Key.from_file(self.private_key_path, xmlsec.KeyFormat.PEM)
+                    
+                    # Load certificate
+                    key.load_cert_from_file(self.certificate_path, xmlsec.KeyFormat.PEM)
                 
                 # Set key in context
                 ctx.key = key
                 
-                # Find signature node in document
-                signature_node = doc.find('.//{http://www.w3.org/2000/09/xmldsig#}Signature')
-                if signature_node is not None:
-                    # Sign the document
-                    ctx.sign(signature_node)
-                    logger.info("Document signed successfully")
-                    return doc
-                else:
-                    logger.error("Signature node not found in document")
-                    return None
+                # The inserted template is the signature node, no need to search for it
+                metrics = self.metrics
+                start = time.perf_counter() if metrics is not None else 0.0
+                ctx.sign(signature_template)
+                if metrics is not None:
+                    metrics.lap('xmlsec', start)
+                logger.info("Document signed successfully")
+                return doc
             else:
                 logger.error("Certificate or private key not available")
                 return None
@@ -302,11 +582,23 @@ class XmlSigner:
             logger.error(f"Error in xmlsec signing: {e}")
             # For development, return a document with a placeholder signature
             return self._add_placeholder_signature(doc)
-        finally:
-            try:
-                xmlsec.shutdown()
-            except:
-                pass
+    
+    def _get_xmlsec_key(self, credential: SigningCredential):
+        """
+        Get xmlsec key for a credential, cached on the credential.
+        
+        Args:
+            credential: Signing credential
+            
+        Returns:
+            xmlsec.Key with certificate loaded
+        """
+        key = credential.backend_cache.get('xmlsec')
+        if key is None:
+            key = xmlsec.Key.from_memory(credential.key_pem, xmlsec.KeyFormat.PEM)
+            key.load_cert_from_memory(credential.certificate_pem, xmlsec.KeyFormat.PEM)
+            credential.backend_cache['xmlsec'] = key
+        return key
     
     def _add_placeholder_signature(self, doc):
         """
@@ -359,9 +651,17 @@ class XmlSigner:
             logger.error(f"Error adding placeholder signature: {e}")
             return doc
     
+    def __getstate__(self):
+        """Copies sent to worker processes share, but do not own, the temp files."""
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        state['metrics'] = None
+        state['_owns_temp_files'] = False
+        return state
+    
     def __del__(self):
         """Cleanup temporary files."""
-        if (self.certificate_path and 
+        if (getattr(self, '_owns_temp_files', False) and self.certificate_path and 
             self.certificate_path.startswith(tempfile.gettempdir())):
             try:
                 os.unlink(self.certificate_path)
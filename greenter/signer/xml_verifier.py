@@ -0,0 +1,533 @@
+"""
+XML Digital Signature verifier for signed documents and SUNAT CDRs.
+"""
+
+from typing import Optional, Dict, Any, List, Iterable, Union, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import base64
+import hashlib
+import io
+import logging
+import threading
+import zipfile
+
+import lxml.etree as etree
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+    logging.warning("cryptography not available. XML signature verification will not work.")
+
+
+logger = logging.getLogger(__name__)
+
+
+DS_NS = 'http://www.w3.org/2000/09/xmldsig#'
+EXT_NS = 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2'
+ENVELOPED_SIGNATURE = 'http://www.w3.org/2000/09/xmldsig#enveloped-signature'
+
+# Algorithm URI -> (exclusive, with_comments)
+C14N_METHODS = {
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315': (False, False),
+    'http://www.w3.org/TR/2001/REC-xml-c14n-20010315#WithComments': (False, True),
+    'http://www.w3.org/2001/10/xml-exc-c14n#': (True, False),
+    'http://www.w3.org/2001/10/xml-exc-c14n#WithComments': (True, True),
+}
+
+DIGEST_METHODS = {
+    'http://www.w3.org/2000/09/xmldsig#sha1': 'sha1',
+    'http://www.w3.org/2001/04/xmlenc#sha256': 'sha256',
+    'http://www.w3.org/2001/04/xmldsig-more#sha384': 'sha384',
+    'http://www.w3.org/2001/04/xmlenc#sha512': 'sha512',
+}
+
+SIGNATURE_METHODS = {
+    'http://www.w3.org/2000/09/xmldsig#rsa-sha1': 'SHA1',
+    'http://www.w3.org/2001/04/xmldsig-more#rsa-sha256': 'SHA256',
+    'http://www.w3.org/2001/04/xmldsig-more#rsa-sha384': 'SHA384',
+    'http://www.w3.org/2001/04/xmldsig-more#rsa-sha512': 'SHA512',
+}
+
+DocumentInput = Union[str, bytes, Tuple[str, Union[str, bytes]]]
+
+# UBL documents and CDRs carry their signature in UBLExtensions under the
+# root; signatures anywhere else are ignored so they cannot be substituted
+_SIGNATURE_XPATH = etree.XPath(
+    '/*/ext:UBLExtensions//ds:Signature', namespaces={'ext': EXT_NS, 'ds': DS_NS}
+)
+
+
+def get_certificate_fingerprint(certificate: Union[str, bytes]) -> str:
+    """
+    Get the SHA-256 fingerprint of a certificate, as used by trusted_fingerprints.
+    
+    Args:
+        certificate: PEM certificate (str or bytes) or DER bytes
+        
+    Returns:
+        Lowercase hex fingerprint
+    """
+    if isinstance(certificate, str):
+        certificate = certificate.encode('utf-8')
+    if certificate.lstrip().startswith(b'-----BEGIN'):
+        certificate = x509.load_pem_x509_certificate(certificate).public_bytes(serialization.Encoding.DER)
+    return hashlib.sha256(certificate).hexdigest()
+
+
+class VerificationResult:
+    """
+    Result of verifying one signed document.
+    """
+    
+    def __init__(self, valid: bool = False, document_id: Optional[str] = None,
+                 error: Optional[str] = None, digest_valid: Optional[bool] = None,
+                 signature_valid: Optional[bool] = None,
+                 certificate_fingerprint: Optional[str] = None,
+                 certificate_subject: Optional[str] = None, trusted: Optional[bool] = None):
+        """
+        Initialize verification result.
+        
+        Args:
+            valid: Whether the signature is valid and made with a trusted certificate
+            document_id: Caller supplied identifier (filename, index)
+            error: Error message if verification failed
+            digest_valid: Whether every Reference digest matched
+            signature_valid: Whether SignatureValue matched SignedInfo
+            certificate_fingerprint: SHA-256 fingerprint of the signing certificate
+            certificate_subject: Subject of the signing certificate
+            trusted: Whether the signing certificate is a trust anchor
+        """
+        self._valid = valid
+        self._document_id = document_id
+        self._error = error
+        self._digest_valid = digest_valid
+        self._signature_valid = signature_valid
+        self._certificate_fingerprint = certificate_fingerprint
+        self._certificate_subject = certificate_subject
+        self._trusted = trusted
+    
+    @property
+    def valid(self) -> bool:
+        """Whether the signature is valid and trusted."""
+        return self._valid
+    
+    @property
+    def document_id(self) -> Optional[str]:
+        """Document identifier."""
+        return self._document_id
+    
+    @property
+    def error(self) -> Optional[str]:
+        """Error message."""
+        return self._error
+    
+    @property
+    def digest_valid(self) -> Optional[bool]:
+        """Whether the reference digests matched."""
+        return self._digest_valid
+    
+    @property
+    def signature_valid(self) -> Optional[bool]:
+        """Whether the signature value matched."""
+        return self._signature_valid
+    
+    @property
+    def certificate_fingerprint(self) -> Optional[str]:
+        """SHA-256 fingerprint (hex) of the signing certificate."""
+        return self._certificate_fingerprint
+    
+    @property
+    def certificate_subject(self) -> Optional[str]:
+        """Subject of the signing certificate."""
+        return self._certificate_subject
+    
+    @property
+    def trusted(self) -> Optional[bool]:
+        """Whether the signing certificate is one of the trusted fingerprints."""
+        return self._trusted
+    
+    def is_valid(self) -> bool:
+        """Check if the signature is valid and made with a trusted certificate."""
+        return self._valid
+    
+    def is_intact(self) -> bool:
+        """
+        Check the signature math only, whoever signed.
+        
+        A document re-signed by anyone with a self-made certificate is
+        intact; use is_valid() to know it comes from a trusted signer.
+        """
+        return bool(self._digest_valid and self._signature_valid)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get result as dictionary."""
+        return {
+            'valid': self._valid,
+            'document_id': self._document_id,
+            'error': self._error,
+            'digest_valid': self._digest_valid,
+            'signature_valid': self._signature_valid,
+            'certificate_fingerprint': self._certificate_fingerprint,
+            'certificate_subject': self._certificate_subject,
+            'trusted': self._trusted,
+        }
+    
+    def __str__(self):
+        """String representation."""
+        if self._valid:
+            return f"Valid: {self._document_id or ''} ({self._certificate_subject})"
+        else:
+            return f"Invalid: {self._document_id or ''} - {self._error}"
+
+
+class XmlVerifier:
+    """
+    Verifier for enveloped XML signatures (signed invoices and CDRs).
+    
+    The certificate is embedded in the signature, so anyone can produce an
+    intact signature; a document is only valid when its certificate is one
+    of the trusted fingerprints. Without trust anchors every result is
+    invalid (trusted=False), with digest_valid and signature_valid still
+    reported.
+    """
+    
+    def __init__(self, cache_size: int = 256, trusted_fingerprints: Optional[Iterable[str]] = None):
+        """
+        Initialize verifier.
+        
+        Args:
+            cache_size: Maximum number of parsed certificates kept in memory
+            trusted_fingerprints: SHA-256 fingerprints (hex) of accepted
+                certificates, see get_certificate_fingerprint
+        """
+        self.cache_size = cache_size
+        self.trusted_fingerprints = frozenset(
+            fp.lower().replace(':', '') for fp in trusted_fingerprints or ()
+        )
+        self._certificates: "OrderedDict[str, Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers: Optional[int] = None
+        self._parser = etree.XMLParser(resolve_entities=False, no_network=True)
+    
+    def verify(self, xml_content: Union[str, bytes], document_id: Optional[str] = None) -> VerificationResult:
+        """
+        Verify enveloped signature of an XML document.
+        
+        Args:
+            xml_content: Signed XML content
+            document_id: Identifier reported back in the result
+            
+        Returns:
+            VerificationResult
+        """
+        if not CRYPTOGRAPHY_AVAILABLE:
+            return VerificationResult(document_id=document_id, error="cryptography not available")
+        
+        try:
+            if isinstance(xml_content, str):
+                xml_content = xml_content.encode('utf-8')
+            doc = etree.fromstring(xml_content, self._parser)
+        except Exception as e:
+            return VerificationResult(document_id=document_id, error=f"Invalid XML: {e}")
+        
+        try:
+            return self._verify_tree(doc, document_id)
+        except Exception as e:
+            logger.error(f"Error verifying signature: {e}")
+            return VerificationResult(document_id=document_id, error=f"Error verifying signature: {e}")
+    
+    def verify_cdr(self, cdr_zip: bytes, document_id: Optional[str] = None) -> VerificationResult:
+        """
+        Verify the signature of a CDR (Constancia de Recepción) zip.
+        
+        Args:
+            cdr_zip: Zip bytes as returned by SUNAT (raw or base64)
+            document_id: Identifier reported back in the result
+            
+        Returns:
+            VerificationResult for the XML member of the zip
+        """
+        try:
+            if not cdr_zip.startswith(b'PK'):
+                cdr_zip = base64.b64decode(cdr_zip)
+            
+            with zipfile.ZipFile(io.BytesIO(cdr_zip)) as zip_file:
+                names = [name for name in zip_file.namelist() if name.lower().endswith('.xml')]
+                if not names:
+                    return VerificationResult(document_id=document_id, error="No XML found in CDR zip")
+                xml_content = zip_file.read(names[0])
+            
+            return self.verify(xml_content, document_id or names[0])
+        
+        except Exception as e:
+            return VerificationResult(document_id=document_id, error=f"Invalid CDR zip: {e}")
+    
+    def verify_many(self, documents: Iterable[DocumentInput], workers: Optional[int] = None,
+                    chunksize: int = 64) -> List[VerificationResult]:
+        """
+        Verify a batch of documents across a process pool.
+        
+        Items may be XML content, CDR zip bytes, or (document_id, content)
+        tuples. Results are returned in input order.
+        
+        Args:
+            documents: Documents to verify
+            workers: Number of worker processes, 1 to verify in-process
+            chunksize: Documents sent to a worker per task
+            
+        Returns:
+            List of VerificationResult
+        """
+        items = [
+            item if isinstance(item, tuple) else (str(index), item)
+            for index, item in enumerate(documents)
+        ]
+        
+        if workers == 1 or len(items) <= chunksize:
+            return [self._verify_item(item) for item in items]
+        
+        pool = self._get_pool(workers)
+        return list(pool.map(_verify_in_worker, items, chunksize=chunksize))
+    
+    def close(self):
+        """Shutdown the worker process pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def _verify_item(self, item: Tuple[str, Union[str, bytes]]) -> VerificationResult:
+        """Verify a (document_id, content) pair, XML or CDR zip."""
+        document_id, content = item
+        if isinstance(content, bytes) and content.startswith(b'PK'):
+            return self.verify_cdr(content, document_id)
+        return self.verify(content, document_id)
+    
+    def _get_pool(self, workers: Optional[int]) -> ProcessPoolExecutor:
+        """Get (or create) the worker process pool."""
+        if self._pool is None or self._pool_workers != workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self.cache_size, self.trusted_fingerprints)
+            )
+            self._pool_workers = workers
+        return self._pool
+    
+    def _verify_tree(self, doc, document_id: Optional[str]) -> VerificationResult:
+        """
+        Verify signature of a parsed document.
+        
+        Args:
+            doc: Root element
+            document_id: Identifier reported back in the result
+            
+        Returns:
+            VerificationResult
+        """
+        signatures = _SIGNATURE_XPATH(doc)
+        signature = signatures[0] if signatures else None
+        if signature is None:
+            return VerificationResult(document_id=document_id, error="No Signature element found")
+        
+        signed_info = signature.find(f'{{{DS_NS}}}SignedInfo')
+        signature_value = signature.findtext(f'{{{DS_NS}}}SignatureValue')
+        certificate_b64 = signature.findtext(
+            f'{{{DS_NS}}}KeyInfo/{{{DS_NS}}}X509Data/{{{DS_NS}}}X509Certificate'
+        )
+        if signed_info is None or not signature_value or not certificate_b64:
+            return VerificationResult(document_id=document_id, error="Incomplete Signature element")
+        
+        c14n_uri = signed_info.find(f'{{{DS_NS}}}CanonicalizationMethod').get('Algorithm')
+        signature_uri = signed_info.find(f'{{{DS_NS}}}SignatureMethod').get('Algorithm')
+        if c14n_uri not in C14N_METHODS:
+            return VerificationResult(document_id=document_id, error=f"Unsupported canonicalization: {c14n_uri}")
+        if signature_uri not in SIGNATURE_METHODS:
+            return VerificationResult(document_id=document_id, error=f"Unsupported signature method: {signature_uri}")
+        
+        fingerprint, certificate, public_key = self._get_certificate(certificate_b64)
+        subject = certificate.subject.rfc4514_string()
+        trusted = fingerprint in self.trusted_fingerprints
+        
+        # SignedInfo is canonicalized in place, before the signature is detached
+        exclusive, with_comments = C14N_METHODS[c14n_uri]
+        canonical_signed_info = etree.tostring(
+            signed_info, method='c14n', exclusive=exclusive, with_comments=with_comments
+        )
+        
+        try:
+            public_key.verify(
+                base64.b64decode(''.join(signature_value.split())),
+                canonical_signed_info,
+                padding.PKCS1v15(),
+                getattr(hashes, SIGNATURE_METHODS[signature_uri])()
+            )
+            signature_valid = True
+        except InvalidSignature:
+            signature_valid = False
+        
+        digest_error = self._check_references(doc, signature, signed_info)
+        digest_valid = digest_error is None
+        
+        error = digest_error
+        if not signature_valid:
+            error = "SignatureValue does not match SignedInfo"
+        elif error is None and not trusted:
+            error = "Untrusted certificate"
+        
+        return VerificationResult(
+            valid=signature_valid and digest_valid and trusted,
+            document_id=document_id,
+            error=error,
+            digest_valid=digest_valid,
+            signature_valid=signature_valid,
+            certificate_fingerprint=fingerprint,
+            certificate_subject=subject,
+            trusted=trusted
+        )
+    
+    def _check_references(self, doc, signature, signed_info) -> Optional[str]:
+        """
+        Check every Reference digest in SignedInfo.
+        
+        Every Reference must cover the whole document (URI="" or the Id of
+        the root element), so content outside the signed subtree cannot be
+        swapped in (signature wrapping).
+        
+        Args:
+            doc: Root element
+            signature: Signature element
+            signed_info: SignedInfo element
+            
+        Returns:
+            Error message, None if all digests match
+        """
+        references = signed_info.findall(f'{{{DS_NS}}}Reference')
+        if not references:
+            return "No Reference in SignedInfo"
+        
+        detached = False
+        for reference in references:
+            transforms = [
+                transform.get('Algorithm')
+                for transform in reference.iterfind(f'{{{DS_NS}}}Transforms/{{{DS_NS}}}Transform')
+            ]
+            digest_uri = reference.find(f'{{{DS_NS}}}DigestMethod').get('Algorithm')
+            expected = ''.join((reference.findtext(f'{{{DS_NS}}}DigestValue') or '').split())
+            
+            if digest_uri not in DIGEST_METHODS:
+                return f"Unsupported digest method: {digest_uri}"
+            
+            # Node-set to octet stream defaults to inclusive C14N without comments
+            exclusive, with_comments = False, False
+            for transform in transforms:
+                if transform == ENVELOPED_SIGNATURE:
+                    continue
+                if transform not in C14N_METHODS:
+                    return f"Unsupported transform: {transform}"
+                exclusive, with_comments = C14N_METHODS[transform]
+            
+            if ENVELOPED_SIGNATURE in transforms and not detached:
+                _detach(signature)
+                detached = True
+            
+            uri = reference.get('URI', '')
+            if uri == '':
+                target = doc.getroottree()
+                with_comments = False
+            elif uri.startswith('#'):
+                target = _find_by_id(doc, uri[1:])
+                if target is None:
+                    return f"Reference target not found: {uri}"
+                if target.getparent() is not None:
+                    return f"Reference URI=\"{uri}\" does not cover the document root"
+            else:
+                return f"Unsupported Reference URI: {uri}"
+            
+            canonical = etree.tostring(
+                target, method='c14n', exclusive=exclusive, with_comments=with_comments
+            )
+            digest = base64.b64encode(hashlib.new(DIGEST_METHODS[digest_uri], canonical).digest()).decode('ascii')
+            
+            if digest != expected:
+                return f"DigestValue mismatch for Reference URI=\"{uri}\""
+        
+        return None
+    
+    def _get_certificate(self, certificate_b64: str) -> Tuple[str, Any, Any]:
+        """
+        Get parsed certificate and public key, cached by fingerprint.
+        
+        Args:
+            certificate_b64: Base64 DER certificate from KeyInfo
+            
+        Returns:
+            Tuple of (fingerprint, certificate, public_key)
+        """
+        der = base64.b64decode(''.join(certificate_b64.split()))
+        fingerprint = hashlib.sha256(der).hexdigest()
+        
+        with self._lock:
+            cached = self._certificates.get(fingerprint)
+            if cached is not None:
+                self._certificates.move_to_end(fingerprint)
+                return (fingerprint,) + cached
+        
+        certificate = x509.load_der_x509_certificate(der)
+        entry = (certificate, certificate.public_key())
+        
+        with self._lock:
+            self._certificates[fingerprint] = entry
+            while len(self._certificates) > self.cache_size:
+                self._certificates.popitem(last=False)
+        
+        return (fingerprint,) + entry
+
+
+def _detach(element):
+    """Remove element from its parent keeping its tail text in place."""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + element.tail
+        else:
+            parent.text = (parent.text or '') + element.tail
+    parent.remove(element)
+
+
+def _find_by_id(doc, value: str):
+    """Find element by Id/ID/id attribute."""
+    for attribute in ('Id', 'ID', 'id'):
+        found = doc.xpath(f'//*[@{attribute}=$value]', value=value)
+        if found:
+            return found[0]
+    return None
+
+
+# Per-process verifier used by XmlVerifier.verify_many workers
+_worker_verifier: Optional[XmlVerifier] = None
+
+
+def _init_worker(cache_size: int, trusted_fingerprints):
+    """Initialize the verifier of a worker process."""
+    global _worker_verifier
+    _worker_verifier = XmlVerifier(cache_size, trusted_fingerprints)
+
+
+def _verify_in_worker(item: Tuple[str, Union[str, bytes]]) -> VerificationResult:
+    """Verify one document inside a worker process."""
+    return _worker_verifier._verify_item(item)
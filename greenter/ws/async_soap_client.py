@@ -0,0 +1,327 @@
+"""
+Asynchronous SOAP client for SUNAT services.
+SUNAT latency is awaited instead of holding a thread, so one event loop
+can keep many submissions in flight.
+"""
+
+from typing import Optional, Dict, Any, Iterable, Tuple
+import asyncio
+import logging
+import weakref
+
+from zeep import AsyncClient
+from zeep.proxy import AsyncServiceProxy
+from zeep.transports import AsyncTransport
+from zeep.wsse.username import UsernameToken
+
+from .soap_client import SoapClient
+from .retry import NON_IDEMPOTENT_OPERATIONS
+from .wsdl import get_wsdl_document
+
+logger = logging.getLogger(__name__)
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+
+DEFAULT_MAX_CONCURRENCY = 100
+DEFAULT_TIMEOUT = 60.0
+
+
+class ConcurrencyLimit:
+    """
+    Cap on SOAP calls in flight, shared by every client using it.
+    
+    asyncio semaphores belong to one event loop, so one is created per
+    loop on first use; changing limit affects loops started afterwards.
+    """
+    
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY):
+        """
+        Initialize concurrency limit.
+        
+        Args:
+            limit: Maximum calls in flight per event loop
+        """
+        self.limit = limit
+        self._in_flight = 0
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot."""
+        return self._in_flight
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore of the running loop."""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = semaphore
+        return semaphore
+    
+    async def __aenter__(self):
+        await self._get_semaphore().acquire()
+        self._in_flight += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._in_flight -= 1
+        self._get_semaphore().release()
+
+
+# Process-wide limit used by AsyncSoapClient unless another one is given
+global_limit = ConcurrencyLimit()
+
+
+class AsyncSoapClient(SoapClient):
+    """
+    Asynchronous SOAP client for SUNAT web services.
+    
+    Configured like SoapClient; operations are the coroutines send_async,
+    send_summary_async and get_status_async, and the blocking SoapClient
+    operations raise TypeError. Every call waits for a slot in the
+    concurrency limit and is cancelled once its timeout expires. Failures
+    and timeouts return an error dictionary, like SoapClient.send.
+    """
+    
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, limit: Optional[ConcurrencyLimit] = None,
+                 max_connections: int = DEFAULT_MAX_CONCURRENCY, http_transport=None):
+        """
+        Initialize asynchronous SOAP client.
+        
+        Args:
+            timeout: Default seconds allowed per call
+            limit: Concurrency limit, defaults to the process-wide one
+            max_connections: Maximum HTTP connections kept open
+            http_transport: httpx transport to send requests through (optional)
+        """
+        super().__init__()
+        self.timeout = timeout
+        self.limit = limit or global_limit
+        self.max_connections = max_connections
+        self._http_transport = http_transport
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def _setup_client(self):
+        """Setup asynchronous SOAP client with credentials and service URL."""
+        if not HTTPX_AVAILABLE:
+            logger.error("httpx is required for the asynchronous SOAP client")
+            return
+        
+        if not self.username or not self.password:
+            logger.warning("No credentials provided for SOAP client")
+            return
+        
+        try:
+            transport = AsyncTransport(client=self._create_http_client())
+            
+            client = AsyncClient(
+                get_wsdl_document(self.WSDL_PATH),
+                transport=transport,
+                wsse=UsernameToken(self.username, self.password)
+            )
+            self._bind_service(client)
+            self._client = client
+            
+            logger.info("Async SOAP client initialized for service: %s", self.get_address())
+        
+        except Exception as e:
+            logger.error("Error setting up async SOAP client: %s", e)
+            self._client = None
+            self.service = None
+    
+    def _bind_service(self, client: Optional["AsyncClient"] = None):
+        """
+        Bind an asynchronous service proxy to the configured endpoint.
+        
+        Args:
+            client: zeep client to bind, the current one if None
+        """
+        client = client or self._client
+        # AsyncClient.create_service returns a synchronous proxy
+        binding = client.wsdl.bindings[self.BINDING]
+        self.service = AsyncServiceProxy(client, binding, address=self.get_address())
+    
+    def _create_http_client(self) -> "httpx.AsyncClient":
+        """Create the httpx client used for operations."""
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            transport=self._http_transport
+        )
+    
+    async def _replace_http_client(self) -> None:
+        """Replace the httpx client of a previous event loop, closing it first."""
+        old_client = self._client.transport.client
+        self._client.transport.client = self._create_http_client()
+        try:
+            await old_client.aclose()
+        except Exception as e:
+            # Its loop may be closed already; the connections are dropped anyway
+            logger.debug("Error closing previous HTTP client: %r", e)
+    
+    async def _call(self, operation: str, timeout: Optional[float], **kwargs):
+        """Call an operation under the retry policy, if any."""
+        if self.retry_policy is None:
+            return await self._call_once(operation, timeout, **kwargs)
+        return await self.retry_policy.call_async(
+            lambda: self._call_once(operation, timeout, **kwargs), self.get_address(),
+            idempotent=operation not in NON_IDEMPOTENT_OPERATIONS
+        )
+    
+    async def _call_once(self, operation: str, timeout: Optional[float], **kwargs):
+        """Call an operation within the rate limit, concurrency limit and timeout."""
+        # Wait for the rate limiter before taking a concurrency slot
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(self.get_ruc(), self.get_address())
+        
+        async with self.limit:
+            # httpx connections are tied to the loop that opened them
+            loop = asyncio.get_running_loop()
+            if self._http_loop is not loop:
+                if self._http_loop is not None:
+                    await self._replace_http_client()
+                self._http_loop = loop
+            
+            return await asyncio.wait_for(
+                getattr(self.service, operation)(**kwargs),
+                timeout if timeout is not None else self.timeout
+            )
+    
+    async def send_async(self, filename: str, xml_content: str,
+                   timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Send XML document to SUNAT.
+        
+        Args:
+            filename: XML filename
+            xml_content: XML content
+            timeout: Seconds allowed for the call, defaults to the client timeout
+            
+        Returns:
+            Response dictionary, or None if the client is not configured
+        """
+        if not self.connect():
+            logger.error("SOAP client not initialized")
+            return None
+        
+        zip_content = self._compress_xml(filename, xml_content)
+        if not zip_content:
+            return None
+        
+        try:
+            response = await self._call('sendBill', timeout, fileName=f"{filename}.zip", contentFile=zip_content)
+            return self._process_send_response(response)
+        
+        except asyncio.TimeoutError:
+            logger.error("Timeout sending document: %s", filename)
+            return self._timeout_result()
+        
+        except Exception as e:
+            logger.error("Error sending document: %s", e)
+            return self._process_fault(e)
+    
+    async def send_summary_async(self, filename: str, xml_content: str,
+                                 timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Send summary document to SUNAT.
+        
+        Args:
+            filename: XML filename
+            xml_content: XML content
+            timeout: Seconds allowed for the call, defaults to the client timeout
+            
+        Returns:
+            Response dictionary, or None if the client is not configured
+        """
+        if not self.connect():
+            logger.error("SOAP client not initialized")
+            return None
+        
+        zip_content = self._compress_xml(filename, xml_content)
+        if not zip_content:
+            return None
+        
+        try:
+            response = await self._call('sendSummary', timeout, fileName=f"{filename}.zip", contentFile=zip_content)
+            return self._process_summary_response(response)
+        
+        except asyncio.TimeoutError:
+            logger.error("Timeout sending summary: %s", filename)
+            return self._timeout_result()
+        
+        except Exception as e:
+            logger.error("Error sending summary: %s", e)
+            return self._process_fault(e)
+    
+    async def get_status_async(self, ticket: Optional[str],
+                               timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get status of submitted document.
+        
+        Args:
+            ticket: Ticket ID from submission
+            timeout: Seconds allowed for the call, defaults to the client timeout
+            
+        Returns:
+            Status response, or None if the client is not configured or there is no ticket
+        """
+        if not self.connect() or not ticket:
+            logger.error("SOAP client not initialized or no ticket provided")
+            return None
+        
+        try:
+            response = await self._call('getStatus', timeout, ticket=ticket)
+            return self._process_status_response(response)
+        
+        except asyncio.TimeoutError:
+            logger.error("Timeout getting status: %s", ticket)
+            return self._timeout_result()
+        
+        except Exception as e:
+            logger.error("Error getting status: %s", e)
+            return self._process_fault(e)
+    
+    def send(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
+        """Blocking sendBill is not available, use send_async."""
+        raise TypeError("AsyncSoapClient is asynchronous, use send_async")
+    
+    def send_summary(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
+        """Blocking sendSummary is not available, use send_summary_async."""
+        raise TypeError("AsyncSoapClient is asynchronous, use send_summary_async")
+    
+    def send_pack(self, filename: str, documents: Iterable[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """sendPack is only available in SoapClient."""
+        raise TypeError("AsyncSoapClient does not support sendPack, use SoapClient.send_pack")
+    
+    def get_status(self, ticket: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Blocking getStatus is not available, use get_status_async."""
+        raise TypeError("AsyncSoapClient is asynchronous, use get_status_async")
+    
+    @staticmethod
+    def _timeout_result() -> Dict[str, Any]:
+        """Error result of a call cancelled by its timeout."""
+        return {
+            'success': False,
+            'error': 'Timeout waiting for SUNAT response',
+            'code': None,
+            'description': None
+        }
+    
+    async def aclose(self) -> None:
+        """Close the HTTP connections."""
+        if self._client is not None:
+            await self._client.transport.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
@@ -0,0 +1,143 @@
+"""
+Local store of SUNAT CDRs.
+Keeps the status and CDR ZIP of each document in sqlite, keyed by
+RUC, document type, serie and correlativo.
+"""
+
+from typing import Optional, Dict, Any, List, Tuple, Union
+import sqlite3
+import threading
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class CdrStore:
+    """
+    sqlite store of document statuses and CDRs.
+    
+    Correlativos are stored as numbers, so '00000001' and 1 are the same
+    document. status_code is the getStatusCdr status (e.g. 0004 the CDR
+    exists, 0127 the document does not), response_code the ResponseCode
+    read from the CDR itself (0 accepted, 4000+ with observations). The
+    store is safe to share between threads.
+    """
+    
+    def __init__(self, path: str = ':memory:'):
+        """
+        Initialize CDR store.
+        
+        Args:
+            path: sqlite database file, ':memory:' for a temporary store
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cdrs ("
+            "ruc TEXT, tipo TEXT, serie TEXT, correlativo INTEGER, "
+            "status_code TEXT, message TEXT, cdr_zip BLOB, updated_at REAL, response_code TEXT, "
+            "PRIMARY KEY (ruc, tipo, serie, correlativo))"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(cdrs)")}
+        if 'response_code' not in columns:
+            self._db.execute("ALTER TABLE cdrs ADD COLUMN response_code TEXT")
+        self._db.commit()
+    
+    def save(self, ruc: str, tipo: str, serie: str, correlativo: Union[str, int],
+             status_code: Optional[str], message: Optional[str] = None,
+             cdr_zip: Optional[bytes] = None, response_code: Optional[str] = None) -> None:
+        """
+        Save the status of a document, replacing any previous one.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type (01, 03, 07, 08)
+            serie: Serie
+            correlativo: Correlativo
+            status_code: getStatusCdr status code, None if the CDR came from sendBill
+            message: getStatusCdr status message
+            cdr_zip: CDR ZIP bytes
+            response_code: ResponseCode of the CDR
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cdrs (ruc, tipo, serie, correlativo, status_code, message, cdr_zip, "
+                "updated_at, response_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ruc, tipo, serie, int(correlativo), status_code, message, cdr_zip, time.time(), response_code)
+            )
+            self._db.commit()
+    
+    def get(self, ruc: str, tipo: str, serie: str, correlativo: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored status of a document.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type
+            serie: Serie
+            correlativo: Correlativo
+            
+        Returns:
+            Dictionary with status_code, message, cdr_zip, response_code and
+            updated_at, or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, message, cdr_zip, response_code, updated_at FROM cdrs "
+                "WHERE ruc = ? AND tipo = ? AND serie = ? AND correlativo = ?",
+                (ruc, tipo, serie, int(correlativo))
+            ).fetchone()
+        
+        if row is None:
+            return None
+        return {'status_code': row[0], 'message': row[1], 'cdr_zip': row[2], 'response_code': row[3],
+                'updated_at': row[4]}
+    
+    def has_cdr(self, ruc: str, tipo: str, serie: str, correlativo: Union[str, int]) -> bool:
+        """
+        Check whether the CDR of a document is stored.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type
+            serie: Serie
+            correlativo: Correlativo
+            
+        Returns:
+            True if a CDR ZIP is stored
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM cdrs WHERE ruc = ? AND tipo = ? AND serie = ? AND correlativo = ? "
+                "AND cdr_zip IS NOT NULL",
+                (ruc, tipo, serie, int(correlativo))
+            ).fetchone()
+        return row is not None
+    
+    def keys(self) -> List[Tuple[str, str, str, int]]:
+        """
+        Get the keys of the documents with a stored CDR.
+        
+        Returns:
+            List of (ruc, tipo, serie, correlativo)
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT ruc, tipo, serie, correlativo FROM cdrs WHERE cdr_zip IS NOT NULL"
+            ).fetchall()
+    
+    def count(self) -> int:
+        """Number of documents stored."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cdrs").fetchone()[0]
+    
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
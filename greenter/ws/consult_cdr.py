@@ -0,0 +1,195 @@
+"""
+Client for SUNAT's CDR consultation service (billConsultService).
+Fetches the status and CDR of a document by its number, one at a time
+or in bulk to reconcile documents whose send result was lost.
+"""
+
+from typing import Optional, Dict, Any, Iterable, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import logging
+
+from zeep.exceptions import Fault as ZeepFault
+
+from .soap_client import SoapClient
+from .cdr_store import CdrStore
+from .submission_registry import get_response_code
+from .wsdl import BILL_CONSULT_SERVICE_WSDL, BILL_CONSULT_SERVICE_BINDING
+
+
+logger = logging.getLogger(__name__)
+
+# (ruc, tipo, serie, correlativo)
+DocumentKey = Tuple[str, str, str, Union[str, int]]
+
+
+class ConsultCdrClient(SoapClient):
+    """
+    SOAP client for billConsultService getStatusCdr.
+    
+    The consultation service only exists in production, whose URL is not
+    configured by default: set it with set_service before use. Session
+    pool, retry policy and rate limiter work as in SoapClient; the
+    billService operations (send, send_summary, send_pack, get_status)
+    raise TypeError.
+    """
+    
+    WSDL_PATH = BILL_CONSULT_SERVICE_WSDL
+    BINDING = BILL_CONSULT_SERVICE_BINDING
+    
+    def get_address(self) -> Optional[str]:
+        """Get the endpoint the service is bound to."""
+        return self.service_url
+    
+    def _setup_client(self):
+        """Setup SOAP client once the service URL is set."""
+        if not self.service_url:
+            logger.error("No billConsultService URL set")
+            return
+        super()._setup_client()
+    
+    def get_cdr_status(self, ruc: str, tipo: str, serie: str,
+                       correlativo: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """
+        Get the status and CDR of a document.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type (01, 03, 07, 08)
+            serie: Serie
+            correlativo: Correlativo
+            
+        Returns:
+            Response dictionary or None if error
+        """
+        if not self.connect():
+            logger.error("SOAP client not initialized")
+            return None
+        
+        try:
+            response = self._invoke(lambda: self.service.getStatusCdr(
+                rucComprobante=ruc,
+                tipoComprobante=tipo,
+                serieComprobante=serie,
+                numeroComprobante=int(correlativo)
+            ))
+            return self._process_cdr_status_response(response)
+        
+        except ZeepFault as zeep_fault:
+            logger.warning("getStatusCdr %s-%s-%s-%s fault %s: %s", ruc, tipo, serie, correlativo,
+                           zeep_fault.code, zeep_fault.message)
+            return self._process_fault(zeep_fault)
+        
+        except Exception as e:
+            logger.error("Error getting CDR status: %s", e)
+            return None
+    
+    def reconcile(self, documents: Iterable[DocumentKey], store: CdrStore,
+                  max_workers: int = 10, skip_existing: bool = True) -> Dict[str, int]:
+        """
+        Fetch the CDRs of many documents into a store.
+        
+        Up to max_workers queries run at once over the shared keep-alive
+        session; pace them with set_rate_limiter. Every answered query is
+        saved, with or without CDR, along with the ResponseCode of the CDR,
+        so a SubmissionRegistry on the same store serves reconciled documents.
+        
+        Args:
+            documents: (ruc, tipo, serie, correlativo) tuples
+            store: Store receiving the results
+            max_workers: Concurrent queries
+            skip_existing: Skip documents whose CDR is already stored
+            
+        Returns:
+            Counts of queried, found (CDR received), missing (answered without CDR),
+            errors and skipped documents
+        """
+        stats = {'queried': 0, 'found': 0, 'missing': 0, 'errors': 0, 'skipped': 0}
+        pending: Dict[Future, DocumentKey] = {}
+        
+        def query(document: DocumentKey) -> str:
+            result = self.get_cdr_status(*document)
+            if result is None or result.get('error'):
+                return 'errors'
+            store.save(*document, result['code'], result['message'], result['cdr_zip'],
+                       response_code=get_response_code(result['cdr_response']))
+            return 'found' if result['cdr_zip'] else 'missing'
+        
+        def collect(done: Iterable[Future]) -> None:
+            # Outcomes are counted here, in the calling thread
+            for future in done:
+                document = pending.pop(future)
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    logger.error("Error reconciling %s: %s", '-'.join(map(str, document)), e)
+                    outcome = 'errors'
+                stats[outcome] += 1
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='greenter-cdr') as executor:
+            # Bounded submission, so a huge iterable is not queued at once
+            for document in documents:
+                if skip_existing and store.has_cdr(*document):
+                    stats['skipped'] += 1
+                    continue
+                
+                if len(pending) >= max_workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[executor.submit(query, document)] = document
+                stats['queried'] += 1
+            
+            collect(wait(pending).done)
+        
+        logger.info("CDR reconciliation: %s", stats)
+        return stats
+    
+    def send(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
+        """billConsultService has no sendBill, use SoapClient."""
+        raise TypeError("ConsultCdrClient only queries CDRs, use SoapClient.send")
+    
+    def send_summary(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
+        """billConsultService has no sendSummary, use SoapClient."""
+        raise TypeError("ConsultCdrClient only queries CDRs, use SoapClient.send_summary")
+    
+    def send_pack(self, filename: str, documents: Iterable[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """billConsultService has no sendPack, use SoapClient."""
+        raise TypeError("ConsultCdrClient only queries CDRs, use SoapClient.send_pack")
+    
+    def get_status(self, ticket: Optional[str]) -> Optional[Dict[str, Any]]:
+        """billConsultService has no getStatus, use SoapClient or get_cdr_status."""
+        raise TypeError("ConsultCdrClient has no getStatus, use get_cdr_status")
+    
+    def _process_cdr_status_response(self, response) -> Dict[str, Any]:
+        """
+        Process getStatusCdr response.
+        
+        Args:
+            response: SOAP response
+            
+        Returns:
+            Processed response dictionary
+        """
+        result = {
+            'success': False,
+            'code': None,
+            'message': None,
+            'cdr_zip': None,
+            'cdr_response': None,
+            'error': None
+        }
+        
+        # zeep unwraps getStatusCdrResponse to its statusCdr element
+        status = getattr(response, 'statusCdr', response)
+        if status is None:
+            result['error'] = 'No status received'
+            return result
+        
+        result['code'] = getattr(status, 'statusCode', None)
+        result['message'] = getattr(status, 'statusMessage', None)
+        content = getattr(status, 'content', None)
+        if content:
+            result['cdr_zip'] = content
+            result['cdr_response'] = self._extract_cdr(content)
+        result['success'] = True
+        
+        return result
@@ -0,0 +1,130 @@
+"""
+Shared HTTP sessions for SOAP traffic.
+One keep-alive session per endpoint origin, shared by every SoapClient.
+"""
+
+from typing import Dict, Any
+from urllib.parse import urlsplit
+import threading
+import logging
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+class HttpSessionPool:
+    """
+    Registry of tuned requests sessions keyed by endpoint origin.
+    
+    Clients sending to the same scheme://host:port share one session and
+    therefore one urllib3 connection pool: concurrent senders reuse warm
+    keep-alive connections instead of opening a TCP connection and doing
+    a TLS handshake per request.
+    """
+    
+    def __init__(self, pool_maxsize: int = 10, pool_block: bool = False):
+        """
+        Initialize session pool.
+        
+        Args:
+            pool_maxsize: Connections kept per endpoint
+            pool_block: Wait for a free connection instead of opening a
+                temporary extra one when all are busy
+        """
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._sessions: Dict[str, Session] = {}
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._lock = threading.Lock()
+    
+    def get_session(self, url: str) -> Session:
+        """
+        Get the shared session for an endpoint.
+        
+        Args:
+            url: Endpoint URL
+            
+        Returns:
+            requests Session
+        """
+        origin = _origin(url)
+        with self._lock:
+            session = self._sessions.get(origin)
+            if session is None:
+                session = Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.pool_block
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[origin] = session
+                self._adapters[origin] = adapter
+                logger.debug(f"HTTP session created for {origin} (pool size {self.pool_maxsize})")
+        return session
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get connection pool utilization per endpoint.
+        
+        Returns:
+            Dictionary keyed by origin with maxsize, in_use, idle,
+            connections (opened so far) and requests
+        """
+        result = {}
+        with self._lock:
+            adapters = dict(self._adapters)
+        
+        for origin, adapter in adapters.items():
+            stats = {'maxsize': self.pool_maxsize, 'in_use': 0, 'idle': 0, 'connections': 0, 'requests': 0}
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats['in_use'] += pool.pool.maxsize - pool.pool.qsize()
+                stats['idle'] += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+                stats['connections'] += pool.num_connections
+                stats['requests'] += pool.num_requests
+            result[origin] = stats
+        
+        return result
+    
+    def get_stats(self, url: str) -> Dict[str, Any]:
+        """
+        Get connection pool utilization for one endpoint.
+        
+        Args:
+            url: Endpoint URL
+            
+        Returns:
+            Dictionary with maxsize, in_use, idle, connections and requests
+        """
+        origin = _origin(url)
+        return self.stats().get(origin) or {
+            'maxsize': self.pool_maxsize, 'in_use': 0, 'idle': 0, 'connections': 0, 'requests': 0
+        }
+    
+    def close(self) -> None:
+        """Close all sessions and their connections."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._adapters.clear()
+        for session in sessions:
+            session.close()
+
+
+# Process-wide pool used by SoapClient unless another one is set
+default_pool = HttpSessionPool()
+
+
+def _origin(url: str) -> str:
+    """Get scheme://host:port of a URL."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
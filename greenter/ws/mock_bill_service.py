@@ -0,0 +1,439 @@
+"""
+Local stand-in for SUNAT's billService.
+A threaded HTTP server speaking the billService SOAP contract (sendBill,
+sendSummary, sendPack and getStatus) that answers with CDR zips, for
+offline integration and load testing. Latency and faults can be injected.
+"""
+
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+import argparse
+import base64
+import io
+import os
+import random
+import re
+import threading
+import time
+import zipfile
+import logging
+
+import lxml.etree as etree
+
+from .wsdl import WSDL_DIR
+
+
+logger = logging.getLogger(__name__)
+
+
+SOAP_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+WSSE_NS = 'http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd'
+
+# SUNAT faults raised by the mock
+FAULT_MESSAGES = {
+    '0102': 'Usuario o contraseña incorrectos',
+    '0127': 'El ticket no existe',
+    '0130': 'El sistema no puede responder su solicitud. (No se pudo obtener el ticket de proceso)',
+    '0151': 'El nombre del archivo ZIP es incorrecto',
+    '0155': 'El archivo ZIP esta vacio',
+    '0156': 'El archivo ZIP esta corrupto',
+    '0161': 'El nombre del archivo XML no coincide con el nombre del archivo ZIP',
+    '0200': 'No se pudo procesar su solicitud. (Ocurrio un error en el batch)',
+}
+
+_BILL_FILENAME = re.compile(r'^(\d{11})-(01|03|07|08|09|20|40)-([A-Z0-9]{4})-(\d{1,8})$')
+_TICKET_FILENAME = re.compile(r'^(\d{11})-(RC|RA|RR|LT)-(\d{8})-(\d{1,5})$')
+
+_DOCUMENT_NAMES = {
+    '01': 'La Factura', '03': 'La Boleta', '07': 'La Nota de Credito', '08': 'La Nota de Debito',
+    '09': 'La Guia de Remision', '20': 'El Comprobante de Retencion', '40': 'El Comprobante de Percepcion',
+    'RC': 'El Resumen diario', 'RA': 'La Comunicacion de baja', 'RR': 'El Resumen de reversiones',
+    'LT': 'El Lote',
+}
+
+_CDR_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<ar:ApplicationResponse xmlns:ar="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2"'
+    ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+    ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"'
+    ' xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2">'
+    '<ext:UBLExtensions><ext:UBLExtension><ext:ExtensionContent/></ext:UBLExtension></ext:UBLExtensions>'
+    '<cbc:UBLVersionID>2.0</cbc:UBLVersionID>'
+    '<cbc:CustomizationID>1.0</cbc:CustomizationID>'
+    '<cbc:ID>{response_id}</cbc:ID>'
+    '<cbc:IssueDate>{date}</cbc:IssueDate>'
+    '<cbc:IssueTime>{time}</cbc:IssueTime>'
+    '<cbc:ResponseDate>{date}</cbc:ResponseDate>'
+    '<cbc:ResponseTime>{time}</cbc:ResponseTime>'
+    '<cac:SenderParty><cac:PartyIdentification><cbc:ID>20131312955</cbc:ID></cac:PartyIdentification></cac:SenderParty>'
+    '<cac:ReceiverParty><cac:PartyIdentification><cbc:ID>6-{ruc}</cbc:ID></cac:PartyIdentification></cac:ReceiverParty>'
+    '<cac:DocumentResponse>'
+    '<cac:Response><cbc:ReferenceID>{reference}</cbc:ReferenceID>'
+    '<cbc:ResponseCode>{code}</cbc:ResponseCode><cbc:Description>{description}</cbc:Description></cac:Response>'
+    '<cac:DocumentReference><cbc:ID>{reference}</cbc:ID></cac:DocumentReference>'
+    '</cac:DocumentResponse>'
+    '</ar:ApplicationResponse>'
+)
+
+
+class MockFault(Exception):
+    """SOAP fault answered by the mock."""
+    
+    def __init__(self, code: str, message: Optional[str] = None):
+        super().__init__(message or FAULT_MESSAGES.get(code, 'Error'))
+        self.code = code
+        self.message = str(self)
+
+
+class _Ticket:
+    """Ticket returned by sendSummary or sendPack."""
+    
+    def __init__(self, filename: str, documents: List[str], ready_at: float):
+        self.filename = filename
+        self.documents = documents
+        self.ready_at = ready_at
+
+
+class MockBillService:
+    """
+    Local billService.
+    
+    Validates file and ZIP names like SUNAT, answers sendBill with a CDR
+    zip and sendSummary/sendPack with a ticket whose getStatus reports 98
+    (in process) for processing_time seconds and then the CDR. Every call
+    waits latency (plus up to latency_jitter) seconds; error_rate of them
+    fail with fault_code, and fail_next() queues faults deterministically.
+    The bundled WSDL is served at ?wsdl.
+    """
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 latency_jitter: float = 0.0, error_rate: float = 0.0, fault_code: str = '0130',
+                 reject_rate: float = 0.0, processing_time: float = 0.0,
+                 credentials: Optional[Dict[str, str]] = None,
+                 cdr_signer: Optional[Callable[[str], str]] = None, seed: Optional[int] = None):
+        """
+        Initialize mock billService.
+        
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 for any free port
+            latency: Seconds added to every call
+            latency_jitter: Extra random seconds, between 0 and this value
+            error_rate: Fraction of calls answered with fault_code
+            fault_code: SUNAT fault code of injected errors
+            reject_rate: Fraction of documents whose CDR rejects them (code 2017)
+            processing_time: Seconds a ticket stays in process (statusCode 98)
+            credentials: Accepted SOL users and passwords, None to accept any
+            cdr_signer: Signs the CDR XML (e.g. XmlSigner.sign), None to leave it unsigned
+            seed: Random seed for jitter and injected errors
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.fault_code = fault_code
+        self.reject_rate = reject_rate
+        self.processing_time = processing_time
+        self.credentials = credentials
+        self.cdr_signer = cdr_signer
+        self.requests: Dict[str, int] = {}
+        self.faults: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._tickets: Dict[str, _Ticket] = {}
+        self._fail_queue: List[Tuple[str, Optional[str]]] = []
+        self._next_ticket = int(time.time() * 1000)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """billService endpoint URL."""
+        if self._server is None:
+            raise RuntimeError("Mock billService not started")
+        return f"http://{self.host}:{self._server.server_address[1]}/billService"
+    
+    def start(self) -> 'MockBillService':
+        """
+        Start serving in a background thread.
+        
+        Returns:
+            This service
+        """
+        self._server = ThreadingHTTPServer((self.host, self.port), self._create_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05},
+                                        name='mock-bill-service', daemon=True)
+        self._thread.start()
+        logger.info(f"Mock billService listening on {self.url}")
+        return self
+    
+    def stop(self) -> None:
+        """Stop the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+    
+    def fail_next(self, count: int = 1, code: str = '0130', message: Optional[str] = None) -> None:
+        """
+        Answer the next calls with a fault.
+        
+        Args:
+            count: Number of calls to fail
+            code: SUNAT fault code
+            message: Fault string, defaults to SUNAT's text for the code
+        """
+        with self._lock:
+            self._fail_queue.extend([(code, message)] * count)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get request counters.
+        
+        Returns:
+            Dictionary with requests and faults per operation and pending tickets
+        """
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'faults': dict(self.faults),
+                'tickets': len(self._tickets),
+            }
+    
+    def handle(self, body: bytes) -> Tuple[int, bytes]:
+        """
+        Answer a SOAP request.
+        
+        Args:
+            body: Request envelope
+            
+        Returns:
+            (HTTP status, response envelope)
+        """
+        operation = 'unknown'
+        try:
+            envelope = etree.fromstring(body)
+            request = envelope.find(f'{{{SOAP_ENV_NS}}}Body/*')
+            if request is None:
+                raise MockFault('0200', 'Mensaje SOAP sin Body')
+            operation = etree.QName(request).localname
+            
+            with self._lock:
+                self.requests[operation] = self.requests.get(operation, 0) + 1
+            self._wait()
+            self._check_credentials(envelope)
+            self._inject_fault()
+            
+            fields = {etree.QName(child).localname: child.text or '' for child in request}
+            if operation == 'sendBill':
+                content = f"<applicationResponse>{self._send_bill(fields)}</applicationResponse>"
+            elif operation in ('sendSummary', 'sendPack'):
+                content = f"<ticket>{self._send_with_ticket(operation, fields)}</ticket>"
+            elif operation == 'getStatus':
+                content = f"<status>{self._get_status(fields.get('ticket', ''))}</status>"
+            else:
+                raise MockFault('0200', f'Operacion no soportada: {operation}')
+            
+            return 200, _envelope(
+                f'<br:{operation}Response xmlns:br="http://service.sunat.gob.pe">{content}</br:{operation}Response>'
+            )
+        
+        except MockFault as fault:
+            with self._lock:
+                self.faults[operation] = self.faults.get(operation, 0) + 1
+            return 500, _envelope(
+                f'<soap-env:Fault><faultcode>soap-env:Client.{fault.code}</faultcode>'
+                f'<faultstring>{escape(fault.message)}</faultstring></soap-env:Fault>'
+            )
+        
+        except etree.XMLSyntaxError:
+            return 500, _envelope(
+                '<soap-env:Fault><faultcode>soap-env:Client</faultcode>'
+                '<faultstring>Mensaje SOAP invalido</faultstring></soap-env:Fault>'
+            )
+    
+    def _wait(self) -> None:
+        """Apply the configured latency."""
+        delay = self.latency
+        if self.latency_jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _check_credentials(self, envelope) -> None:
+        """Reject unknown SOL users."""
+        if self.credentials is None:
+            return
+        username = envelope.findtext(f'.//{{{WSSE_NS}}}Username')
+        password = envelope.findtext(f'.//{{{WSSE_NS}}}Password')
+        if username not in self.credentials or self.credentials[username] != password:
+            raise MockFault('0102')
+    
+    def _inject_fault(self) -> None:
+        """Raise queued or random faults."""
+        with self._lock:
+            if self._fail_queue:
+                raise MockFault(*self._fail_queue.pop(0))
+            if self.error_rate and self._random.random() < self.error_rate:
+                raise MockFault(self.fault_code)
+    
+    def _read_zip(self, fields: Dict[str, str], pattern) -> Tuple[str, List[Tuple[str, bytes]]]:
+        """Validate the ZIP filename and return its base name and XML members."""
+        filename = fields.get('fileName', '')
+        name = filename[:-4] if filename.lower().endswith('.zip') else ''
+        if not pattern.match(name):
+            raise MockFault('0151')
+        
+        try:
+            content = base64.b64decode(fields.get('contentFile', ''), validate=True)
+            with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+                members = [(info.filename, zip_file.read(info)) for info in zip_file.infolist() if not info.is_dir()]
+        except Exception:
+            raise MockFault('0156')
+        
+        if not members:
+            raise MockFault('0155')
+        return name, members
+    
+    def _send_bill(self, fields: Dict[str, str]) -> str:
+        """Answer sendBill with the base64 CDR zip."""
+        name, members = self._read_zip(fields, _BILL_FILENAME)
+        if [member for member, _ in members] != [f"{name}.xml"]:
+            raise MockFault('0161')
+        return base64.b64encode(self._cdr_zip([name])).decode('ascii')
+    
+    def _send_with_ticket(self, operation: str, fields: Dict[str, str]) -> str:
+        """Answer sendSummary or sendPack with a new ticket."""
+        name, members = self._read_zip(fields, _TICKET_FILENAME)
+        if operation == 'sendSummary' and [member for member, _ in members] != [f"{name}.xml"]:
+            raise MockFault('0161')
+        
+        documents = [member[:-4] for member, _ in members] if operation == 'sendPack' else [name]
+        with self._lock:
+            self._next_ticket += 1
+            ticket = str(self._next_ticket)
+            self._tickets[ticket] = _Ticket(name, documents, time.time() + self.processing_time)
+        return ticket
+    
+    def _get_status(self, ticket: str) -> str:
+        """Answer getStatus: 98 while in process, then the CDR zip."""
+        with self._lock:
+            entry = self._tickets.get(ticket)
+        if entry is None:
+            raise MockFault('0127')
+        if time.time() < entry.ready_at:
+            return '<statusCode>98</statusCode>'
+        
+        cdr = base64.b64encode(self._cdr_zip(entry.documents, entry.filename)).decode('ascii')
+        return f'<content>{cdr}</content><statusCode>0</statusCode>'
+    
+    def _cdr_zip(self, documents: List[str], filename: Optional[str] = None) -> bytes:
+        """Build the CDR zip: one R-{document}.xml per document."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for document in documents:
+                zip_file.writestr(f"R-{document}.xml", self._cdr_xml(document))
+        return buffer.getvalue()
+    
+    def _cdr_xml(self, document: str) -> str:
+        """Build the ApplicationResponse of a document."""
+        parts = document.split('-')
+        ruc, tipo = parts[0], parts[1] if len(parts) > 1 else ''
+        reference = '-'.join(parts[2:]) if len(parts) > 2 else document
+        
+        with self._lock:
+            rejected = bool(self.reject_rate) and self._random.random() < self.reject_rate
+        if rejected:
+            code, description = '2017', 'El numero de documento de identidad del receptor debe ser RUC'
+        else:
+            code, description = '0', f"{_DOCUMENT_NAMES.get(tipo, 'El comprobante')} numero {reference}, ha sido aceptada"
+        
+        now = datetime.now()
+        xml = _CDR_TEMPLATE.format(
+            response_id=int(now.timestamp() * 1000), date=now.strftime('%Y-%m-%d'),
+            time=now.strftime('%H:%M:%S'), ruc=escape(ruc), reference=escape(reference),
+            code=code, description=escape(description),
+        )
+        return self.cdr_signer(xml) if self.cdr_signer else xml
+    
+    def _create_handler(self):
+        """Build the request handler class bound to this service."""
+        service = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                status, payload = service.handle(body)
+                self._reply(status, 'text/xml; charset=utf-8', payload)
+            
+            def do_GET(self):
+                # ?wsdl and the files it imports, resolved relative to the endpoint
+                name = 'billService.wsdl' if self.path.endswith('?wsdl') else os.path.basename(self.path)
+                path = os.path.join(WSDL_DIR, name)
+                if name.startswith('billService') and os.path.isfile(path):
+                    with open(path, 'rb') as wsdl_file:
+                        self._reply(200, 'text/xml; charset=utf-8', wsdl_file.read())
+                else:
+                    self._reply(404, 'text/plain', b'Not found')
+            
+            def _reply(self, status, content_type, payload):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            
+            def log_message(self, *args):
+                pass
+        
+        return Handler
+
+
+def _envelope(body: str) -> bytes:
+    """Wrap a SOAP body."""
+    return (
+        f'<soap-env:Envelope xmlns:soap-env="{SOAP_ENV_NS}">'
+        f'<soap-env:Body>{body}</soap-env:Body></soap-env:Envelope>'
+    ).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SUNAT billService stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fault-code', default='0130')
+    parser.add_argument('--reject-rate', type=float, default=0.0)
+    parser.add_argument('--processing-time', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    service = MockBillService(
+        args.host, args.port, args.latency, args.latency_jitter, args.error_rate,
+        args.fault_code, args.reject_rate, args.processing_time
+    )
+    service.start()
+    print(f"Mock billService: {service.url}")
+    try:
+        service._thread.join()
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
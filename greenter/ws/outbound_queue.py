@@ -0,0 +1,507 @@
+"""
+Durable store-and-forward queue for SUNAT submissions.
+Signed documents are committed to sqlite before anything is sent, and a
+worker pool delivers them when SUNAT is reachable, so sales keep being
+accepted through an outage.
+"""
+
+from typing import Optional, Dict, Any, List, Callable, Iterable, Tuple
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+from .retry import RetryPolicy, get_fault_number
+
+
+logger = logging.getLogger(__name__)
+
+
+# "El comprobante fue registrado previamente con otros datos": SUNAT has it, but sent no CDR
+ALREADY_REGISTERED_CODES = frozenset({'1033'})
+
+# Seconds a claimed document stays reserved to its worker; must exceed the
+# longest delivery (SOAP timeout times retry attempts)
+DEFAULT_LEASE_TIMEOUT = 600.0
+
+KIND_BILL = 'bill'
+KIND_SUMMARY = 'summary'
+
+
+class OutboundItem:
+    """
+    Queued document and its delivery state.
+    """
+    
+    PENDING = 'pending'
+    IN_FLIGHT = 'in_flight'
+    DONE = 'done'
+    REGISTERED = 'registered'
+    FAILED = 'failed'
+    
+    def __init__(self, filename: str, kind: str, status: str, attempts: int = 0,
+                 code: Optional[str] = None, error: Optional[str] = None,
+                 ticket: Optional[str] = None, cdr_zip: Optional[bytes] = None,
+                 created_at: Optional[float] = None, updated_at: Optional[float] = None):
+        """
+        Initialize outbound item.
+        
+        Args:
+            filename: Document filename, unique in the queue
+            kind: 'bill' (sendBill) or 'summary' (sendSummary)
+            status: pending, in_flight, done, registered or failed
+            attempts: Delivery attempts made
+            code: SUNAT code of the last answer
+            error: Error of the last attempt
+            ticket: Ticket returned by sendSummary
+            cdr_zip: CDR ZIP returned by sendBill
+            created_at: Enqueue time
+            updated_at: Last status change
+        """
+        self._filename = filename
+        self._kind = kind
+        self._status = status
+        self._attempts = attempts
+        self._code = code
+        self._error = error
+        self._ticket = ticket
+        self._cdr_zip = cdr_zip
+        self._created_at = created_at
+        self._updated_at = updated_at
+    
+    @property
+    def filename(self) -> str:
+        """Document filename."""
+        return self._filename
+    
+    @property
+    def kind(self) -> str:
+        """'bill' or 'summary'."""
+        return self._kind
+    
+    @property
+    def status(self) -> str:
+        """Delivery status."""
+        return self._status
+    
+    @property
+    def attempts(self) -> int:
+        """Delivery attempts made."""
+        return self._attempts
+    
+    @property
+    def code(self) -> Optional[str]:
+        """SUNAT code of the last answer."""
+        return self._code
+    
+    @property
+    def error(self) -> Optional[str]:
+        """Error of the last attempt."""
+        return self._error
+    
+    @property
+    def ticket(self) -> Optional[str]:
+        """Ticket returned by sendSummary."""
+        return self._ticket
+    
+    @property
+    def cdr_zip(self) -> Optional[bytes]:
+        """CDR ZIP returned by sendBill."""
+        return self._cdr_zip
+    
+    def is_done(self) -> bool:
+        """Check if SUNAT accepted the delivery and returned its answer."""
+        return self._status == self.DONE
+    
+    def is_registered(self) -> bool:
+        """
+        Check if SUNAT already had the document (1033) when it was delivered.
+        
+        No CDR comes with that answer: fetch it with ConsultCdrClient.
+        """
+        return self._status == self.REGISTERED
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert item to dictionary."""
+        return {
+            'filename': self._filename,
+            'kind': self._kind,
+            'status': self._status,
+            'attempts': self._attempts,
+            'code': self._code,
+            'error': self._error,
+            'ticket': self._ticket,
+            'created_at': self._created_at,
+            'updated_at': self._updated_at,
+        }
+    
+    def __str__(self):
+        return f"OutboundItem(filename={self._filename}, status={self._status}, attempts={self._attempts})"
+
+
+class OutboundQueue:
+    """
+    Durable outbound queue with a delivery worker pool.
+    
+    enqueue() only writes to sqlite, so it stays fast while SUNAT is down.
+    A filename is accepted only once, a document is claimed by one worker
+    at a time, and documents of the same serie are delivered in enqueue
+    order (a serie waits while its oldest document is being retried).
+    Connection errors and transient faults are retried with backoff; any
+    other fault fails the document without blocking its serie.
+    
+    Delivery is at least once. A claim is a lease: queues of other
+    processes sharing the database leave it alone until it expires, and
+    only then send the document again (the worker died mid-delivery). A
+    resent document SUNAT already has is answered 1033 and recorded as
+    registered, without CDR; fetch it with ConsultCdrClient.
+    """
+    
+    def __init__(self, soap_client, path: str, workers: int = 4, base_delay: float = 1.0,
+                 max_delay: float = 300.0, max_attempts: Optional[int] = None,
+                 retry_policy: Optional[RetryPolicy] = None, ticket_scheduler=None,
+                 poll_interval: float = 1.0, lease_timeout: float = DEFAULT_LEASE_TIMEOUT):
+        """
+        Initialize outbound queue.
+        
+        Args:
+            soap_client: SoapClient delivering the documents
+            path: sqlite database file
+            workers: Delivery threads
+            base_delay: Backoff after the first failed attempt, in seconds
+            max_delay: Upper bound for the backoff
+            max_attempts: Attempts before failing a document, None to retry until delivered
+            retry_policy: Classifies transient faults, defaults to RetryPolicy()
+            ticket_scheduler: TicketScheduler receiving sendSummary tickets
+            poll_interval: Longest idle wait of a worker, in seconds
+            lease_timeout: Seconds a claimed document is reserved to its worker
+        """
+        self.soap_client = soap_client
+        self.path = path
+        self.workers = workers
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.ticket_scheduler = ticket_scheduler
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        self._callbacks: List[Callable[[OutboundItem], Any]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._db = self._open(path)
+    
+    def enqueue(self, filename: str, xml_content: str, kind: str = KIND_BILL,
+                serie_key: Optional[str] = None) -> bool:
+        """
+        Store a signed document for delivery.
+        
+        Args:
+            filename: Document filename (RUC-tipo-serie-correlativo), unique in the queue
+            xml_content: Signed XML
+            kind: 'bill' (sendBill) or 'summary' (sendSummary)
+            serie_key: Ordering group, defaults to the filename without its number
+            
+        Returns:
+            True if queued, False if the filename was already queued
+        """
+        return self.enqueue_many([(filename, xml_content, kind, serie_key)]) == 1
+    
+    def enqueue_many(self, documents: Iterable[Tuple[str, str, str, Optional[str]]]) -> int:
+        """
+        Store several signed documents in one transaction.
+        
+        Args:
+            documents: (filename, xml_content, kind, serie_key) tuples
+            
+        Returns:
+            Number of documents queued (already queued filenames are skipped)
+        """
+        now = time.time()
+        rows = [
+            (filename, kind, serie_key or _serie_key(filename), xml_content.encode('utf-8'), now, now, now)
+            for filename, xml_content, kind, serie_key in documents
+        ]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO outbox (filename, kind, serie_key, xml, status, attempts, "
+                "next_attempt, created_at, updated_at) VALUES (?, ?, ?, ?, 'pending', 0, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+            queued = self._db.total_changes - before
+        
+        if queued:
+            self._notify()
+        return queued
+    
+    def get(self, filename: str) -> Optional[OutboundItem]:
+        """
+        Get the delivery state of a document.
+        
+        Args:
+            filename: Document filename
+            
+        Returns:
+            OutboundItem or None if not queued
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT filename, kind, status, attempts, code, error, ticket, cdr_zip, created_at, updated_at "
+                "FROM outbox WHERE filename = ?", (filename,)
+            ).fetchone()
+        return OutboundItem(*row) if row else None
+    
+    def on_result(self, callback: Callable[[OutboundItem], Any]) -> None:
+        """
+        Register a callback for documents that reach done, registered or failed.
+        
+        Args:
+            callback: Called from a worker thread with the OutboundItem
+        """
+        self._callbacks.append(callback)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Count documents by status.
+        
+        Returns:
+            Dictionary with pending, in_flight, done, registered and failed
+        """
+        stats = {status: 0 for status in (OutboundItem.PENDING, OutboundItem.IN_FLIGHT, OutboundItem.DONE,
+                                          OutboundItem.REGISTERED, OutboundItem.FAILED)}
+        with self._lock:
+            for status, count in self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"):
+                stats[status] = count
+        return stats
+    
+    def start(self) -> None:
+        """Start the delivery workers."""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'greenter-outbox-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the workers after their current delivery.
+        
+        Args:
+            timeout: Seconds to wait for each worker
+        """
+        self._stopping.set()
+        self._notify()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Deliver in the calling thread until nothing is due.
+        
+        Documents waiting for a retry later than timeout are left queued.
+        
+        Args:
+            timeout: Seconds to keep waiting for retries, None to stop at the first wait
+            
+        Returns:
+            True if no document is pending or in flight
+        """
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            item = self._claim()
+            if item is not None:
+                self._deliver(*item)
+                continue
+            
+            stats = self.get_stats()
+            if not stats[OutboundItem.PENDING] and not stats[OutboundItem.IN_FLIGHT]:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(min(0.01, max(0.0, deadline - time.monotonic())))
+    
+    def close(self) -> None:
+        """Stop the workers and close the database."""
+        self.stop()
+        with self._lock:
+            self._db.close()
+    
+    def _open(self, path: str) -> sqlite3.Connection:
+        """Open the database and requeue documents whose lease expired."""
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        # An acknowledged enqueue must survive a power loss
+        db.execute("PRAGMA synchronous=FULL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT UNIQUE NOT NULL, kind TEXT NOT NULL, "
+            "serie_key TEXT NOT NULL, xml BLOB NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+            "next_attempt REAL NOT NULL, code TEXT, error TEXT, ticket TEXT, cdr_zip BLOB, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, owner TEXT, lease_until REAL)"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(outbox)")}
+        if 'owner' not in columns:
+            db.execute("ALTER TABLE outbox ADD COLUMN owner TEXT")
+            db.execute("ALTER TABLE outbox ADD COLUMN lease_until REAL")
+        db.execute("CREATE INDEX IF NOT EXISTS outbox_serie ON outbox (serie_key, status, id)")
+        db.execute("CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt)")
+        
+        requeued = self._expire_leases(db, time.time())
+        db.commit()
+        if requeued:
+            logger.warning("Requeued %d documents left in flight in %s", requeued, path)
+        return db
+    
+    @staticmethod
+    def _expire_leases(db: sqlite3.Connection, now: float) -> int:
+        """Requeue documents whose worker did not record an outcome in time."""
+        return db.execute(
+            "UPDATE outbox SET status = 'pending', next_attempt = ?, owner = NULL, lease_until = NULL "
+            "WHERE status = 'in_flight' AND (lease_until IS NULL OR lease_until < ?)", (now, now)
+        ).rowcount
+    
+    def _claim(self) -> Optional[Tuple[int, str, str, bytes, int]]:
+        """Take the next due document whose serie has nothing older outstanding."""
+        now = time.time()
+        with self._lock:
+            # Writing first takes sqlite's write lock: claims of other processes wait
+            requeued = self._expire_leases(self._db, now)
+            if requeued:
+                logger.warning("Requeued %d documents whose lease expired", requeued)
+            row = self._db.execute(
+                "SELECT id, filename, kind, xml, attempts FROM outbox AS o "
+                "WHERE status = 'pending' AND next_attempt <= ? AND id = ("
+                "SELECT MIN(id) FROM outbox WHERE serie_key = o.serie_key AND status IN ('pending', 'in_flight')"
+                ") ORDER BY next_attempt, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                self._db.commit()
+                return None
+            self._db.execute(
+                "UPDATE outbox SET status = 'in_flight', attempts = attempts + 1, owner = ?, lease_until = ?, "
+                "updated_at = ? WHERE id = ?",
+                (self._owner, now + self.lease_timeout, now, row[0])
+            )
+            self._db.commit()
+        return row[0], row[1], row[2], row[3], row[4] + 1
+    
+    def _deliver(self, item_id: int, filename: str, kind: str, xml: bytes, attempts: int) -> None:
+        """Send a claimed document and record the outcome."""
+        xml_content = xml.decode('utf-8')
+        try:
+            if kind == KIND_SUMMARY:
+                result = self.soap_client.send_summary(filename, xml_content)
+            else:
+                result = self.soap_client.send(filename, xml_content)
+        except Exception as e:
+            logger.error("Error delivering %s: %s", filename, e)
+            result = None
+        
+        if result and result.get('success'):
+            self._finish(item_id, OutboundItem.DONE, result)
+        elif result and get_fault_number(result.get('code')) in ALREADY_REGISTERED_CODES:
+            logger.warning("%s was already registered at SUNAT, its CDR was not received", filename)
+            self._finish(item_id, OutboundItem.REGISTERED, result)
+        elif self._is_transient(result) and (self.max_attempts is None or attempts < self.max_attempts):
+            delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+            delay *= random.uniform(0.9, 1.1)
+            logger.warning("Delivery of %s failed (attempt %d), retrying in %.1fs", filename, attempts, delay)
+            self._retry(item_id, time.time() + delay, result)
+        else:
+            self._finish(item_id, OutboundItem.FAILED, result)
+    
+    def _is_transient(self, result: Optional[Dict[str, Any]]) -> bool:
+        """Check whether a failed delivery may succeed later."""
+        if not result:
+            return True
+        # No SUNAT code: the request did not reach SUNAT (connection error, timeout, open circuit)
+        return result.get('code') is None or self.retry_policy.is_retryable_result(result)
+    
+    def _retry(self, item_id: int, next_attempt: float, result: Optional[Dict[str, Any]]) -> None:
+        """Put a document back in the queue."""
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE outbox SET status = 'pending', next_attempt = ?, code = ?, error = ?, owner = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                (next_attempt, (result or {}).get('code'), (result or {}).get('error') or 'No response',
+                 time.time(), item_id, self._owner)
+            ).rowcount
+            self._db.commit()
+        if not updated:
+            logger.warning("Lease of document %d expired during its delivery", item_id)
+        self._notify()
+    
+    def _finish(self, item_id: int, status: str, result: Optional[Dict[str, Any]]) -> None:
+        """Record the final outcome of a document and report it."""
+        result = result or {'error': 'No response'}
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE outbox SET status = ?, code = ?, error = ?, ticket = ?, cdr_zip = ?, owner = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE id = ? AND owner = ?",
+                (status, result.get('code'), result.get('error'), result.get('ticket'),
+                 result.get('cdr_zip'), time.time(), item_id, self._owner)
+            ).rowcount
+            self._db.commit()
+            filename = self._db.execute("SELECT filename FROM outbox WHERE id = ?", (item_id,)).fetchone()[0]
+        
+        # The next document of the serie may be due now
+        self._notify()
+        
+        if not updated:
+            # Another worker took the document over and reports its outcome
+            logger.warning("Lease of %s expired during its delivery", filename)
+            return
+        
+        item = self.get(filename)
+        if item.ticket and self.ticket_scheduler is not None:
+            self.ticket_scheduler.add(item.ticket, {'filename': filename})
+        for callback in self._callbacks:
+            try:
+                callback(item)
+            except Exception as e:
+                logger.error(f"Error in outbound queue callback: {e}")
+    
+    def _work(self) -> None:
+        """Worker loop."""
+        while not self._stopping.is_set():
+            item = self._claim()
+            if item is not None:
+                self._deliver(*item)
+                continue
+            
+            with self._wakeup:
+                self._wakeup.wait(self._idle_wait())
+    
+    def _idle_wait(self) -> float:
+        """Seconds until the next retry is due, bounded by poll_interval."""
+        now = time.time()
+        with self._lock:
+            # Due documents left unclaimed wait for their serie: finishing it notifies
+            row = self._db.execute(
+                "SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending' AND next_attempt > ?", (now,)
+            ).fetchone()
+        if row[0] is None:
+            return self.poll_interval
+        return min(self.poll_interval, row[0] - now + 0.001)
+    
+    def _notify(self) -> None:
+        """Wake up idle workers."""
+        with self._wakeup:
+            self._wakeup.notify_all()
+
+
+def _serie_key(filename: str) -> str:
+    """Ordering group of a document: its filename without the correlativo."""
+    return filename.rsplit('-', 1)[0]
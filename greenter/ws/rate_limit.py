@@ -0,0 +1,188 @@
+"""
+Client-side rate limiting for SUNAT calls.
+Token buckets per RUC and per endpoint pace requests below SUNAT's
+throttling instead of letting bursts fail.
+"""
+
+from typing import Optional, Dict, Any, Callable
+import asyncio
+import threading
+import time
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+def ruc_from_username(username: Optional[str]) -> Optional[str]:
+    """
+    Get the RUC of a SOL username (RUC + user, e.g. 20000000001MODDATOS).
+    
+    Args:
+        username: SOL username
+        
+    Returns:
+        RUC or None
+    """
+    return username[:11] if username and len(username) >= 11 else None
+
+
+class TokenBucket:
+    """
+    Token bucket that paces callers.
+    
+    Callers reserve a token and sleep for the wait returned, so requests
+    are spread evenly at the bucket rate once the burst is used up.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize token bucket.
+        
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity, requests allowed back to back
+            clock: Monotonic time source
+        """
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    @property
+    def tokens(self) -> float:
+        """Tokens available now, negative while callers are waiting."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+    
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens, going into debt if needed.
+        
+        Args:
+            tokens: Tokens to take
+            
+        Returns:
+            Seconds the caller must wait before proceeding
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+    
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last update (lock held)."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """
+    Rate limiter with one token bucket per RUC and one per endpoint.
+    
+    Every call takes a token from its RUC bucket and from its endpoint
+    bucket; it proceeds when both allow it. Share one limiter between the
+    clients of a process so all of them are paced together.
+    """
+    
+    def __init__(self, per_ruc: Optional[float] = None, per_endpoint: Optional[float] = None,
+                 burst: int = 1, ruc_rates: Optional[Dict[str, float]] = None,
+                 endpoint_rates: Optional[Dict[str, float]] = None):
+        """
+        Initialize rate limiter.
+        
+        Args:
+            per_ruc: Default requests per second for each RUC, None for no limit
+            per_endpoint: Default requests per second for each endpoint, None for no limit
+            burst: Requests allowed back to back before pacing starts
+            ruc_rates: Requests per second for specific RUCs
+            endpoint_rates: Requests per second for specific endpoint URLs
+        """
+        self.per_ruc = per_ruc
+        self.per_endpoint = per_endpoint
+        self.burst = burst
+        self.ruc_rates = dict(ruc_rates or {})
+        self.endpoint_rates = dict(endpoint_rates or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def reserve(self, ruc: Optional[str], endpoint: Optional[str]) -> float:
+        """
+        Reserve a request slot.
+        
+        Args:
+            ruc: RUC sending the request
+            endpoint: Endpoint URL
+            
+        Returns:
+            Seconds to wait before sending
+        """
+        wait = 0.0
+        
+        rate = self.ruc_rates.get(ruc, self.per_ruc) if ruc else None
+        if rate:
+            wait = self._get_bucket(f"ruc:{ruc}", rate).reserve()
+        
+        rate = self.endpoint_rates.get(endpoint, self.per_endpoint) if endpoint else None
+        if rate:
+            wait = max(wait, self._get_bucket(f"endpoint:{endpoint}", rate).reserve())
+        
+        return wait
+    
+    def acquire(self, ruc: Optional[str], endpoint: Optional[str]) -> float:
+        """
+        Wait for a request slot.
+        
+        Args:
+            ruc: RUC sending the request
+            endpoint: Endpoint URL
+            
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(ruc, endpoint)
+        if wait > 0:
+            logger.debug("Rate limit: waiting %.3fs for %s at %s", wait, ruc, endpoint)
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self, ruc: Optional[str], endpoint: Optional[str]) -> float:
+        """
+        Wait for a request slot without blocking the event loop.
+        
+        Args:
+            ruc: RUC sending the request
+            endpoint: Endpoint URL
+            
+        Returns:
+            Seconds waited
+        """
+        wait = self.reserve(ruc, endpoint)
+        if wait > 0:
+            logger.debug("Rate limit: waiting %.3fs for %s at %s", wait, ruc, endpoint)
+            await asyncio.sleep(wait)
+        return wait
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get bucket state.
+        
+        Returns:
+            Dictionary keyed by 'ruc:<RUC>' or 'endpoint:<URL>' with rate and tokens
+        """
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {key: {'rate': bucket.rate, 'tokens': bucket.tokens} for key, bucket in buckets.items()}
+    
+    def _get_bucket(self, key: str, rate: float) -> TokenBucket:
+        """Get or create a bucket."""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, self.burst)
+                self._buckets[key] = bucket
+            return bucket
@@ -0,0 +1,198 @@
+"""
+Raw SOAP fast path for sendBill.
+Fills a pre-serialized envelope instead of going through zeep's type
+system, and reads the reply with a targeted lxml lookup.
+"""
+
+from typing import Optional, Dict, Any
+from xml.sax.saxutils import escape
+import base64
+import threading
+import weakref
+import logging
+
+import lxml.etree as etree
+from requests import Request, Session
+
+
+logger = logging.getLogger(__name__)
+
+
+SOAP_ENV_NS = 'http://schemas.xmlsoap.org/soap/envelope/'
+WSSE_NS = 'http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd'
+PASSWORD_TEXT = 'http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-username-token-profile-1.0#PasswordText'
+SERVICE_NS = 'http://service.sunat.gob.pe'
+
+SEND_BILL_ACTION = 'urn:sendBill'
+
+# Same serialization zeep produces for sendBill with a UsernameToken. Only
+# the credential-free parts are pre-encoded, so no password is kept around
+_ENVELOPE_USERNAME = (
+    "<?xml version='1.0' encoding='utf-8'?>\n"
+    f'<soap-env:Envelope xmlns:soap-env="{SOAP_ENV_NS}"><soap-env:Header>'
+    f'<wsse:Security xmlns:wsse="{WSSE_NS}"><wsse:UsernameToken>'
+    '<wsse:Username>'
+).encode('utf-8')
+_ENVELOPE_PASSWORD = f'</wsse:Username><wsse:Password Type="{PASSWORD_TEXT}">'.encode('utf-8')
+_ENVELOPE_FILENAME = (
+    '</wsse:Password></wsse:UsernameToken></wsse:Security></soap-env:Header><soap-env:Body>'
+    f'<ns0:sendBill xmlns:ns0="{SERVICE_NS}"><fileName>'
+).encode('utf-8')
+_ENVELOPE_CONTENT = b'</fileName><contentFile>'
+_ENVELOPE_TAIL = b'</contentFile></ns0:sendBill></soap-env:Body></soap-env:Envelope>'
+
+_BODY_CHILD_XPATH = etree.XPath('/soap-env:Envelope/soap-env:Body/*[1]', namespaces={'soap-env': SOAP_ENV_NS})
+_FAULT_TAG = f'{{{SOAP_ENV_NS}}}Fault'
+_SEND_BILL_RESPONSE_TAG = f'{{{SERVICE_NS}}}sendBillResponse'
+
+_local = threading.local()
+
+# Proxy/CA settings from the environment, resolved once per session and endpoint
+_environment_settings: "weakref.WeakKeyDictionary[Session, Dict[str, Dict[str, Any]]]" = weakref.WeakKeyDictionary()
+_environment_lock = threading.Lock()
+
+
+def _get_parser() -> etree.XMLParser:
+    """Get this thread's response parser (lxml parsers are not shared across threads)."""
+    parser = getattr(_local, 'parser', None)
+    if parser is None:
+        parser = etree.XMLParser(resolve_entities=False, no_network=True, huge_tree=True)
+        _local.parser = parser
+    return parser
+
+
+def _get_environment_settings(session: Session, address: str) -> Dict[str, Any]:
+    """
+    Get the send settings requests would merge from the environment on every call.
+    
+    The settings are resolved on first use and then kept for the life of
+    the session: later changes to the proxy/CA environment variables or to
+    session.proxies, verify and cert are not seen. Use a new session (or
+    clear_environment_settings) after changing them.
+    """
+    with _environment_lock:
+        settings = _environment_settings.setdefault(session, {})
+        if address not in settings:
+            settings[address] = session.merge_environment_settings(address, {}, None, None, None)
+        return settings[address]
+
+
+def clear_environment_settings(session: Optional[Session] = None) -> None:
+    """
+    Forget the cached environment settings.
+    
+    Args:
+        session: Session whose settings are dropped, all sessions if None
+    """
+    with _environment_lock:
+        if session is None:
+            _environment_settings.clear()
+        else:
+            _environment_settings.pop(session, None)
+
+
+def build_send_bill_envelope(username: str, password: str, filename: str, content: bytes) -> bytes:
+    """
+    Build a sendBill request envelope.
+    
+    Args:
+        username: SOL username (RUC + user)
+        password: SOL password
+        filename: ZIP filename
+        content: ZIP bytes, base64-encoded here exactly once as zeep does
+        
+    Returns:
+        Envelope bytes
+    """
+    return b''.join((
+        _ENVELOPE_USERNAME,
+        escape(username).encode('utf-8'),
+        _ENVELOPE_PASSWORD,
+        escape(password).encode('utf-8'),
+        _ENVELOPE_FILENAME,
+        escape(filename).encode('utf-8'),
+        _ENVELOPE_CONTENT,
+        base64.b64encode(content),
+        _ENVELOPE_TAIL,
+    ))
+
+
+def parse_send_bill_response(content: bytes) -> Dict[str, Any]:
+    """
+    Parse a sendBill reply.
+    
+    Args:
+        content: Response body
+        
+    Returns:
+        Dictionary with success, cdr_zip, error, code, description and,
+        for faults, detail
+    """
+    result = {
+        'success': False,
+        'cdr_zip': None,
+        'cdr_response': None,
+        'error': None,
+        'code': None,
+        'description': None
+    }
+    
+    try:
+        body_child = _BODY_CHILD_XPATH(etree.fromstring(content, _get_parser()))
+    except etree.XMLSyntaxError as e:
+        result['error'] = f'Respuesta SOAP inválida: {e}'
+        return result
+    
+    if not body_child:
+        result['error'] = 'Respuesta SOAP sin Body'
+        return result
+    
+    element = body_child[0]
+    if element.tag == _FAULT_TAG:
+        detail = element.find('detail')
+        result['code'] = element.findtext('faultcode')
+        result['description'] = element.findtext('faultstring')
+        result['error'] = f"SUNAT Fault {result['code']}: {result['description']}"
+        result['detail'] = etree.tostring(detail, encoding='unicode') if detail is not None else None
+    
+    elif element.tag == _SEND_BILL_RESPONSE_TAG:
+        application_response = element.findtext('applicationResponse')
+        result['success'] = True
+        result['cdr_zip'] = base64.b64decode(application_response) if application_response else None
+    
+    else:
+        result['error'] = f'Formato de respuesta desconocido: {element.tag}'
+    
+    return result
+
+
+def send_bill(session: Session, address: str, username: str, password: str,
+              filename: str, content: bytes, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Call sendBill with a pre-serialized envelope.
+    
+    Args:
+        session: HTTP session to post with
+        address: billService endpoint URL
+        username: SOL username (RUC + user)
+        password: SOL password
+        filename: ZIP filename
+        content: contentFile value
+        timeout: Seconds to wait for the response
+        
+    Returns:
+        Response dictionary (see parse_send_bill_response)
+    """
+    request = session.prepare_request(Request(
+        'POST',
+        address,
+        data=build_send_bill_envelope(username, password, filename, content),
+        headers={'Content-Type': 'text/xml; charset=utf-8', 'SOAPAction': f'"{SEND_BILL_ACTION}"'}
+    ))
+    response = session.send(request, timeout=timeout, **_get_environment_settings(session, address))
+    
+    # Faults come back as HTTP 500 with a SOAP body; other errors raise like zeep does
+    if response.status_code != 200 and b'Envelope' not in response.content[:512]:
+        response.raise_for_status()
+    
+    return parse_send_bill_response(response.content)
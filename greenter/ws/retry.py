@@ -0,0 +1,423 @@
+"""
+Retry policy and circuit breaker for SUNAT calls.
+Transient failures are retried with exponential backoff and jitter; an
+endpoint that keeps failing is short-circuited until it recovers.
+"""
+
+from typing import Optional, Dict, Any, Callable, Awaitable, Iterable, TypeVar
+import asyncio
+import random
+import re
+import threading
+import time
+import logging
+
+import requests
+from zeep.exceptions import Fault as ZeepFault, TransportError as ZeepTransportError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+# SUNAT "El sistema no puede responder su solicitud" family: service-side, worth retrying
+TRANSIENT_FAULT_CODES = frozenset({
+    '0100', '0109', '0110', '0130', '0131', '0132', '0133', '0134',
+    '0135', '0136', '0137', '0138', '0200',
+})
+
+# Operations that register something at SUNAT: a timed-out call may have
+# been received, so resending it could register the same document twice
+NON_IDEMPOTENT_OPERATIONS = frozenset({'sendBill', 'sendSummary', 'sendPack'})
+
+_FAULT_CODE_PATTERN = re.compile(r'(?<!\d)(\d{4})\s*$')
+
+
+def get_fault_number(code: Optional[str]) -> Optional[str]:
+    """
+    Get the SUNAT error number of a fault code.
+    
+    Args:
+        code: Fault code, e.g. 'soap-env:Client.1033' or '1033'
+        
+    Returns:
+        Four digit number or None
+    """
+    match = _FAULT_CODE_PATTERN.search(code or '')
+    return match.group(1) if match else None
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open."""
+    
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"Circuit open for {endpoint}, retry in {retry_in:.1f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one endpoint.
+    
+    Opens after failure_threshold consecutive transient failures. While
+    open, calls are rejected; after recovery_timeout one trial call is let
+    through (half-open) and its outcome closes or reopens the circuit.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Initialize circuit breaker.
+        
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+    
+    @property
+    def failures(self) -> int:
+        """Consecutive transient failures."""
+        return self._failures
+    
+    def allow(self) -> float:
+        """
+        Check whether a call may go through.
+        
+        Returns:
+            0 if allowed, otherwise seconds until the next trial call
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            
+            remaining = self.recovery_timeout - (time.monotonic() - self._opened_at)
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return 0.0
+            
+            return max(remaining, 0.0) or self.recovery_timeout
+    
+    def record_success(self) -> None:
+        """Record a call that reached a healthy endpoint."""
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def release(self) -> None:
+        """Release a trial call whose outcome says nothing about the endpoint health."""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        """Record a transient failure."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuit opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class RetryPolicy:
+    """
+    Retry policy for SUNAT calls.
+    
+    Connection errors, timeouts, HTTP 5xx and transient SUNAT fault codes
+    are retried; anything else (invalid document, bad credentials...) is
+    returned at once. Timeouts of non-idempotent calls (sendBill,
+    sendSummary, sendPack) are not retried unless retry_unsafe_timeouts is
+    set. Each endpoint has its own circuit breaker, so share one policy
+    between clients to share breakers.
+    """
+    
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0,
+                 jitter: bool = True, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 transient_codes: Iterable[str] = TRANSIENT_FAULT_CODES,
+                 retry_unsafe_timeouts: bool = False):
+        """
+        Initialize retry policy.
+        
+        Args:
+            max_attempts: Attempts per call, including the first one
+            base_delay: Backoff before the first retry, in seconds
+            max_delay: Upper bound for a single backoff
+            jitter: Randomize each backoff between 0 and its exponential bound
+            failure_threshold: Consecutive failures that open an endpoint circuit
+            recovery_timeout: Seconds an open circuit waits before a trial call
+            transient_codes: SUNAT fault codes considered retryable
+            retry_unsafe_timeouts: Also retry timeouts of non-idempotent calls,
+                which may send a document SUNAT already received
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.transient_codes = frozenset(transient_codes)
+        self.retry_unsafe_timeouts = retry_unsafe_timeouts
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get_breaker(self, endpoint: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of an endpoint.
+        
+        Args:
+            endpoint: Endpoint URL
+            
+        Returns:
+            CircuitBreaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+    
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get the backoff after a failed attempt.
+        
+        Args:
+            attempt: Number of the attempt that failed, starting at 1
+            
+        Returns:
+            Seconds to wait
+        """
+        bound = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, bound) if self.jitter else bound
+    
+    def is_transient_code(self, code: Optional[str]) -> bool:
+        """
+        Check whether a SUNAT fault code is transient.
+        
+        Args:
+            code: Fault code, e.g. 'soap-env:Server.0130' or '0130'
+            
+        Returns:
+            True if retryable
+        """
+        return get_fault_number(code) in self.transient_codes
+    
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Classify an exception raised by a SOAP call.
+        
+        Args:
+            error: Exception
+            
+        Returns:
+            True if the call may succeed when retried
+        """
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, ZeepFault):
+            # SUNAT puts the numeric code in faultcode or, sometimes, faultstring
+            return self.is_transient_code(error.code) or self.is_transient_code(error.message)
+        if isinstance(error, ZeepTransportError):
+            return error.status_code >= 500
+        if isinstance(error, requests.HTTPError):
+            return error.response is not None and error.response.status_code >= 500
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+            return True
+        if httpx is not None and isinstance(error, httpx.TransportError):
+            return True
+        return False
+    
+    def is_timeout(self, error: BaseException) -> bool:
+        """
+        Check whether an exception is a timeout after the request may have been sent.
+        
+        Connect timeouts are not included: the request never left.
+        
+        Args:
+            error: Exception
+            
+        Returns:
+            True if the endpoint may have received the request
+        """
+        if isinstance(error, requests.ConnectTimeout):
+            return False
+        if httpx is not None and isinstance(error, httpx.ConnectTimeout):
+            return False
+        if httpx is not None and isinstance(error, httpx.TimeoutException):
+            return True
+        return isinstance(error, (requests.Timeout, asyncio.TimeoutError, TimeoutError))
+    
+    def is_sunat_answer(self, error: BaseException) -> bool:
+        """
+        Check whether an exception carries an answer from SUNAT.
+        
+        Args:
+            error: Exception
+            
+        Returns:
+            True if it is a SOAP fault with a SUNAT error number
+        """
+        return isinstance(error, ZeepFault) and bool(get_fault_number(error.code) or get_fault_number(error.message))
+    
+    def is_retryable_result(self, result: Any) -> bool:
+        """
+        Classify a result dictionary carrying a SUNAT fault.
+        
+        Args:
+            result: Value returned by the call
+            
+        Returns:
+            True if it reports a transient fault
+        """
+        return (isinstance(result, dict) and not result.get('success')
+                and (self.is_transient_code(result.get('code')) or self.is_transient_code(result.get('description'))))
+    
+    def call(self, func: Callable[[], T], endpoint: str,
+             idempotent: bool = True) -> T:
+        """
+        Run a call, retrying transient failures.
+        
+        Args:
+            func: Call to make
+            endpoint: Endpoint URL, selects the circuit breaker
+            idempotent: False for calls that must not be resent after a timeout
+            
+        Returns:
+            Result of the last attempt
+            
+        Raises:
+            CircuitOpenError: If the endpoint circuit is open
+            Exception: The last error if it is terminal or attempts run out
+        """
+        breaker = self.get_breaker(endpoint)
+        attempt = 1
+        while True:
+            self._check_circuit(breaker, endpoint)
+            try:
+                result = func()
+            except Exception as e:
+                if not self._should_retry(breaker, attempt, e, error=True, idempotent=idempotent):
+                    raise
+            except BaseException:
+                # Cancelled or interrupted: free a half-open trial slot
+                breaker.release()
+                raise
+            else:
+                if not self._should_retry(breaker, attempt, result):
+                    return result
+            
+            delay = self.get_delay(attempt)
+            logger.warning(f"Retrying call to {endpoint} in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})")
+            time.sleep(delay)
+            attempt += 1
+    
+    async def call_async(self, func: Callable[[], Awaitable[T]], endpoint: str,
+                         idempotent: bool = True) -> T:
+        """
+        Run an asynchronous call, retrying transient failures.
+        
+        Args:
+            func: Function returning a new awaitable per attempt
+            endpoint: Endpoint URL, selects the circuit breaker
+            idempotent: False for calls that must not be resent after a timeout
+            
+        Returns:
+            Result of the last attempt
+            
+        Raises:
+            CircuitOpenError: If the endpoint circuit is open
+            Exception: The last error if it is terminal or attempts run out
+        """
+        breaker = self.get_breaker(endpoint)
+        attempt = 1
+        while True:
+            self._check_circuit(breaker, endpoint)
+            try:
+                result = await func()
+            except Exception as e:
+                if not self._should_retry(breaker, attempt, e, error=True, idempotent=idempotent):
+                    raise
+            except BaseException:
+                # Cancelled or interrupted: free a half-open trial slot
+                breaker.release()
+                raise
+            else:
+                if not self._should_retry(breaker, attempt, result):
+                    return result
+            
+            delay = self.get_delay(attempt)
+            logger.warning(f"Retrying call to {endpoint} in {delay:.2f}s (attempt {attempt + 1}/{self.max_attempts})")
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get circuit state per endpoint.
+        
+        Returns:
+            Dictionary keyed by endpoint with state and failures
+        """
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {
+            endpoint: {'state': breaker.state, 'failures': breaker.failures}
+            for endpoint, breaker in breakers.items()
+        }
+    
+    def _check_circuit(self, breaker: CircuitBreaker, endpoint: str) -> None:
+        """Raise if the endpoint circuit rejects the call."""
+        retry_in = breaker.allow()
+        if retry_in:
+            raise CircuitOpenError(endpoint, retry_in)
+    
+    def _should_retry(self, breaker: CircuitBreaker, attempt: int, outcome: Any, error: bool = False,
+                      idempotent: bool = True) -> bool:
+        """Record the outcome of an attempt and decide whether to retry it."""
+        retryable = self.is_retryable(outcome) if error else self.is_retryable_result(outcome)
+        if not retryable:
+            if not error or self.is_sunat_answer(outcome):
+                # A terminal SUNAT fault still means the endpoint answered
+                breaker.record_success()
+            else:
+                # HTTP 4xx and local errors say nothing about the endpoint health
+                breaker.release()
+            return False
+        
+        breaker.record_failure()
+        if error and not idempotent and not self.retry_unsafe_timeouts and self.is_timeout(outcome):
+            return False
+        # Once the circuit opens, report this failure rather than waiting to be rejected
+        return attempt < self.max_attempts and breaker.state != CircuitBreaker.OPEN
@@ -3,16 +3,19 @@ SOAP Client for communication with SUNAT services.
 Migrated from packages/ws/src/Ws/Services/
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, Tuple
 import logging
-import base64
-import zipfile
-import io
+import threading
 from zeep import Client, Transport
 from zeep.wsse.username import UsernameToken
 from zeep.exceptions import Fault as ZeepFault
-from requests import Session
-from requests.auth import HTTPBasicAuth
+
+from .wsdl import get_wsdl_document, BILL_SERVICE_WSDL, BILL_SERVICE_BINDING
+from .http_pool import HttpSessionPool, default_pool
+from .retry import RetryPolicy
+from .rate_limit import RateLimiter, ruc_from_username
+from .zip_payload import ZipPayloadBuilder, default_builder, read_cdr
+from . import raw_soap
 
 
 logger = logging.getLogger(__name__)
@@ -51,13 +54,29 @@ class SoapClient:
     SOAP Client for SUNAT web services.
     """
     
+    # Bundled WSDL and binding of the service this client talks to
+    WSDL_PATH = BILL_SERVICE_WSDL
+    BINDING = BILL_SERVICE_BINDING
+    
     def __init__(self):
         """Initialize SOAP client."""
         self.username: Optional[str] = None
         self.password: Optional[str] = None
         self.service_url: Optional[str] = None
-        self.client: Optional[Client] = None
-        self.session = Session()
+        self.service = None
+        self.session_pool: HttpSessionPool = default_pool
+        self.fast_path = False
+        self.retry_policy: Optional[RetryPolicy] = None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.payload_builder: ZipPayloadBuilder = default_builder
+        self._client: Optional[Client] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def client(self) -> Optional[Client]:
+        """zeep client, built on first use once credentials are set."""
+        self.connect()
+        return self._client
     
     def set_credentials(self, username: str, password: str):
         """
@@ -69,7 +88,9 @@ class SoapClient:
         """
         self.username = username
         self.password = password
-        self._setup_client()
+        
+        if self._client is not None:
+            self._client.wsse = UsernameToken(username, password)
     
     def set_service(self, service_url: Optional[str]):
         """
@@ -79,95 +100,135 @@ class SoapClient:
             service_url: SOAP service endpoint URL
         """
         self.service_url = service_url
-        self._setup_client()
+        
+        if self._client is not None:
+            # Only the address changes, the client and WSDL are kept
+            self._bind_service()
+    
+    def set_session_pool(self, session_pool: HttpSessionPool):
+        """
+        Set the pool providing HTTP sessions.
+        
+        Args:
+            session_pool: Session pool, shared by default across clients
+        """
+        self.session_pool = session_pool
+        
+        if self._client is not None:
+            self._client.transport.session = session_pool.get_session(self.get_address())
+    
+    def set_payload_builder(self, payload_builder: ZipPayloadBuilder):
+        """
+        Set the builder of the ZIP sent as contentFile.
+        
+        Args:
+            payload_builder: ZipPayloadBuilder, e.g. with another compression level
+        """
+        self.payload_builder = payload_builder
+    
+    def set_fast_path(self, enabled: bool = True):
+        """
+        Send sendBill through the raw SOAP transport instead of zeep.
+        
+        The request on the wire and the result dictionary are the same;
+        building the envelope and reading the reply cost less CPU.
+        
+        Args:
+            enabled: Whether to use the raw transport
+        """
+        self.fast_path = enabled
+    
+    def set_retry_policy(self, retry_policy: Optional[RetryPolicy]):
+        """
+        Set the retry policy for SOAP calls.
+        
+        Args:
+            retry_policy: RetryPolicy, None to make a single attempt
+        """
+        self.retry_policy = retry_policy
+    
+    def set_rate_limiter(self, rate_limiter: Optional[RateLimiter]):
+        """
+        Set the rate limiter pacing SOAP calls.
+        
+        Calls are limited by the RUC of the configured username and by endpoint.
+        
+        Args:
+            rate_limiter: RateLimiter, None for no limit
+        """
+        self.rate_limiter = rate_limiter
+    
+    def get_ruc(self) -> Optional[str]:
+        """Get the RUC of the configured username."""
+        return ruc_from_username(self.username)
+    
+    def get_address(self) -> str:
+        """Get the endpoint the service is bound to."""
+        return self.service_url or SunatEndpoints.FE_BETA
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get connection pool utilization for this client's endpoint.
+        
+        Returns:
+            Dictionary with maxsize, in_use, idle, connections and requests
+        """
+        return self.session_pool.get_stats(self.get_address())
+    
+    def connect(self) -> bool:
+        """
+        Build the zeep client if it does not exist yet.
+        
+        Configuration setters never build it, so a client is created once,
+        with the final credentials and endpoint.
+        
+        Returns:
+            True if the client is ready
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._setup_client()
+        return self._client is not None
     
     def _setup_client(self):
         """Setup SOAP client with credentials and service URL."""
         if not self.username or not self.password:
-            print("⚠️  No credentials provided for SOAP client")
+            logger.warning("No credentials provided for SOAP client")
             return
         
         try:
-            # For SUNAT, try without authentication for WSDL first
-            # Authentication is only needed for service calls
-            transport = Transport(session=Session())
-            
-            # Use service URL for WSDL if available, otherwise use default
-            # Try different WSDL URL formats
-            if self.service_url:
-                wsdl_url = f"{self.service_url}?wsdl"
-            else:
-                wsdl_url = SunatEndpoints.WSDL_ENDPOINT
-            
-            # Create SOAP client with WSDL
-            self.client = Client(wsdl_url, transport=transport)
+            # Keep-alive session shared with every client of the same endpoint
+            transport = Transport(session=self.session_pool.get_session(self.get_address()))
             
-            # Setup WSSE authentication for service calls
-            wsse = UsernameToken(self.username, self.password)
-            self.client.wsse = wsse
+            # Bundled WSDL, parsed once per process: no download per client
+            client = Client(
+                get_wsdl_document(self.WSDL_PATH),
+                transport=transport,
+                wsse=UsernameToken(self.username, self.password)
+            )
+            self._bind_service(client)
+            # Published last: connect() reads _client without the lock
+            self._client = client
             
-            logger.info(f"SOAP client initialized successfully for service: {self.service_url or 'default'}")
-            print(f"✅ SOAP client initialized successfully")
+            logger.info("SOAP client initialized successfully for service: %s", self.service_url or 'default')
             
         except Exception as e:
-            logger.error(f"Error setting up SOAP client: {e}")
-            print(f"Error setting up SOAP client: {e}")
-            
-            # Try fallback with different WSDL approaches
-            try:
-                logger.info("Trying fallback WSDL approaches...")
-                print("⚠️  Trying fallback approaches...")
-                
-                # List of WSDL URLs to try (SOLO HOMOLOGACIÓN/PRUEBAS)
-                fallback_wsdls = [
-                    SunatEndpoints.WSDL_ENDPOINT,  # Default with ?wsdl
-                    f"{self.service_url}?wsdl" if self.service_url else None,
-                    "https://e-beta.sunat.gob.pe/ol-ti-itcpfegem-beta/billService?wsdl",
-                    "https://www.sunat.gob.pe/ol-ti-itcpgem-sqa/billService?wsdl"
-                    # PRODUCCIÓN COMENTADO POR SEGURIDAD:
-                    # "https://e-factura.sunat.gob.pe/ol-ti-itcpfegem/billService?wsdl"
-                ]
-                
-                # Remove None values
-                fallback_wsdls = [url for url in fallback_wsdls if url]
-                
-                for i, fallback_wsdl in enumerate(fallback_wsdls):
-                    try:
-                        print(f"   Probando WSDL {i+1}/{len(fallback_wsdls)}: {fallback_wsdl}")
-                        
-                        transport = Transport(session=Session())
-                        self.client = Client(fallback_wsdl, transport=transport)
-                        
-                        # Setup WSSE authentication for service calls
-                        wsse = UsernameToken(self.username, self.password)
-                        self.client.wsse = wsse
-                        
-                        # Set service URL if provided
-                        if self.service_url:
-                            try:
-                                binding = self.client.service._binding
-                                binding.address = self.service_url
-                            except:
-                                # If binding modification fails, continue anyway
-                                pass
-                        
-                        logger.info(f"SOAP client initialized with fallback WSDL: {fallback_wsdl}")
-                        print(f"✅ SOAP client initialized with WSDL: {fallback_wsdl}")
-                        return  # Success, exit the method
-                        
-                    except Exception as fallback_error:
-                        print(f"   ❌ Falló WSDL {i+1}: {fallback_error}")
-                        continue
-                
-                # If we get here, all fallbacks failed
-                logger.error("All fallback WSDLs failed")
-                print("❌ Todos los WSDLs de fallback fallaron")
-                self.client = None
-                
-            except Exception as e2:
-                logger.error(f"Fallback process failed: {e2}")
-                print(f"❌ Proceso de fallback falló: {e2}")
-                self.client = None
+            logger.error("Error setting up SOAP client: %s", e)
+            self._client = None
+            self.service = None
+    
+    def _bind_service(self, client: Optional[Client] = None):
+        """
+        Bind the service proxy to the configured endpoint.
+        
+        Args:
+            client: zeep client to bind, the current one if None
+        """
+        client = client or self._client
+        address = self.get_address()
+        client.transport.session = self.session_pool.get_session(address)
+        self.service = client.create_service(self.BINDING, address)
     
     def send(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
         """
@@ -180,61 +241,51 @@ class SoapClient:
         Returns:
             Response dictionary or None if error
         """
-        if not self.client:
+        if not self.connect():
             logger.error("SOAP client not initialized")
-            print("❌ SOAP client not initialized in send()")
             return None
         
         try:
-            print(f"🔧 Preparando envío: {filename}")
-            
             # Compress XML content
             zip_content = self._compress_xml(filename, xml_content)
             if not zip_content:
-                print("❌ Error comprimiendo XML")
+                logger.error("Error compressing XML: %s", filename)
                 return None
             
-            print(f"✅ XML comprimido: {len(zip_content)} bytes")
-            
             # Prepare parameters
             zip_filename = f"{filename}.zip"
             
-            print(f"📤 Enviando a SUNAT: {zip_filename}")
+            # Diagnostics are %-formatted by logging only if the level is enabled
+            logger.debug("Sending %s to SUNAT (%d bytes)", zip_filename, len(zip_content),
+                         extra={'sunat_file': zip_filename, 'sunat_bytes': len(zip_content)})
+            
+            if self.fast_path:
+                return self._send_bill_raw(zip_filename, zip_content)
             
             # Call SOAP service
             try:
-                response = self.client.service.sendBill(
+                response = self._invoke(lambda: self.service.sendBill(
                     fileName=zip_filename,
                     contentFile=zip_content
-                )
-                
-                print(f"📨 Respuesta recibida: {type(response)}")
+                ), idempotent=False)
                 
                 # Process response
                 result = self._process_send_response(response)
-                print(f"📋 Respuesta procesada: {result}")
+                logger.debug("sendBill %s: success=%s code=%s", zip_filename, result['success'], result['code'],
+                             extra={'sunat_file': zip_filename, 'sunat_success': result['success'],
+                                    'sunat_code': result['code']})
                 
                 return result
                 
             except ZeepFault as zeep_fault:
-                print(f"❌ ZeepFault detectado: {zeep_fault}")
-                print(f"❌ Código: {zeep_fault.code}")
-                print(f"❌ Mensaje: {zeep_fault.message}")
-                print(f"❌ Detalle: {zeep_fault.detail}")
+                logger.warning("sendBill %s fault %s: %s", zip_filename, zeep_fault.code, zeep_fault.message,
+                               extra={'sunat_file': zip_filename, 'sunat_code': zeep_fault.code})
                 
-                error_info = {
-                    'success': False,
-                    'error': f"SUNAT Fault {zeep_fault.code}: {zeep_fault.message}",
-                    'code': zeep_fault.code,
-                    'description': zeep_fault.message,
-                    'detail': str(zeep_fault.detail) if zeep_fault.detail else None
-                }
-                
-                return error_info
+                return self._process_fault(zeep_fault)
                 
             except Exception as soap_error:
-                print(f"❌ Error en llamada SOAP: {soap_error}")
-                print(f"❌ Tipo de error: {type(soap_error)}")
+                logger.warning("sendBill %s failed: %r", zip_filename, soap_error,
+                               extra={'sunat_file': zip_filename})
                 
                 # Intentar extraer información útil del error
                 error_info = {
@@ -249,8 +300,6 @@ class SoapClient:
                     error_info['code'] = soap_error.code
                     error_info['description'] = soap_error.message
                     error_info['error'] = f"SOAP Fault {soap_error.code}: {soap_error.message}"
-                    print(f"🔍 Zeep Fault Code: {soap_error.code}")
-                    print(f"🔍 Zeep Fault Message: {soap_error.message}")
                 
                 # Si es un error de SOAP Fault estándar, extraer detalles
                 elif hasattr(soap_error, 'fault'):
@@ -258,27 +307,19 @@ class SoapClient:
                     error_info['code'] = getattr(fault, 'faultcode', None)
                     error_info['description'] = getattr(fault, 'faultstring', None)
                     error_info['error'] = f"SOAP Fault {error_info['code']}: {error_info['description']}"
-                    print(f"🔍 SOAP Fault Code: {error_info['code']}")
-                    print(f"🔍 SOAP Fault String: {error_info['description']}")
-                
-                # Intentar obtener más detalles del error
-                print(f"🔍 Atributos del error: {dir(soap_error)}")
                 
                 # Intentar obtener detalles específicos de zeep
                 if hasattr(soap_error, 'detail'):
-                    print(f"🔍 Detail: {soap_error.detail}")
                     error_info['detail'] = str(soap_error.detail)
                 
                 if hasattr(soap_error, 'args') and soap_error.args:
-                    print(f"🔍 Args: {soap_error.args}")
                     if len(soap_error.args) > 0:
                         error_info['error'] = str(soap_error.args[0])
                 
                 return error_info
             
         except Exception as e:
-            logger.error(f"Error sending document: {e}")
-            print(f"❌ Error enviando documento: {e}")
+            logger.error("Error sending document: %s", e)
             return None
     
     def send_summary(self, filename: str, xml_content: str) -> Optional[Dict[str, Any]]:
@@ -292,7 +333,7 @@ class SoapClient:
         Returns:
             Response dictionary or None if error
         """
-        if not self.client:
+        if not self.connect():
             logger.error("SOAP client not initialized")
             return None
         
@@ -306,16 +347,57 @@ class SoapClient:
             zip_filename = f"{filename}.zip"
             
             # Call SOAP service
-            response = self.client.service.sendSummary(
+            response = self._invoke(lambda: self.service.sendSummary(
                 fileName=zip_filename,
                 contentFile=zip_content
-            )
+            ), idempotent=False)
             
             # Process response
             return self._process_summary_response(response)
             
         except Exception as e:
-            logger.error(f"Error sending summary: {e}")
+            logger.error("Error sending summary: %s", e)
+            return None
+    
+    def send_pack(self, filename: str, documents: Iterable[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        Send several documents in one ZIP to SUNAT (sendPack).
+        
+        SUNAT answers with a ticket, like sendSummary; the CDRs are
+        obtained later with get_status.
+        
+        Args:
+            filename: Pack filename, {RUC}-LT-{YYYYMMDD}-{correlativo}
+            documents: (XML filename, XML content) pairs
+            
+        Returns:
+            Response dictionary with the ticket or None if error
+        """
+        if not self.connect():
+            logger.error("SOAP client not initialized")
+            return None
+        
+        try:
+            zip_content = self.payload_builder.build_pack(documents)
+            zip_filename = f"{filename}.zip"
+            logger.debug("Sending pack %s to SUNAT (%d bytes)", zip_filename, len(zip_content),
+                         extra={'sunat_file': zip_filename, 'sunat_bytes': len(zip_content)})
+            
+            # Call SOAP service
+            response = self._invoke(lambda: self.service.sendPack(
+                fileName=zip_filename,
+                contentFile=zip_content
+            ), idempotent=False)
+            
+            # sendPackResponse has the same shape as sendSummaryResponse
+            return self._process_summary_response(response)
+            
+        except ZeepFault as zeep_fault:
+            logger.warning("sendPack %s fault %s: %s", filename, zeep_fault.code, zeep_fault.message)
+            return self._process_fault(zeep_fault)
+            
+        except Exception as e:
+            logger.error("Error sending pack: %s", e)
             return None
     
     def get_status(self, ticket: Optional[str]) -> Optional[Dict[str, Any]]:
@@ -326,23 +408,77 @@ class SoapClient:
             ticket: Ticket ID from submission
             
         Returns:
-            Status response or None if error
+            Status response, a fault dictionary, or None if error
         """
-        if not self.client or not ticket:
+        if not self.connect() or not ticket:
             logger.error("SOAP client not initialized or no ticket provided")
             return None
         
         try:
             # Call SOAP service
-            response = self.client.service.getStatus(ticket=ticket)
+            response = self._invoke(lambda: self.service.getStatus(ticket=ticket))
             
             # Process response
             return self._process_status_response(response)
             
+        except ZeepFault as zeep_fault:
+            logger.warning("getStatus %s fault %s: %s", ticket, zeep_fault.code, zeep_fault.message)
+            return self._process_fault(zeep_fault)
+            
         except Exception as e:
-            logger.error(f"Error getting status: {e}")
+            logger.error("Error getting status: %s", e)
             return None
     
+    def _invoke(self, call: Callable[[], Any], idempotent: bool = True) -> Any:
+        """
+        Make a SOAP call under the rate limiter and retry policy, if any.
+        
+        Args:
+            call: Call to make
+            idempotent: False for sends, which are not retried after a timeout
+            
+        Returns:
+            Result of the call
+        """
+        def attempt():
+            if self.rate_limiter is not None:
+                # Every attempt, retries included, takes a token
+                self.rate_limiter.acquire(self.get_ruc(), self.get_address())
+            return call()
+        
+        if self.retry_policy is None:
+            return attempt()
+        return self.retry_policy.call(attempt, self.get_address(), idempotent)
+    
+    def _send_bill_raw(self, zip_filename: str, zip_content: bytes) -> Dict[str, Any]:
+        """
+        Call sendBill through the raw SOAP transport.
+        
+        Args:
+            zip_filename: ZIP filename
+            zip_content: contentFile value
+            
+        Returns:
+            Response dictionary
+        """
+        address = self.get_address()
+        try:
+            result = self._invoke(lambda: raw_soap.send_bill(
+                self.session_pool.get_session(address), address,
+                self.username, self.password, zip_filename, zip_content,
+                timeout=self._client.transport.operation_timeout
+            ), idempotent=False)
+        except Exception as e:
+            logger.error("Error sending document: %s", e)
+            return self._process_fault(e)
+        
+        if result['cdr_zip']:
+            result['cdr_response'] = self._extract_cdr(result['cdr_zip'])
+        logger.debug("sendBill %s: success=%s code=%s", zip_filename, result['success'], result['code'],
+                     extra={'sunat_file': zip_filename, 'sunat_success': result['success'],
+                            'sunat_code': result['code']})
+        return result
+    
     def _compress_xml(self, filename: str, xml_content: str) -> Optional[bytes]:
         """
         Compress XML content to ZIP.
@@ -352,25 +488,52 @@ class SoapClient:
             xml_content: XML content
             
         Returns:
-            Compressed ZIP bytes or None if error
+            ZIP bytes (not base64: the transport encodes them) or None if error
         """
         try:
-            # Create ZIP in memory
-            zip_buffer = io.BytesIO()
-            
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                # Add XML file to ZIP
-                xml_filename = f"{filename}.xml"
-                zip_file.writestr(xml_filename, xml_content.encode('utf-8'))
-            
-            # Get ZIP bytes and encode as base64
-            zip_bytes = zip_buffer.getvalue()
-            return base64.b64encode(zip_bytes)
+            return self.payload_builder.build(filename, xml_content)
             
         except Exception as e:
-            logger.error(f"Error compressing XML: {e}")
+            logger.error("Error compressing XML: %s", e)
             return None
     
+    def _extract_cdr(self, cdr_zip: bytes) -> Optional[str]:
+        """
+        Extract the CDR XML from its ZIP.
+        
+        Args:
+            cdr_zip: ZIP bytes returned by SUNAT
+            
+        Returns:
+            CDR XML string or None if error
+        """
+        return read_cdr(cdr_zip)
+    
+    def _process_fault(self, soap_error: Exception) -> Dict[str, Any]:
+        """
+        Build the error result for a failed SOAP call.
+        
+        Args:
+            soap_error: Exception raised by the call
+            
+        Returns:
+            Error response dictionary
+        """
+        error_info = {
+            'success': False,
+            'error': str(soap_error),
+            'code': None,
+            'description': None
+        }
+        
+        if isinstance(soap_error, ZeepFault):
+            error_info['code'] = soap_error.code
+            error_info['description'] = soap_error.message
+            error_info['error'] = f"SUNAT Fault {soap_error.code}: {soap_error.message}"
+            error_info['detail'] = str(soap_error.detail) if soap_error.detail else None
+        
+        return error_info
+    
     def _process_send_response(self, response) -> Dict[str, Any]:
         """
         Process send bill response.
@@ -391,32 +554,27 @@ class SoapClient:
         }
         
         try:
-            print(f"🔍 Analizando respuesta SOAP: {response}")
-            print(f"🔍 Tipo de respuesta: {type(response)}")
-            print(f"🔍 Atributos disponibles: {dir(response) if response else 'None'}")
-            
             if response is None:
                 result['error'] = 'Respuesta SOAP es None'
                 return result
             
+            # zeep unwraps single-element responses to the decoded CDR zip
+            if isinstance(response, bytes):
+                result['success'] = True
+                result['cdr_zip'] = response
+                result['cdr_response'] = self._extract_cdr(response)
+                return result
+            
             # Intentar diferentes formatos de respuesta SUNAT
             if hasattr(response, 'applicationResponse'):
-                print("✅ Encontrado applicationResponse")
                 result['success'] = True
                 result['cdr_zip'] = response.applicationResponse
                 
-                # Decodificar CDR si está en base64
+                # zeep already decoded the base64Binary: this is the zip itself
                 if result['cdr_zip']:
-                    try:
-                        import base64
-                        cdr_decoded = base64.b64decode(result['cdr_zip'])
-                        result['cdr_response'] = cdr_decoded.decode('utf-8', errors='ignore')
-                        print(f"✅ CDR decodificado: {len(result['cdr_response'])} caracteres")
-                    except Exception as decode_error:
-                        print(f"⚠️  Error decodificando CDR: {decode_error}")
-                        
+                    result['cdr_response'] = self._extract_cdr(result['cdr_zip'])
+                    
             elif hasattr(response, 'status'):
-                print("✅ Encontrado status")
                 status = response.status
                 result['code'] = getattr(status, 'statusCode', None)
                 result['description'] = getattr(status, 'content', None)
@@ -427,19 +585,17 @@ class SoapClient:
                     result['error'] = f"SUNAT Error {result['code']}: {result['description']}"
                     
             elif hasattr(response, 'faultcode') or hasattr(response, 'faultstring'):
-                print("❌ Encontrado SOAP Fault")
                 result['error'] = f"SOAP Fault: {getattr(response, 'faultstring', 'Unknown fault')}"
                 result['code'] = getattr(response, 'faultcode', None)
                 
             else:
-                print("⚠️  Formato de respuesta desconocido")
                 result['error'] = f'Formato de respuesta desconocido: {str(response)[:200]}'
+                logger.warning("Unknown sendBill response format: %s", type(response).__name__)
                 
         except Exception as e:
-            print(f"❌ Error procesando respuesta: {e}")
+            logger.error("Error processing send response: %s", e)
             result['error'] = f'Error procesando respuesta: {str(e)}'
         
-        print(f"📋 Resultado procesado: {result}")
         return result
     
     def _process_summary_response(self, response) -> Dict[str, Any]:
@@ -459,7 +615,11 @@ class SoapClient:
         }
         
         try:
-            if hasattr(response, 'ticket'):
+            if isinstance(response, str):
+                # zeep unwraps single-element responses to the ticket itself
+                result['success'] = True
+                result['ticket'] = response
+            elif hasattr(response, 'ticket'):
                 result['success'] = True
                 result['ticket'] = response.ticket
             else:
@@ -484,15 +644,19 @@ class SoapClient:
             'success': False,
             'status_code': None,
             'content': None,
+            'cdr_response': None,
             'error': None
         }
         
         try:
-            if hasattr(response, 'status'):
-                status = response.status
+            if hasattr(response, 'status') or hasattr(response, 'statusCode'):
+                # zeep unwraps getStatusResponse to its status element
+                status = getattr(response, 'status', response)
                 result['success'] = True
                 result['status_code'] = getattr(status, 'statusCode', None)
                 result['content'] = getattr(status, 'content', None)
+                if isinstance(result['content'], bytes):
+                    result['cdr_response'] = self._extract_cdr(result['content'])
             else:
                 result['error'] = 'No status received'
                 
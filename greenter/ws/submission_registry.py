@@ -0,0 +1,224 @@
+"""
+Registry of documents already accepted by SUNAT.
+A bloom filter in memory answers "never sent" without touching disk; the
+CDRs of accepted documents live in a CdrStore, so a re-send returns the
+stored CDR instead of a round trip ending in error 1033.
+"""
+
+from typing import Optional, Dict, Any, Union
+import hashlib
+import math
+import threading
+import logging
+
+from lxml import etree
+
+from .cdr_store import CdrStore
+from .zip_payload import read_cdr
+
+
+logger = logging.getLogger(__name__)
+
+
+CBC_NS = 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2'
+
+
+def get_response_code(cdr_xml: Optional[str]) -> Optional[str]:
+    """
+    Get the ResponseCode of a CDR.
+    
+    Args:
+        cdr_xml: CDR XML string
+        
+    Returns:
+        Response code or None if not found
+    """
+    if not cdr_xml:
+        return None
+    try:
+        element = etree.fromstring(cdr_xml.encode('utf-8')).find(f'.//{{{CBC_NS}}}ResponseCode')
+    except etree.XMLSyntaxError as e:
+        logger.error("Error parsing CDR: %s", e)
+        return None
+    return element.text.strip() if element is not None and element.text else None
+
+
+def is_accepted_code(code: Optional[str]) -> bool:
+    """
+    Check whether a CDR ResponseCode means the document was accepted.
+    
+    0 is accepted, 4000 and above is accepted with observations; 100-3999
+    are exceptions and rejections.
+    
+    Args:
+        code: CDR ResponseCode
+        
+    Returns:
+        True if accepted
+    """
+    try:
+        number = int(code)
+    except (TypeError, ValueError):
+        return False
+    return number == 0 or number >= 4000
+
+
+class BloomFilter:
+    """
+    Bloom filter of string keys.
+    
+    Answers "not present" with certainty and "maybe present" with the
+    configured false positive rate while holding up to capacity keys.
+    """
+    
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        """
+        Initialize bloom filter.
+        
+        Args:
+            capacity: Expected number of keys
+            error_rate: False positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+    
+    def add(self, key: str) -> None:
+        """
+        Add a key.
+        
+        Args:
+            key: Key to add
+        """
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+        if self._count == self.capacity + 1:
+            logger.warning("Bloom filter past its capacity of %d keys, false positives will exceed %s; "
+                           "raise the capacity", self.capacity, self.error_rate)
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def _positions(self, key: str):
+        """Bit positions of a key (double hashing over one digest)."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+class SubmissionRegistry:
+    """
+    Registry of accepted submissions keyed by RUC, tipo, serie and correlativo.
+    
+    Only documents whose CDR ResponseCode means accepted are recorded;
+    rejected documents can be corrected and sent again. The registry is
+    safe to share between threads.
+    """
+    
+    def __init__(self, store: Optional[CdrStore] = None, capacity: int = 100000,
+                 error_rate: float = 0.001):
+        """
+        Initialize submission registry.
+        
+        Args:
+            store: CdrStore holding the CDRs, e.g. CdrStore('cdrs.db');
+                a temporary in-memory store if None
+            capacity: Expected number of documents, sizes the bloom filter
+            error_rate: Bloom filter false positive rate
+        """
+        self.store = store if store is not None else CdrStore()
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._stats = {'lookups': 0, 'hits': 0, 'false_positives': 0, 'recorded': 0}
+        
+        for key in self.store.keys():
+            self._bloom.add(self._key(*key))
+    
+    def get_accepted(self, ruc: str, tipo: str, serie: str,
+                     correlativo: Union[str, int]) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored answer of an accepted document.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type
+            serie: Serie
+            correlativo: Correlativo
+            
+        Returns:
+            Dictionary with response_code, status_code, message, cdr_zip,
+            cdr_response and updated_at, or None if the document was not
+            accepted before
+        """
+        key = self._key(ruc, tipo, serie, correlativo)
+        with self._lock:
+            self._stats['lookups'] += 1
+            if key not in self._bloom:
+                return None
+        
+        entry = self.store.get(ruc, tipo, serie, correlativo)
+        if entry is None or not entry['cdr_zip'] or not is_accepted_code(entry['response_code']):
+            with self._lock:
+                self._stats['false_positives'] += 1
+            return None
+        
+        with self._lock:
+            self._stats['hits'] += 1
+        entry['cdr_response'] = read_cdr(entry['cdr_zip'])
+        return entry
+    
+    def record(self, ruc: str, tipo: str, serie: str, correlativo: Union[str, int],
+               cdr_zip: Optional[bytes], cdr_xml: Optional[str] = None) -> bool:
+        """
+        Record the CDR of a submitted document if it was accepted.
+        
+        Args:
+            ruc: Issuer RUC
+            tipo: Document type
+            serie: Serie
+            correlativo: Correlativo
+            cdr_zip: CDR ZIP returned by sendBill
+            cdr_xml: CDR XML, read from cdr_zip if None
+            
+        Returns:
+            True if recorded, False if there is no CDR or it is a rejection
+        """
+        if not cdr_zip:
+            return False
+        
+        code = get_response_code(cdr_xml or read_cdr(cdr_zip))
+        if not is_accepted_code(code):
+            return False
+        
+        self.store.save(ruc, tipo, serie, correlativo, None, None, cdr_zip, response_code=code)
+        with self._lock:
+            self._bloom.add(self._key(ruc, tipo, serie, correlativo))
+            self._stats['recorded'] += 1
+        return True
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get registry counters.
+        
+        Returns:
+            Dictionary with lookups, hits, false_positives and recorded
+        """
+        with self._lock:
+            return dict(self._stats)
+    
+    def close(self) -> None:
+        """Close the underlying store."""
+        self.store.close()
+    
+    @staticmethod
+    def _key(ruc: str, tipo: str, serie: str, correlativo: Union[str, int]) -> str:
+        """Bloom filter key, with the correlativo normalized like CdrStore."""
+        return f"{ruc}-{tipo}-{serie}-{int(correlativo)}"
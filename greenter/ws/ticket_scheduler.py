@@ -0,0 +1,441 @@
+"""
+Ticket polling scheduler for getStatus.
+Tracks the tickets returned by sendSummary/sendPack and polls them with
+adaptive backoff until SUNAT finishes processing them.
+"""
+
+from typing import Optional, Dict, Any, List, Callable, AsyncIterator
+import asyncio
+import inspect
+import json
+import random
+import sqlite3
+import threading
+import time
+import logging
+
+from .retry import RetryPolicy
+
+
+logger = logging.getLogger(__name__)
+
+
+# getStatus statusCode while SUNAT is still processing the ticket
+PENDING_STATUS_CODES = frozenset({'98'})
+
+# About two hours of polling with the default delays
+DEFAULT_MAX_ATTEMPTS = 60
+
+
+class TicketResult:
+    """
+    Final status of a polled ticket.
+    """
+    
+    def __init__(self, ticket: str, status_code: Optional[str] = None,
+                 cdr_zip: Optional[bytes] = None, cdr_response: Optional[str] = None,
+                 error: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
+                 attempts: int = 0):
+        """
+        Initialize ticket result.
+        
+        Args:
+            ticket: Ticket ID
+            status_code: getStatus statusCode ('0' accepted, '99' processed with errors)
+            cdr_zip: CDR ZIP bytes
+            cdr_response: CDR XML
+            error: Error message if the ticket could not be resolved
+            metadata: Data given when the ticket was added
+            attempts: Number of polls made
+        """
+        self._ticket = ticket
+        self._status_code = status_code
+        self._cdr_zip = cdr_zip
+        self._cdr_response = cdr_response
+        self._error = error
+        self._metadata = metadata or {}
+        self._attempts = attempts
+    
+    @property
+    def ticket(self) -> str:
+        """Ticket ID."""
+        return self._ticket
+    
+    @property
+    def status_code(self) -> Optional[str]:
+        """getStatus status code."""
+        return self._status_code
+    
+    @property
+    def cdr_zip(self) -> Optional[bytes]:
+        """CDR ZIP bytes."""
+        return self._cdr_zip
+    
+    @property
+    def cdr_response(self) -> Optional[str]:
+        """CDR XML."""
+        return self._cdr_response
+    
+    @property
+    def error(self) -> Optional[str]:
+        """Error message."""
+        return self._error
+    
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Data given when the ticket was added."""
+        return self._metadata
+    
+    @property
+    def attempts(self) -> int:
+        """Number of polls made."""
+        return self._attempts
+    
+    def is_success(self) -> bool:
+        """Check if SUNAT accepted the ticket documents."""
+        return self._status_code == '0'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert result to dictionary."""
+        return {
+            'ticket': self._ticket,
+            'success': self.is_success(),
+            'status_code': self._status_code,
+            'cdr_response': self._cdr_response,
+            'error': self._error,
+            'metadata': self._metadata,
+            'attempts': self._attempts,
+        }
+    
+    def __str__(self):
+        return f"TicketResult(ticket={self._ticket}, status={self._status_code}, error={self._error})"
+
+
+class _PendingTicket:
+    """Polling state of one ticket."""
+    
+    def __init__(self, ticket: str, metadata: Dict[str, Any], delay: float, next_poll: float, attempts: int = 0):
+        self.ticket = ticket
+        self.metadata = metadata
+        self.delay = delay
+        self.next_poll = next_poll
+        self.attempts = attempts
+        self.callbacks: List[Callable] = []
+
+
+class TicketScheduler:
+    """
+    Polls many SUNAT tickets until they are processed.
+    
+    Each ticket is polled on its own schedule: first after initial_delay,
+    then with the delay multiplied by backoff (plus jitter) while SUNAT
+    reports it in process. A getStatus fault that is not transient (e.g.
+    0127, the ticket does not exist) resolves the ticket with an error, as
+    does running out of attempts. A ticket is never polled twice at once and
+    adding a tracked ticket again does not duplicate it. Results are
+    delivered to callbacks and to results() iterators. With store_path,
+    pending tickets are kept in sqlite and resumed after a restart.
+    """
+    
+    def __init__(self, soap_client, store_path: Optional[str] = None,
+                 initial_delay: float = 2.0, backoff: float = 2.0, max_delay: float = 120.0,
+                 max_attempts: Optional[int] = DEFAULT_MAX_ATTEMPTS, max_concurrency: int = 10,
+                 retry_policy: Optional[RetryPolicy] = None):
+        """
+        Initialize ticket scheduler.
+        
+        Args:
+            soap_client: SoapClient or AsyncSoapClient used to call getStatus
+            store_path: sqlite database keeping pending tickets, None for memory only
+            initial_delay: Seconds before the first poll of a ticket
+            backoff: Factor applied to the delay after each in-process answer
+            max_delay: Upper bound for the delay between polls
+            max_attempts: Polls before giving up on a ticket, None to poll until resolved
+            max_concurrency: Polls in flight at once
+            retry_policy: Classifies transient faults, defaults to RetryPolicy()
+        """
+        self.soap_client = soap_client
+        self.store_path = store_path
+        self.initial_delay = initial_delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy or RetryPolicy()
+        self._tickets: Dict[str, _PendingTicket] = {}
+        self._in_flight: set = set()
+        self._callbacks: List[Callable] = []
+        self._queues: List[asyncio.Queue] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+        self._db: Optional[sqlite3.Connection] = None
+        
+        if store_path:
+            self._open_store()
+    
+    @property
+    def pending(self) -> List[str]:
+        """Tickets still being polled."""
+        with self._lock:
+            return list(self._tickets)
+    
+    def add(self, ticket: str, metadata: Optional[Dict[str, Any]] = None,
+            callback: Optional[Callable] = None) -> bool:
+        """
+        Track a ticket.
+        
+        Args:
+            ticket: Ticket ID from sendSummary or sendPack
+            metadata: JSON-serializable data returned with the result
+            callback: Called with the TicketResult of this ticket (may be async)
+            
+        Returns:
+            True if the ticket was added, False if it was already tracked
+        """
+        with self._lock:
+            entry = self._tickets.get(ticket)
+            added = entry is None
+            if added:
+                entry = _PendingTicket(ticket, metadata or {}, self.initial_delay, time.time() + self.initial_delay)
+                self._tickets[ticket] = entry
+            if callback is not None:
+                entry.callbacks.append(callback)
+        
+        if added:
+            self._save(entry)
+            self._wake()
+        return added
+    
+    def on_result(self, callback: Callable) -> None:
+        """
+        Register a callback for every ticket result.
+        
+        Args:
+            callback: Called with each TicketResult (may be async)
+        """
+        self._callbacks.append(callback)
+    
+    async def results(self) -> AsyncIterator[TicketResult]:
+        """
+        Iterate over results as tickets are resolved.
+        
+        The iteration ends when the scheduler stops.
+        
+        Yields:
+            TicketResult
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                result = await queue.get()
+                if result is None:
+                    return
+                yield result
+        finally:
+            self._queues.remove(queue)
+    
+    async def run(self, stop_when_idle: bool = False) -> None:
+        """
+        Poll tickets until stopped.
+        
+        Args:
+            stop_when_idle: Return once no ticket is pending
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._running = True
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        tasks: set = set()
+        
+        try:
+            while self._running:
+                self._wakeup.clear()
+                now = time.time()
+                
+                with self._lock:
+                    idle = not self._tickets
+                    waiting = [entry for entry in self._tickets.values() if entry.ticket not in self._in_flight]
+                    due = [entry for entry in waiting if entry.next_poll <= now]
+                    for entry in due:
+                        self._in_flight.add(entry.ticket)
+                
+                if idle and stop_when_idle:
+                    break
+                
+                for entry in due:
+                    task = asyncio.ensure_future(self._poll(entry, semaphore))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                
+                upcoming = [entry.next_poll - now for entry in waiting if entry.next_poll > now]
+                timeout = max(0.0, min(upcoming)) if upcoming else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        
+        finally:
+            self._running = False
+            for task in list(tasks):
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            for queue in self._queues:
+                queue.put_nowait(None)
+            self._loop = None
+    
+    def stop(self) -> None:
+        """Stop run(); pending tickets are kept (and persisted, if a store is set)."""
+        self._running = False
+        self._wake()
+    
+    def close(self) -> None:
+        """Close the ticket store."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get scheduler state.
+        
+        Returns:
+            Dictionary with pending, in_flight and next_poll_in seconds
+        """
+        with self._lock:
+            next_poll = min((entry.next_poll for entry in self._tickets.values()), default=None)
+            return {
+                'pending': len(self._tickets),
+                'in_flight': len(self._in_flight),
+                'next_poll_in': max(0.0, next_poll - time.time()) if next_poll is not None else None,
+            }
+    
+    async def _poll(self, entry: _PendingTicket, semaphore: asyncio.Semaphore) -> None:
+        """Poll one ticket and resolve or reschedule it."""
+        try:
+            try:
+                async with semaphore:
+                    status = await self._get_status(entry.ticket)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Still an attempt, so max_attempts also bounds a status call that keeps failing
+                logger.error("Error polling ticket %s: %s", entry.ticket, e)
+                status = {'success': False, 'error': f"Error polling ticket: {e}"}
+            entry.attempts += 1
+            
+            status_code = status.get('status_code') if status else None
+            if status and status.get('success') and status_code not in PENDING_STATUS_CODES:
+                await self._complete(entry, TicketResult(
+                    entry.ticket, status_code=status_code,
+                    cdr_zip=status.get('content'), cdr_response=status.get('cdr_response'),
+                    metadata=entry.metadata, attempts=entry.attempts
+                ))
+            elif status and not status.get('success') and not self._is_transient(status):
+                logger.warning("Ticket %s failed: %s", entry.ticket, status.get('error'))
+                await self._complete(entry, TicketResult(
+                    entry.ticket, error=status.get('error') or f"getStatus fault {status.get('code')}",
+                    metadata=entry.metadata, attempts=entry.attempts
+                ))
+            elif self.max_attempts is not None and entry.attempts >= self.max_attempts:
+                error = (status or {}).get('error') or f"Ticket still in process after {entry.attempts} polls"
+                await self._complete(entry, TicketResult(
+                    entry.ticket, status_code=status_code, error=error,
+                    metadata=entry.metadata, attempts=entry.attempts
+                ))
+            else:
+                self._reschedule(entry)
+        
+        except asyncio.CancelledError:
+            raise
+        
+        except Exception as e:
+            logger.error(f"Error polling ticket {entry.ticket}: {e}")
+            self._reschedule(entry)
+        
+        finally:
+            with self._lock:
+                self._in_flight.discard(entry.ticket)
+            self._wake()
+    
+    async def _get_status(self, ticket: str) -> Optional[Dict[str, Any]]:
+        """Call getStatus with an async client, or a sync one in a worker thread."""
+        get_status_async = getattr(self.soap_client, 'get_status_async', None)
+        if get_status_async is not None:
+            return await get_status_async(ticket)
+        return await asyncio.get_running_loop().run_in_executor(None, self.soap_client.get_status, ticket)
+    
+    def _is_transient(self, status: Dict[str, Any]) -> bool:
+        """Check whether a failed getStatus may succeed later."""
+        # No SUNAT code: the request did not reach SUNAT (connection error, timeout, open circuit)
+        return status.get('code') is None or self.retry_policy.is_retryable_result(status)
+    
+    def _reschedule(self, entry: _PendingTicket) -> None:
+        """Schedule the next poll of a ticket with backoff and jitter."""
+        entry.next_poll = time.time() + entry.delay * random.uniform(0.9, 1.1)
+        entry.delay = min(self.max_delay, entry.delay * self.backoff)
+        self._save(entry)
+    
+    async def _complete(self, entry: _PendingTicket, result: TicketResult) -> None:
+        """Stop tracking a ticket and deliver its result."""
+        with self._lock:
+            self._tickets.pop(entry.ticket, None)
+        self._delete(entry.ticket)
+        
+        for callback in entry.callbacks + self._callbacks:
+            try:
+                value = callback(result)
+                if inspect.isawaitable(value):
+                    await value
+            except Exception as e:
+                logger.error(f"Error in ticket callback for {entry.ticket}: {e}")
+        
+        for queue in self._queues:
+            queue.put_nowait(result)
+    
+    def _wake(self) -> None:
+        """Wake run() to re-evaluate the schedule, from any thread."""
+        loop = self._loop
+        if loop is not None and self._wakeup is not None:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Loop already closed
+                pass
+    
+    def _open_store(self) -> None:
+        """Open the ticket store and resume its pending tickets."""
+        self._db = sqlite3.connect(self.store_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending_tickets ("
+            "ticket TEXT PRIMARY KEY, metadata TEXT, delay REAL, next_poll REAL, attempts INTEGER)"
+        )
+        self._db.commit()
+        
+        rows = self._db.execute("SELECT ticket, metadata, delay, next_poll, attempts FROM pending_tickets").fetchall()
+        for ticket, metadata, delay, next_poll, attempts in rows:
+            self._tickets[ticket] = _PendingTicket(ticket, json.loads(metadata), delay, next_poll, attempts)
+        if rows:
+            logger.info(f"Resumed {len(rows)} pending tickets from {self.store_path}")
+    
+    def _save(self, entry: _PendingTicket) -> None:
+        """Persist a pending ticket."""
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pending_tickets VALUES (?, ?, ?, ?, ?)",
+                (entry.ticket, json.dumps(entry.metadata), entry.delay, entry.next_poll, entry.attempts)
+            )
+            self._db.commit()
+    
+    def _delete(self, ticket: str) -> None:
+        """Remove a resolved ticket from the store."""
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute("DELETE FROM pending_tickets WHERE ticket = ?", (ticket,))
+            self._db.commit()
@@ -0,0 +1,53 @@
+"""
+Bundled SUNAT WSDL documents.
+Parsed once per process and shared by every SoapClient, so building a
+client needs no network access.
+"""
+
+from typing import Dict
+import os
+import threading
+import logging
+
+from zeep.wsdl import Document
+from zeep.transports import Transport
+
+
+logger = logging.getLogger(__name__)
+
+
+WSDL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'wsdl')
+
+# billService: sendBill, sendSummary, sendPack and getStatus
+BILL_SERVICE_WSDL = os.path.join(WSDL_DIR, 'billService.wsdl')
+BILL_SERVICE_BINDING = '{http://service.gem.factura.comppago.registro.servicio.sunat.gob.pe/}BillServicePortBinding'
+
+# billConsultService: getStatus and getStatusCdr by document number
+BILL_CONSULT_SERVICE_WSDL = os.path.join(WSDL_DIR, 'billConsultService.wsdl')
+BILL_CONSULT_SERVICE_BINDING = (
+    '{http://service.ws.consulta.comppago.electronico.registro.servicio2.sunat.gob.pe/}'
+    'BillConsultServicePortBinding'
+)
+
+_documents: Dict[str, Document] = {}
+_lock = threading.Lock()
+
+
+def get_wsdl_document(path: str = BILL_SERVICE_WSDL) -> Document:
+    """
+    Get a parsed WSDL document, loading it on first use.
+    
+    Args:
+        path: Path of the WSDL file
+        
+    Returns:
+        zeep WSDL Document shared across clients
+    """
+    with _lock:
+        document = _documents.get(path)
+        if document is None:
+            # Imports and schemas are resolved relative to the bundled file
+            document = Document(path, Transport())
+            _documents[path] = document
+            logger.debug(f"WSDL loaded: {path}")
+    return document
@@ -0,0 +1,102 @@
+"""
+ZIP payloads for SUNAT uploads and replies.
+SUNAT expects contentFile to be a ZIP holding one {filename}.xml entry;
+the SOAP transport base64-encodes those bytes once on the wire. CDRs
+come back the same way, as a ZIP holding R-{filename}.xml.
+"""
+
+from typing import Optional, Tuple, Union, Iterable
+import io
+import time
+import zipfile
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class ZipPayloadBuilder:
+    """
+    Builds the ZIP sent as contentFile.
+    
+    The entry is written straight into an in-memory buffer and its bytes
+    are returned without a further copy (BytesIO.getvalue() hands over
+    the buffer storage). The result is raw ZIP bytes: callers must not
+    base64-encode it, the transport does.
+    """
+    
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED, compresslevel: Optional[int] = None):
+        """
+        Initialize payload builder.
+        
+        Args:
+            compression: zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED
+            compresslevel: zlib level 0-9 for deflate, None for the zlib default
+        """
+        self.compression = compression
+        self.compresslevel = compresslevel
+    
+    def build(self, filename: str, xml_content: Union[str, bytes],
+              date_time: Optional[Tuple[int, int, int, int, int, int]] = None) -> bytes:
+        """
+        Build the ZIP of a document.
+        
+        Args:
+            filename: Document filename without extension
+            xml_content: XML content
+            date_time: Entry timestamp, defaults to now
+            
+        Returns:
+            ZIP bytes
+        """
+        return self.build_pack([(filename, xml_content)], date_time)
+    
+    def build_pack(self, documents: Iterable[Tuple[str, Union[str, bytes]]],
+                   date_time: Optional[Tuple[int, int, int, int, int, int]] = None) -> bytes:
+        """
+        Build a ZIP holding several documents, as sendPack expects.
+        
+        Entries are compressed into the buffer as the iterable yields them,
+        so a generator never needs all documents in memory at once.
+        
+        Args:
+            documents: (filename without extension, XML content) pairs
+            date_time: Entry timestamp, defaults to now
+            
+        Returns:
+            ZIP bytes
+        """
+        date_time = date_time or time.localtime(time.time())[:6]
+        
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zip_file:
+            for filename, xml_content in documents:
+                data = xml_content.encode('utf-8') if isinstance(xml_content, str) else xml_content
+                
+                info = zipfile.ZipInfo(f"{filename}.xml", date_time)
+                info.external_attr = 0o600 << 16  # same permissions as ZipFile.writestr
+                zip_file.writestr(info, data, compress_type=self.compression, compresslevel=self.compresslevel)
+        return buffer.getvalue()
+
+
+def read_cdr(cdr_zip: bytes) -> Optional[str]:
+    """
+    Extract the CDR XML from its ZIP.
+    
+    Args:
+        cdr_zip: ZIP bytes returned by SUNAT
+        
+    Returns:
+        CDR XML string or None if error
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(cdr_zip)) as zip_file:
+            for name in zip_file.namelist():
+                if name.lower().endswith('.xml'):
+                    return zip_file.read(name).decode('utf-8')
+    except (zipfile.BadZipFile, UnicodeDecodeError) as e:
+        logger.error("Error reading CDR zip: %s", e)
+    return None
+
+
+default_builder = ZipPayloadBuilder()
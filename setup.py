@@ -7,6 +7,9 @@ setup(
     author="Migrated from PHP Greenter",
     author_email="",
     packages=find_packages(),
+    package_data={
+        "greenter.ws": ["resources/wsdl/*.wsdl", "resources/wsdl/*.xsd"],
+    },
     python_requires=">=3.8",
     install_requires=[
         # XML Processing
@@ -38,7 +41,15 @@ setup(
         # Timezone support
         "pytz>=2021.1",
     ],
+    entry_points={
+        "console_scripts": [
+            "greenter-signing-agent=greenter.signer.signing_agent:main",
+        ],
+    },
     extras_require={
+        "async": [
+            "httpx>=0.15.0",
+        ],
         "dev": [
             "pytest>=6.0.0",
             "pytest-cov>=2.12.0",
@@ -0,0 +1,107 @@
+"""
+Fixtures compartidos para los tests de Greenter Python.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Agregar el directorio del proyecto al path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+INVOICE_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2"
+         xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+         xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"
+         xmlns:ext="urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2">
+    <ext:UBLExtensions>
+        <ext:UBLExtension>
+            <ext:ExtensionContent>
+                <!-- Digital signature will be added here -->
+            </ext:ExtensionContent>
+        </ext:UBLExtension>
+    </ext:UBLExtensions>
+    <cbc:UBLVersionID>2.1</cbc:UBLVersionID>
+    <cbc:CustomizationID>2.0</cbc:CustomizationID>
+    <cbc:ID>F001-00000001</cbc:ID>
+    <cbc:IssueDate>2024-01-15</cbc:IssueDate>
+    <cbc:InvoiceTypeCode listID="0101">01</cbc:InvoiceTypeCode>
+    <cbc:DocumentCurrencyCode>PEN</cbc:DocumentCurrencyCode>
+    <cac:AccountingSupplierParty>
+        <cac:Party>
+            <cac:PartyName>
+                <cbc:Name><![CDATA[EMPRESA DE PRUEBA S.A.C.]]></cbc:Name>
+            </cac:PartyName>
+        </cac:Party>
+    </cac:AccountingSupplierParty>
+    <cac:LegalMonetaryTotal>
+        <cbc:PayableAmount currencyID="PEN">118.00</cbc:PayableAmount>
+    </cac:LegalMonetaryTotal>
+</Invoice>
+'''
+
+
+def create_pkcs12(path, password="123456", days=365, key_size=2048, common_name="Certificado de Prueba Greenter"):
+    """Crear un certificado PKCS#12 autofirmado para pruebas."""
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.utcnow()
+    
+    certificate = x509.CertificateBuilder().subject_name(
+        name
+    ).issuer_name(
+        name
+    ).public_key(
+        private_key.public_key()
+    ).serial_number(
+        x509.random_serial_number()
+    ).not_valid_before(
+        now - timedelta(days=1)
+    ).not_valid_after(
+        now + timedelta(days=days)
+    ).sign(private_key, hashes.SHA256())
+    
+    data = pkcs12.serialize_key_and_certificates(
+        b"greenter", private_key, certificate, None,
+        serialization.BestAvailableEncryption(password.encode("utf-8"))
+    )
+    
+    with open(path, "wb") as f:
+        f.write(data)
+    
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def pkcs12_certificate(tmp_path_factory):
+    """Ruta y contraseña de un certificado de prueba."""
+    path = tmp_path_factory.mktemp("certificates") / "certificado_prueba.pfx"
+    return create_pkcs12(path), "123456"
+
+
+@pytest.fixture(scope="session")
+def certificate_fingerprint(pkcs12_certificate):
+    """Huella SHA-256 del certificado de prueba, para XmlVerifier."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    from greenter.signer.xml_verifier import get_certificate_fingerprint
+    
+    path, password = pkcs12_certificate
+    with open(path, "rb") as f:
+        certificate = pkcs12.load_key_and_certificates(f.read(), password.encode("utf-8"))[1]
+    return get_certificate_fingerprint(certificate.public_bytes(serialization.Encoding.DER))
+
+
+@pytest.fixture
+def invoice_xml():
+    """XML de factura sin firmar con placeholder de firma."""
+    return INVOICE_XML
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests de la API de firma asíncrona.
+"""
+
+import asyncio
+import gc
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from greenter.see import See
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.xml_verifier import XmlVerifier
+
+
+class SlowSigner(CryptoXmlSigner):
+    """Firmador que registra la concurrencia máxima alcanzada."""
+    
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def sign(self, xml_content, credential=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            return super().sign(xml_content, credential)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_sign_async_matches_sync(pkcs12_certificate, certificate_fingerprint, invoice_xml):
+    """La firma asíncrona produce el mismo XML que la síncrona."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    signed = asyncio.run(signer.sign_async(invoice_xml))
+    assert signed == signer.sign(invoice_xml)
+    
+    result = asyncio.run(signer.sign_with_result_async(invoice_xml))
+    assert XmlVerifier(trusted_fingerprints=[certificate_fingerprint]).verify(result.xml_bytes).is_valid()
+
+
+def test_bounded_concurrency_and_queue_depth(pkcs12_certificate, invoice_xml):
+    """No se superan max_concurrency firmas simultáneas y se expone la cola."""
+    signer = SlowSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    signer.set_executor(max_concurrency=2, max_workers=4)
+    
+    async def main():
+        tasks = [asyncio.create_task(signer.sign_async(invoice_xml)) for _ in range(6)]
+        await asyncio.sleep(0.01)
+        depth = signer.queue_depth
+        results = await asyncio.gather(*tasks)
+        return depth, results
+    
+    depth, results = asyncio.run(main())
+    
+    assert depth == 6
+    assert signer.peak == 2
+    assert signer.queue_depth == 0
+    assert all(results)
+
+
+def test_cancellation(pkcs12_certificate, invoice_xml):
+    """Cancelar una firma en espera la descarta sin bloquear la cola."""
+    signer = SlowSigner(delay=0.1)
+    signer.set_certificate(*pkcs12_certificate)
+    signer.set_executor(max_concurrency=1)
+    
+    async def main():
+        first = asyncio.create_task(signer.sign_async(invoice_xml))
+        second = asyncio.create_task(signer.sign_async(invoice_xml))
+        await asyncio.sleep(0.01)
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        return await first
+    
+    assert asyncio.run(main())
+    assert signer._executor.stats()['cancelled'] == 1
+    assert signer.queue_depth == 0
+
+
+def test_process_executor(pkcs12_certificate, certificate_fingerprint, invoice_xml):
+    """La firma puede delegarse a un pool de procesos."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    signer.set_executor(use_processes=True, max_workers=1)
+    
+    async def main():
+        return await asyncio.gather(*(signer.sign_with_result_async(invoice_xml) for _ in range(3)))
+    
+    try:
+        results = asyncio.run(main())
+    finally:
+        signer._executor.shutdown()
+    
+    verifier = XmlVerifier(trusted_fingerprints=[certificate_fingerprint])
+    assert all(verifier.verify(result.xml_bytes).is_valid() for result in results)
+
+
+def test_see_get_xml_signed_async(pkcs12_certificate):
+    """See firma documentos desde código asíncrono."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    
+    invoices = [
+        Invoice(
+            serie="F001", correlativo=f"{n:08d}", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+        )
+        for n in range(1, 4)
+    ]
+    
+    async def main():
+        return await asyncio.gather(*(see.get_xml_signed_async(invoice) for invoice in invoices))
+    
+    signed = asyncio.run(main())
+    for n, xml in enumerate(signed, start=1):
+        assert f"F001-{n:08d}" in xml
+
+
+def test_see_async_builds_off_event_loop(pkcs12_certificate):
+    """La construcción del XML y la carga del certificado no corren en el event loop."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    from greenter.signer.certificate_store import CertificateStore
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    store = CertificateStore()
+    store.add("20000000001", *pkcs12_certificate)
+    see.set_certificate_store(store)
+    
+    threads = []
+    build = see.xml_builder.build
+    get = store.get
+    see.xml_builder.build = lambda document: threads.append(threading.current_thread()) or build(document)
+    store.get = lambda ruc: threads.append(threading.current_thread()) or get(ruc)
+    
+    invoice = Invoice(
+        serie="F001", correlativo="00000001", fecha_emision=datetime(2024, 1, 15),
+        company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+    )
+    
+    async def main():
+        return threading.current_thread(), await see.get_xml_signed_result_async(invoice)
+    
+    loop_thread, result = asyncio.run(main())
+    assert result is not None
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+@pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")
+def test_xmlsec_signs_from_many_threads(pkcs12_certificate, invoice_xml):
+    """El backend xmlsec firma en paralelo desde varios hilos con el mismo resultado."""
+    signer = XmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    expected = signer.sign(invoice_xml)
+    
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        signed = list(executor.map(lambda _: signer.sign(invoice_xml), range(64)))
+    
+    assert signed == [expected] * 64
+
+
+def test_signer_keeps_caller_files(pkcs12_certificate):
+    """El firmante solo borra los PEM temporales que él mismo creó."""
+    path, password = pkcs12_certificate
+    directory = tempfile.mkdtemp()
+    try:
+        pfx_path = shutil.copy(path, os.path.join(directory, 'cert.pfx'))
+        
+        # Contraseña incorrecta: certificate_path queda apuntando al .pfx
+        signer = XmlSigner()
+        signer.set_certificate(pfx_path, 'incorrecta')
+        assert signer.certificate_path == pfx_path
+        del signer
+        gc.collect()
+        assert os.path.exists(pfx_path)
+        
+        signer = XmlSigner()
+        signer.set_certificate(pfx_path, password)
+        temp_pem = signer.certificate_path
+        assert temp_pem != pfx_path
+        del signer
+        gc.collect()
+        assert not os.path.exists(temp_pem)
+        assert os.path.exists(pfx_path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
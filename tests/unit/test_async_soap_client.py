@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests del cliente SOAP asíncrono (transporte simulado, sin red).
+"""
+
+import asyncio
+import base64
+import io
+import zipfile
+from datetime import datetime
+
+import httpx
+import pytest
+
+from greenter.see import See
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.ws.async_soap_client import AsyncSoapClient, ConcurrencyLimit
+from greenter.ws.soap_client import SunatEndpoints
+
+
+CDR_XML = "<ApplicationResponse><cbc:ResponseCode>0</cbc:ResponseCode></ApplicationResponse>"
+
+
+def soap_response(operation, body):
+    """Respuesta SOAP de billService."""
+    return httpx.Response(200, headers={"Content-Type": "text/xml"}, content=(
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+        f'<br:{operation}Response xmlns:br="http://service.sunat.gob.pe">{body}</br:{operation}Response>'
+        '</soap:Body></soap:Envelope>'
+    ).encode())
+
+
+def cdr_zip():
+    """CDR comprimido como lo devuelve SUNAT."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("R-20000000001-01-F001-00000001.xml", CDR_XML)
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+class MockBillService:
+    """billService simulado que registra la concurrencia máxima."""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.peak = 0
+    
+    async def __call__(self, request):
+        self.requests.append(request)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        
+        body = request.content.decode()
+        if "sendSummary" in body:
+            return soap_response("sendSummary", "<ticket>1700000000001</ticket>")
+        if "getStatus" in body:
+            return soap_response("getStatus", f"<status><content>{cdr_zip()}</content><statusCode>0</statusCode></status>")
+        return soap_response("sendBill", f"<applicationResponse>{cdr_zip()}</applicationResponse>")
+
+
+def create_client(service, **kwargs):
+    client = AsyncSoapClient(http_transport=httpx.MockTransport(service), **kwargs)
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    return client
+
+
+def test_send_returns_cdr():
+    """sendBill devuelve el CDR extraído del zip."""
+    service = MockBillService()
+    client = create_client(service)
+    
+    result = asyncio.run(client.send_async("20000000001-01-F001-00000001", "<Invoice/>"))
+    
+    assert result["success"]
+    assert result["cdr_response"] == CDR_XML
+    request = service.requests[0]
+    assert str(request.url) == SunatEndpoints.FE_BETA
+    assert b"20000000001MODDATOS" in request.content
+    assert b"<fileName>20000000001-01-F001-00000001.zip</fileName>" in request.content
+
+
+def test_concurrency_limit():
+    """No hay más llamadas en curso que las permitidas por el límite."""
+    service = MockBillService(delay=0.05)
+    limit = ConcurrencyLimit(2)
+    client = create_client(service, limit=limit)
+    
+    async def main():
+        return await asyncio.gather(*(client.send_async(f"DOC-{n}", "<Invoice/>") for n in range(6)))
+    
+    results = asyncio.run(main())
+    
+    assert all(result["success"] for result in results)
+    assert service.peak == 2
+    assert limit.in_flight == 0
+
+
+def test_timeout():
+    """Una llamada que excede su timeout se cancela y devuelve error."""
+    service = MockBillService(delay=1)
+    client = create_client(service)
+    
+    result = asyncio.run(client.send_async("DOC", "<Invoice/>", timeout=0.05))
+    
+    assert not result["success"]
+    assert "Timeout" in result["error"]
+    
+    # sendSummary y getStatus responden igual que sendBill
+    summary = asyncio.run(client.send_summary_async("DOC", "<SummaryDocuments/>", timeout=0.05))
+    status = asyncio.run(client.get_status_async("1700000000001", timeout=0.05))
+    assert summary == status == result
+
+
+def test_blocking_operations_rejected():
+    """Las operaciones síncronas heredadas no se pueden usar por error."""
+    client = create_client(MockBillService())
+    
+    for call in (lambda: client.send("DOC", "<Invoice/>"),
+                 lambda: client.send_summary("DOC", "<SummaryDocuments/>"),
+                 lambda: client.send_pack("DOC", []),
+                 lambda: client.get_status("1700000000001")):
+        with pytest.raises(TypeError):
+            call()
+
+
+def test_http_client_closed_on_loop_change():
+    """Al cambiar de event loop se cierra el cliente httpx anterior."""
+    client = create_client(MockBillService())
+    
+    asyncio.run(client.send_async("DOC-1", "<Invoice/>"))
+    first = client.client.transport.client
+    asyncio.run(client.send_async("DOC-2", "<Invoice/>"))
+    
+    assert first.is_closed
+    assert client.client.transport.client is not first
+
+
+def test_summary_and_status_across_loops():
+    """El mismo cliente funciona en distintos event loops."""
+    client = create_client(MockBillService())
+    
+    summary = asyncio.run(client.send_summary_async("20000000001-RC-20240115-1", "<SummaryDocuments/>"))
+    assert summary == {"success": True, "ticket": "1700000000001", "error": None}
+    
+    status = asyncio.run(client.get_status_async(summary["ticket"]))
+    assert status["success"]
+    assert status["status_code"] == "0"
+
+
+def test_see_send_async(pkcs12_certificate):
+    """See envía documentos firmados de forma asíncrona."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    service = MockBillService(delay=0.01)
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.async_soap_client = AsyncSoapClient(http_transport=httpx.MockTransport(service))
+    see.set_credentials("20000000001", "MODDATOS", "moddatos")
+    
+    invoices = [
+        Invoice(
+            serie="F001", correlativo=f"{n:08d}", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+        )
+        for n in range(1, 4)
+    ]
+    
+    async def main():
+        return await asyncio.gather(*(see.send_async(invoice) for invoice in invoices))
+    
+    responses = asyncio.run(main())
+    
+    assert all(response.success for response in responses)
+    assert responses[0].cdr_response == CDR_XML
+    assert len(service.requests) == 3
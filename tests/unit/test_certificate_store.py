@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests del almacén de certificados multi-RUC.
+"""
+
+import pickle
+from datetime import datetime
+
+import pytest
+
+from conftest import create_pkcs12
+from greenter.see import See
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.xml_verifier import XmlVerifier
+from greenter.signer.certificate_store import CertificateStore, SigningCredential
+
+
+@pytest.fixture(scope="module")
+def tenant_certificates(tmp_path_factory):
+    """Un certificado distinto por RUC."""
+    directory = tmp_path_factory.mktemp("tenants")
+    return {
+        ruc: create_pkcs12(directory / f"{ruc}.pfx", common_name=ruc)
+        for ruc in ("20000000001", "20000000002", "20000000003")
+    }
+
+
+def test_lazy_load_and_lru_eviction(tenant_certificates):
+    """Los certificados se descifran al usarlos y la caché está acotada."""
+    store = CertificateStore(max_keys=2)
+    for ruc, path in tenant_certificates.items():
+        store.add(ruc, path, "123456")
+    
+    assert store.stats()['loaded'] == 0
+    
+    first = store.get("20000000001")
+    assert store.get("20000000001") is first
+    store.get("20000000002")
+    store.get("20000000003")
+    
+    stats = store.stats()
+    assert stats['loaded'] == 2
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 1
+    assert store.get("20000000001") is not first
+
+
+def test_invalid_password_and_unknown_ruc(tenant_certificates):
+    """Contraseña incorrecta o RUC no registrado devuelven None."""
+    store = CertificateStore()
+    store.add("20000000001", tenant_certificates["20000000001"], "incorrecta")
+    
+    assert store.get("20000000001") is None
+    assert store.get("20999999999") is None
+
+
+def test_expired_certificate_is_rejected(tmp_path):
+    """Un certificado vencido no se entrega para firmar."""
+    store = CertificateStore()
+    store.add("20000000001", create_pkcs12(tmp_path / "vencido.pfx", days=-1), "123456")
+    
+    assert store.get("20000000001") is None
+
+
+def test_expired_certificate_is_not_decrypted_again(tmp_path, monkeypatch):
+    """El vencimiento se recuerda: no se vuelve a leer ni descifrar el PKCS#12."""
+    store = CertificateStore()
+    store.add("20000000001", create_pkcs12(tmp_path / "vencido.pfx", days=-1), "123456")
+    loads = []
+    original_load = store._load
+    monkeypatch.setattr(store, "_load", lambda ruc: loads.append(ruc) or original_load(ruc))
+    
+    for _ in range(3):
+        assert store.get("20000000001") is None
+    assert loads == ["20000000001"]
+    
+    # Registrar un certificado nuevo descarta el vencimiento recordado
+    store.add("20000000001", create_pkcs12(tmp_path / "nuevo.pfx"), "123456")
+    assert store.get("20000000001") is not None
+
+
+def test_load_locks_are_pruned(tenant_certificates):
+    """Los locks de carga no crecen con cada RUC consultado."""
+    store = CertificateStore()
+    store.add("20000000001", tenant_certificates["20000000001"], "123456")
+    
+    store.get("20000000001")
+    for n in range(100):
+        store.get(f"20{n:09d}")
+    
+    assert store._load_locks == {}
+
+
+def test_expiring_certificates(tmp_path):
+    """Se reportan los certificados próximos a vencer."""
+    store = CertificateStore(expiry_warning_days=30)
+    with open(create_pkcs12(tmp_path / "pronto.pfx", days=10), "rb") as f:
+        store.add("20000000001", f.read(), "123456")
+    
+    assert store.get("20000000001") is not None
+    assert store.expiring() == ["20000000001"]
+
+
+def test_credential_pickle_roundtrip(tenant_certificates):
+    """Las credenciales pueden enviarse a otros procesos."""
+    with open(tenant_certificates["20000000001"], "rb") as f:
+        credential = SigningCredential.from_pkcs12(f.read(), "123456")
+    
+    restored = pickle.loads(pickle.dumps(credential))
+    assert restored.fingerprint == credential.fingerprint
+
+
+@pytest.mark.parametrize("signer_class", [
+    CryptoXmlSigner,
+    pytest.param(XmlSigner, marks=pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")),
+])
+def test_see_signs_per_tenant(tenant_certificates, signer_class):
+    """Un mismo See firma con el certificado del RUC emisor."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    store = CertificateStore()
+    for ruc, path in tenant_certificates.items():
+        store.add(ruc, path, "123456")
+    
+    see = See()
+    see.set_signer(signer_class())
+    see.set_certificate_store(store)
+    verifier = XmlVerifier(trusted_fingerprints=[store.get(ruc).fingerprint for ruc in tenant_certificates])
+    
+    for ruc in ("20000000001", "20000000002", "20000000001"):
+        invoice = Invoice(
+            serie="F001", correlativo="00000001", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc=ruc, razon_social="EMPRESA", address=Address()),
+        )
+        result = see.get_xml_signed_result(invoice)
+        
+        assert result.certificate_serial == store.get(ruc).serial_number
+        verification = verifier.verify(result.xml_bytes)
+        assert verification.is_valid(), verification.error
+        assert verification.certificate_fingerprint == store.get(ruc).fingerprint
+
+
+def test_see_unknown_tenant_never_uses_default_certificate(tenant_certificates, pkcs12_certificate):
+    """Con almacén configurado, un RUC no registrado no se firma con el certificado por defecto."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    store = CertificateStore()
+    store.add("20000000001", tenant_certificates["20000000001"], "123456")
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.set_certificate_store(store)
+    
+    invoice = Invoice(
+        serie="F001", correlativo="00000001", fecha_emision=datetime(2024, 1, 15),
+        company=Company(ruc="20000000002", razon_social="EMPRESA", address=Address()),
+    )
+    assert see.get_xml_signed_result(invoice) is None
+    assert see.get_xml_signed(invoice) is None
+
+
+def test_see_unknown_tenant_without_default_certificate(tenant_certificates):
+    """Sin certificado para el RUC ni certificado por defecto no se firma."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    store = CertificateStore()
+    store.add("20000000001", tenant_certificates["20000000001"], "incorrecta")
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate_store(store)
+    
+    invoice = Invoice(
+        serie="F001", correlativo="00000001", fecha_emision=datetime(2024, 1, 15),
+        company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+    )
+    assert see.get_xml_signed_result(invoice) is None
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Tests del cliente de consulta de CDR (billConsultService).
+"""
+
+import base64
+import io
+import re
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from greenter.ws.cdr_store import CdrStore
+from greenter.ws.consult_cdr import ConsultCdrClient
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.rate_limit import RateLimiter
+
+
+def cdr_zip(number):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        # Fixed timestamp: the same CDR always gives the same bytes
+        info = zipfile.ZipInfo(f"R-20000000001-01-F001-{number}.xml", date_time=(2024, 1, 15, 0, 0, 0))
+        zip_file.writestr(info, f"<ApplicationResponse>{number}</ApplicationResponse>")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def consult_service():
+    """billConsultService local: CDR para números pares, sin CDR para impares, Fault para 13."""
+    state = {"active": 0, "peak": 0, "requests": 0}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            with lock:
+                state["requests"] += 1
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.01)
+            with lock:
+                state["active"] -= 1
+            
+            number = int(re.search(r"<numeroComprobante>(\d+)</numeroComprobante>", body).group(1))
+            status = 200
+            if number == 13:
+                status, content = 500, (
+                    '<soap-env:Fault><faultcode>soap-env:Client.0102</faultcode>'
+                    '<faultstring>Usuario o contraseña incorrectos</faultstring></soap-env:Fault>'
+                )
+            elif number % 2 == 0:
+                content = (
+                    '<br:getStatusCdrResponse xmlns:br="http://service.sunat.gob.pe"><statusCdr>'
+                    f'<content>{base64.b64encode(cdr_zip(number)).decode()}</content>'
+                    '<statusCode>0004</statusCode><statusMessage>La constancia existe</statusMessage>'
+                    '</statusCdr></br:getStatusCdrResponse>'
+                )
+            else:
+                content = (
+                    '<br:getStatusCdrResponse xmlns:br="http://service.sunat.gob.pe"><statusCdr>'
+                    '<statusCode>0127</statusCode><statusMessage>El comprobante no existe</statusMessage>'
+                    '</statusCdr></br:getStatusCdrResponse>'
+                )
+            payload = (
+                '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/">'
+                f'<soap-env:Body>{content}</soap-env:Body></soap-env:Envelope>'
+            ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/billConsultService", state
+    server.shutdown()
+    server.server_close()
+
+
+def create_client(url):
+    client = ConsultCdrClient()
+    client.set_session_pool(HttpSessionPool(pool_maxsize=20))
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_service(url)
+    return client
+
+
+def test_requires_service_url():
+    """Sin URL configurada no se consulta (producción no viene por defecto)."""
+    client = ConsultCdrClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert client.get_cdr_status("20000000001", "01", "F001", 1) is None
+
+
+def test_get_cdr_status(consult_service):
+    """getStatusCdr devuelve el código, el mensaje y el CDR."""
+    url, _ = consult_service
+    client = create_client(url)
+    
+    result = client.get_cdr_status("20000000001", "01", "F001", "00000002")
+    assert result["success"] and result["code"] == "0004"
+    assert result["message"] == "La constancia existe"
+    assert result["cdr_response"] == "<ApplicationResponse>2</ApplicationResponse>"
+    
+    result = client.get_cdr_status("20000000001", "01", "F001", 3)
+    assert result["success"] and result["code"] == "0127" and result["cdr_zip"] is None
+    
+    result = client.get_cdr_status("20000000001", "01", "F001", 13)
+    assert not result["success"] and result["code"] == "soap-env:Client.0102"
+
+
+def test_reconcile(consult_service):
+    """La conciliación masiva consulta en paralelo y guarda los resultados."""
+    url, state = consult_service
+    client = create_client(url)
+    store = CdrStore()
+    documents = [("20000000001", "01", "F001", n) for n in range(1, 41)]
+    
+    stats = client.reconcile(iter(documents), store, max_workers=8)
+    
+    assert stats == {'queried': 40, 'found': 20, 'missing': 19, 'errors': 1, 'skipped': 0}
+    assert 1 < state["peak"] <= 8
+    assert store.get("20000000001", "01", "F001", "00000004")["cdr_zip"] == cdr_zip(4)
+    assert store.get("20000000001", "01", "F001", 5)["status_code"] == "0127"
+    assert store.get("20000000001", "01", "F001", 5)["response_code"] is None
+    assert store.get("20000000001", "01", "F001", 13) is None
+    
+    # Los CDR ya guardados no se vuelven a pedir
+    state["requests"] = 0
+    stats = client.reconcile(documents, store, max_workers=8)
+    assert stats["skipped"] == 20 and state["requests"] == 20
+
+
+def test_reconcile_counts_exceptions(consult_service):
+    """Un error al guardar se cuenta como error y no detiene la conciliación."""
+    url, _ = consult_service
+    client = create_client(url)
+    
+    class FailingStore(CdrStore):
+        def save(self, ruc, tipo, serie, correlativo, *args, **kwargs):
+            if int(correlativo) == 2:
+                raise RuntimeError("disk full")
+            super().save(ruc, tipo, serie, correlativo, *args, **kwargs)
+    
+    stats = client.reconcile([("20000000001", "01", "F001", n) for n in range(1, 5)], FailingStore())
+    
+    assert stats == {'queried': 4, 'found': 1, 'missing': 2, 'errors': 1, 'skipped': 0}
+
+
+def test_billservice_operations_rejected():
+    """El cliente de consulta no expone las operaciones de billService."""
+    client = ConsultCdrClient()
+    
+    for call in (lambda: client.send("DOC", "<Invoice/>"),
+                 lambda: client.send_summary("DOC", "<SummaryDocuments/>"),
+                 lambda: client.send_pack("DOC", []),
+                 lambda: client.get_status("1700000000001")):
+        with pytest.raises(TypeError):
+            call()
+
+
+def test_reconcile_rate_limit(consult_service):
+    """El limitador de tasa espacia las consultas."""
+    url, _ = consult_service
+    client = create_client(url)
+    client.set_rate_limiter(RateLimiter(per_endpoint=50))
+    
+    start = time.monotonic()
+    stats = client.reconcile([("20000000001", "01", "F001", n) for n in range(2, 22, 2)], CdrStore(), max_workers=10)
+    
+    assert stats["found"] == 10
+    assert time.monotonic() - start >= 9 / 50
+
+
+def test_cdr_store_persistence(tmp_path):
+    """El almacén persiste y reemplaza el estado de cada documento."""
+    path = str(tmp_path / "cdr.db")
+    store = CdrStore(path)
+    store.save("20000000001", "03", "B001", "00000007", "0127", "El comprobante no existe")
+    store.save("20000000001", "03", "B001", 7, "0004", "La constancia existe", b"PK")
+    store.close()
+    
+    store = CdrStore(path)
+    assert store.count() == 1
+    assert store.has_cdr("20000000001", "03", "B001", "7")
+    assert store.get("20000000001", "03", "B001", 7)["message"] == "La constancia existe"
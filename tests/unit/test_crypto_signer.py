@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests del backend de firma sin libxmlsec1 (lxml + cryptography).
+"""
+
+import pytest
+
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE, WARMUP_XML
+from greenter.signer.xml_verifier import XmlVerifier
+from greenter.signer.crypto_signer import CryptoXmlSigner
+
+
+def _signer(cls, pkcs12_certificate, **kwargs):
+    path, password = pkcs12_certificate
+    signer = cls(**kwargs)
+    signer.set_certificate(path, password)
+    return signer
+
+
+def test_crypto_signer_produces_signature(pkcs12_certificate, invoice_xml):
+    """El backend puro firma el XML con la estructura esperada."""
+    signer = _signer(CryptoXmlSigner, pkcs12_certificate)
+    signed_xml = signer.sign(invoice_xml)
+    
+    assert signed_xml is not None
+    assert '<ds:Signature' in signed_xml
+    assert '<ds:DigestValue></ds:DigestValue>' not in signed_xml
+    assert '<ds:SignatureValue></ds:SignatureValue>' not in signed_xml
+
+
+def test_crypto_signer_without_certificate(invoice_xml):
+    """Sin certificado no se firma."""
+    assert CryptoXmlSigner().sign(invoice_xml) is None
+
+
+@pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")
+@pytest.mark.parametrize("exclusive", [False, True])
+def test_crypto_signer_matches_xmlsec(pkcs12_certificate, invoice_xml, exclusive):
+    """La firma es idéntica byte a byte a la generada con xmlsec."""
+    crypto_signer = _signer(CryptoXmlSigner, pkcs12_certificate, exclusive=exclusive)
+    xmlsec_signer = _signer(XmlSigner, pkcs12_certificate)
+    
+    if exclusive:
+        # Misma plantilla para ambos backends
+        xmlsec_signer._create_signature_template = crypto_signer._create_signature_template
+    
+    expected = xmlsec_signer.sign(invoice_xml)
+    
+    # Dos firmas seguidas para cubrir la SignedInfo precalculada
+    assert crypto_signer.sign(invoice_xml) == expected
+    assert crypto_signer.sign(invoice_xml) == expected
+
+
+@pytest.mark.parametrize("exclusive", [False, True])
+def test_streaming_digest_matches(pkcs12_certificate, invoice_xml, exclusive):
+    """El modo streaming produce la misma firma que el modo en memoria."""
+    buffered = _signer(CryptoXmlSigner, pkcs12_certificate, exclusive=exclusive)
+    streaming = _signer(CryptoXmlSigner, pkcs12_certificate, exclusive=exclusive, streaming=True)
+    
+    assert streaming.sign(invoice_xml) == buffered.sign(invoice_xml)
+
+
+def test_streaming_digest_memory(invoice_xml):
+    """El modo streaming no construye la forma canónica completa en memoria."""
+    import tracemalloc
+    import lxml.etree as etree
+    
+    line = '<cac:InvoiceLine><cbc:ID>1</cbc:ID><cbc:Note>' + 'x' * 200 + '</cbc:Note></cac:InvoiceLine>'
+    doc = etree.fromstring(invoice_xml.replace('</Invoice>', line * 10000 + '</Invoice>').encode('utf-8'))
+    
+    peaks = {}
+    for streaming in (False, True):
+        signer = CryptoXmlSigner(streaming=streaming)
+        tracemalloc.start()
+        signer._digest_document(doc)
+        peaks[streaming] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    
+    assert peaks[False] > 2_000_000
+    assert peaks[True] < 100_000
+
+
+def test_signature_placeholder_lookup(invoice_xml):
+    """El placeholder se ubica bajo la raíz y, si no, en cualquier nivel."""
+    import lxml.etree as etree
+    
+    signer = CryptoXmlSigner()
+    doc = etree.fromstring(invoice_xml.encode('utf-8'))
+    placeholder = signer._find_signature_placeholder(doc)
+    assert placeholder is not None and placeholder.getparent().getparent().getparent() is doc
+    
+    wrapped = etree.fromstring(f'<Envelope>{etree.tostring(doc).decode()}</Envelope>'.encode('utf-8'))
+    assert signer._find_signature_placeholder(wrapped) is not None
+    assert signer._find_signature_placeholder(etree.fromstring(b'<Invoice/>')) is None
+
+
+@pytest.mark.parametrize("cls", [
+    CryptoXmlSigner,
+    pytest.param(XmlSigner, marks=pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")),
+])
+def test_compact_xml_signature_valid(pkcs12_certificate, certificate_fingerprint, cls):
+    """Un XML compacto firmado no se re-indenta y su firma es válida."""
+    signer = _signer(cls, pkcs12_certificate)
+    signed_xml = signer.sign(WARMUP_XML)
+    
+    assert '<ext:UBLExtensions>\n' not in signed_xml
+    assert '</ext:UBLExtensions><cbc:ID>' in signed_xml
+    
+    verifier = XmlVerifier(trusted_fingerprints=[certificate_fingerprint])
+    assert verifier.verify(signed_xml).is_valid()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests del cliente SOAP contra el billService local (sin red).
+"""
+
+import asyncio
+import io
+import time
+import zipfile
+
+import pytest
+from zeep import Client
+
+from greenter.ws.async_soap_client import AsyncSoapClient
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.mock_bill_service import MockBillService
+from greenter.ws.retry import RetryPolicy
+from greenter.ws.soap_client import SoapClient
+from greenter.ws.ticket_scheduler import TicketScheduler
+
+
+FILENAME = "20000000001-01-F001-1"
+
+
+@pytest.fixture
+def mock_service():
+    with MockBillService(seed=1) as service:
+        yield service
+
+
+def create_client(service, fast_path=False):
+    client = SoapClient()
+    client.set_session_pool(HttpSessionPool())
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_service(service.url)
+    client.set_fast_path(fast_path)
+    return client
+
+
+def test_serves_wsdl(mock_service):
+    """El WSDL servido es el incluido en el paquete."""
+    client = Client(f"{mock_service.url}?wsdl")
+    operations = next(iter(client.wsdl.bindings.values()))._operations
+    assert set(operations) == {"getStatus", "sendBill", "sendPack", "sendSummary"}
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_send_bill(mock_service, fast_path):
+    """sendBill devuelve un CDR de aceptación del documento enviado."""
+    result = create_client(mock_service, fast_path).send(FILENAME, "<Invoice/>")
+    
+    assert result["success"]
+    assert "<cbc:ResponseCode>0</cbc:ResponseCode>" in result["cdr_response"]
+    assert "La Factura numero F001-1, ha sido aceptada" in result["cdr_response"]
+    with zipfile.ZipFile(io.BytesIO(result["cdr_zip"])) as zip_file:
+        assert zip_file.namelist() == [f"R-{FILENAME}.xml"]
+
+
+def test_rejects_bad_filename(mock_service):
+    """Un nombre de archivo inválido se rechaza como en SUNAT."""
+    result = create_client(mock_service).send("F001-1", "<Invoice/>")
+    assert not result["success"]
+    assert result["code"] == "soap-env:Client.0151"
+
+
+def test_summary_ticket_polling(mock_service):
+    """El ticket queda en proceso (98) y luego devuelve el CDR."""
+    mock_service.processing_time = 0.1
+    client = create_client(mock_service)
+    
+    ticket = client.send_summary("20000000001-RC-20240115-1", "<SummaryDocuments/>")["ticket"]
+    assert client.get_status(ticket)["status_code"] == "98"
+    
+    scheduler = TicketScheduler(client, initial_delay=0.05, backoff=1.5)
+    results = []
+    scheduler.add(ticket, callback=results.append)
+    asyncio.run(scheduler.run(stop_when_idle=True))
+    
+    assert results[0].is_success()
+    assert "El Resumen diario numero 20240115-1" in results[0].cdr_response
+    
+    status = client.get_status("999")
+    assert not status["success"]
+    assert status["code"].endswith("0127")  # el ticket no existe
+
+
+def test_send_pack(mock_service):
+    """sendPack devuelve un CDR por documento del lote."""
+    client = create_client(mock_service)
+    documents = [(f"20000000001-03-B001-{n}", "<Invoice/>") for n in range(1, 4)]
+    
+    ticket = client.send_pack("20000000001-LT-20240115-1", documents)["ticket"]
+    status = client.get_status(ticket)
+    
+    with zipfile.ZipFile(io.BytesIO(status["content"])) as zip_file:
+        assert zip_file.namelist() == [f"R-20000000001-03-B001-{n}.xml" for n in range(1, 4)]
+
+
+def test_fault_injection_and_retry(mock_service):
+    """Los faults inyectados se reintentan con la política de reintentos."""
+    client = create_client(mock_service)
+    client.set_retry_policy(RetryPolicy(max_attempts=3, base_delay=0))
+    mock_service.fail_next(2)
+    
+    assert client.send(FILENAME, "<Invoice/>")["success"]
+    assert mock_service.get_stats()["requests"]["sendBill"] == 3
+    assert mock_service.get_stats()["faults"]["sendBill"] == 2
+    
+    mock_service.error_rate = 1.0
+    result = client.send(FILENAME, "<Invoice/>")
+    assert result["code"] == "soap-env:Client.0130"
+
+
+def test_credentials_and_rejection():
+    """Credenciales incorrectas dan 0102; reject_rate genera CDR de rechazo."""
+    with MockBillService(credentials={"20000000001MODDATOS": "moddatos"}, reject_rate=1.0) as service:
+        client = create_client(service)
+        result = client.send(FILENAME, "<Invoice/>")
+        assert result["success"]
+        assert "<cbc:ResponseCode>2017</cbc:ResponseCode>" in result["cdr_response"]
+        
+        client.set_credentials("20000000001MODDATOS", "otra")
+        assert client.send(FILENAME, "<Invoice/>")["code"] == "soap-env:Client.0102"
+
+
+def test_latency():
+    """La latencia configurada se aplica a cada llamada."""
+    with MockBillService(latency=0.05) as service:
+        client = create_client(service)
+        client.send(FILENAME, "<Invoice/>")
+        start = time.monotonic()
+        client.send(FILENAME, "<Invoice/>")
+        assert time.monotonic() - start >= 0.05
+
+
+def test_async_client(mock_service):
+    """El cliente asíncrono funciona contra el servicio local sobre HTTP real."""
+    client = AsyncSoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_service(mock_service.url)
+    
+    async def main():
+        async with client:
+            return await asyncio.gather(*(client.send_async(f"20000000001-01-F001-{n}", "<Invoice/>") for n in range(1, 6)))
+    
+    assert all(result["success"] for result in asyncio.run(main()))
+    assert mock_service.get_stats()["requests"]["sendBill"] == 5
+
+
+def test_signed_cdr(mock_service, pkcs12_certificate, certificate_fingerprint):
+    """Con cdr_signer el CDR viene firmado y se verifica."""
+    from greenter.signer.crypto_signer import CryptoXmlSigner
+    from greenter.signer.xml_verifier import XmlVerifier
+    
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    mock_service.cdr_signer = signer.sign
+    
+    result = create_client(mock_service).send(FILENAME, "<Invoice/>")
+    
+    assert XmlVerifier(trusted_fingerprints=[certificate_fingerprint]).verify_cdr(result["cdr_zip"]).is_valid()
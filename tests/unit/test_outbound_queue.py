@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Tests de la cola de envío persistente (store-and-forward).
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.mock_bill_service import MockBillService
+from greenter.ws.outbound_queue import OutboundQueue, OutboundItem
+from greenter.ws.soap_client import SoapClient
+
+
+class RecordingClient:
+    """Cliente simulado que registra los envíos y responde según el archivo."""
+    
+    def __init__(self, delay=0.0, answers=None):
+        self.delay = delay
+        self.answers = answers or {}
+        self.deliveries = []
+        self.active = set()
+        self.overlaps = 0
+        self.lock = threading.Lock()
+    
+    def send(self, filename, xml_content):
+        serie = filename.rsplit('-', 1)[0]
+        with self.lock:
+            if serie in self.active:
+                self.overlaps += 1
+            self.active.add(serie)
+            self.deliveries.append(filename)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active.discard(serie)
+            answers = self.answers.get(filename)
+        if answers:
+            return answers.pop(0)
+        return {'success': True, 'cdr_zip': b'PK', 'code': None, 'error': None}
+    
+    def send_summary(self, filename, xml_content):
+        self.send(filename, xml_content)
+        return {'success': True, 'ticket': '1700000000001', 'error': None}
+
+
+def fault(code):
+    return {'success': False, 'error': 'SOAP Fault', 'code': f'soap-env:Client.{code}', 'description': None}
+
+
+def create_soap_client(url):
+    client = SoapClient()
+    client.set_session_pool(HttpSessionPool())
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_service(url)
+    return client
+
+
+def test_accepts_during_outage_and_delivers_after(tmp_path):
+    """Con SUNAT caído se sigue encolando; al volver se entrega todo."""
+    with MockBillService() as service:
+        url = service.url
+    client = create_soap_client(url)  # puerto cerrado: conexión rechazada
+    queue = OutboundQueue(client, str(tmp_path / "outbox.db"), base_delay=0.01, max_delay=0.05)
+    
+    start = time.monotonic()
+    for n in range(1, 21):
+        assert queue.enqueue(f"20000000001-01-F001-{n}", "<Invoice/>")
+    assert time.monotonic() - start < 2
+    
+    assert not queue.drain()
+    assert queue.get("20000000001-01-F001-1").attempts == 1
+    assert queue.get_stats()["pending"] == 20
+    
+    with MockBillService() as service:
+        client.set_service(service.url)
+        assert queue.drain(timeout=5)
+    
+    item = queue.get("20000000001-01-F001-20")
+    assert item.is_done() and item.cdr_zip[:2] == b"PK"
+    assert queue.get_stats() == {"pending": 0, "in_flight": 0, "done": 20, "registered": 0, "failed": 0}
+    queue.close()
+
+
+def test_serie_order_with_workers(tmp_path):
+    """Cada serie se entrega en orden y de a uno; las series avanzan en paralelo."""
+    client = RecordingClient(delay=0.01)
+    queue = OutboundQueue(client, str(tmp_path / "outbox.db"), workers=4)
+    results = []
+    done = threading.Event()
+    
+    def on_result(item):
+        results.append(item)
+        if len(results) == 30:
+            done.set()
+    
+    queue.on_result(on_result)
+    queue.enqueue_many(
+        (f"20000000001-01-{serie}-{n}", "<Invoice/>", "bill", None)
+        for n in range(1, 11) for serie in ("F001", "F002", "F003")
+    )
+    queue.start()
+    assert done.wait(5)
+    queue.close()
+    
+    assert client.overlaps == 0
+    for serie in ("F001", "F002", "F003"):
+        delivered = [name for name in client.deliveries if f"-{serie}-" in name]
+        assert delivered == [f"20000000001-01-{serie}-{n}" for n in range(1, 11)]
+    assert all(item.status == OutboundItem.DONE for item in results)
+
+
+def test_retry_blocks_serie_but_terminal_fault_does_not(tmp_path):
+    """Un fallo transitorio retiene la serie; un rechazo definitivo no."""
+    client = RecordingClient(answers={
+        "20000000001-01-F001-1": [fault("0130"), fault("0130")],
+        "20000000001-01-F002-1": [fault("0151")],
+    })
+    queue = OutboundQueue(client, str(tmp_path / "outbox.db"), base_delay=0.01)
+    for name in ("F001-1", "F001-2", "F002-1", "F002-2"):
+        queue.enqueue(f"20000000001-01-{name}", "<Invoice/>")
+    
+    assert queue.drain(timeout=2)
+    
+    f001 = [name for name in client.deliveries if "-F001-" in name]
+    assert f001 == ["20000000001-01-F001-1"] * 3 + ["20000000001-01-F001-2"]
+    failed = queue.get("20000000001-01-F002-1")
+    assert failed.status == OutboundItem.FAILED and failed.code == "soap-env:Client.0151"
+    assert queue.get("20000000001-01-F002-2").is_done()
+    queue.close()
+
+
+def test_crash_recovery_bookkeeping(tmp_path):
+    """Sin duplicados; lo que quedó en vuelo se reenvía al vencer su lease y 1033 queda como registrado."""
+    path = str(tmp_path / "outbox.db")
+    queue = OutboundQueue(RecordingClient(), path, lease_timeout=0.05)
+    assert queue.enqueue("20000000001-01-F001-1", "<Invoice/>")
+    assert not queue.enqueue("20000000001-01-F001-1", "<Invoice/>")
+    assert queue._claim() is not None  # tomado por un worker que "cae" antes de registrar
+    queue.close()
+    time.sleep(0.1)
+    
+    client = RecordingClient(answers={"20000000001-01-F001-1": [fault("1033")]})
+    queue = OutboundQueue(client, path)
+    assert queue.get("20000000001-01-F001-1").status == OutboundItem.PENDING
+    assert queue.drain()
+    
+    item = queue.get("20000000001-01-F001-1")
+    assert item.is_registered() and not item.is_done()
+    assert item.attempts == 2 and item.cdr_zip is None
+    assert client.deliveries == ["20000000001-01-F001-1"]
+    assert queue.get_stats()["registered"] == 1
+    queue.close()
+
+
+def test_live_lease_not_resent(tmp_path):
+    """Otro proceso con la misma base no reenvía lo que un worker vivo tiene en vuelo."""
+    path = str(tmp_path / "outbox.db")
+    first = OutboundQueue(RecordingClient(), path)
+    first.enqueue("20000000001-01-F001-1", "<Invoice/>")
+    item = first._claim()
+    
+    client = RecordingClient()
+    second = OutboundQueue(client, path)
+    assert second.get("20000000001-01-F001-1").status == OutboundItem.IN_FLIGHT
+    assert not second.drain()
+    assert client.deliveries == []
+    
+    first._deliver(*item)
+    assert second.get("20000000001-01-F001-1").is_done()
+    first.close()
+    second.close()
+
+
+def test_max_attempts(tmp_path):
+    """Con max_attempts el documento se marca fallido al agotar los intentos."""
+    client = RecordingClient(answers={"20000000001-01-F001-1": [None, None]})
+    queue = OutboundQueue(client, str(tmp_path / "outbox.db"), base_delay=0.01, max_attempts=2)
+    queue.enqueue("20000000001-01-F001-1", "<Invoice/>")
+    
+    assert queue.drain(timeout=1)
+    item = queue.get("20000000001-01-F001-1")
+    assert item.status == OutboundItem.FAILED and item.attempts == 2
+    queue.close()
+
+
+def test_see_enqueue(tmp_path, pkcs12_certificate):
+    """See.enqueue firma y encola; los workers entregan en orden."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    from greenter.see import See
+    from greenter.signer.crypto_signer import CryptoXmlSigner
+    
+    client = RecordingClient()
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.set_outbound_queue(OutboundQueue(client, str(tmp_path / "outbox.db")))
+    
+    invoices = [
+        Invoice(
+            serie="F001", correlativo=str(n), tipo_doc="01", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+        )
+        for n in range(1, 4)
+    ]
+    assert all(see.enqueue(invoice) for invoice in invoices)
+    assert not see.enqueue(invoices[0])
+    assert see.outbound_queue.drain()
+    
+    assert client.deliveries == [invoice.get_name() for invoice in invoices]
+    assert see.outbound_queue.get_stats()["done"] == 3
+    see.outbound_queue.close()
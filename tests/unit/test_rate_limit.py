@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests del limitador de tasa por RUC y por endpoint.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from greenter.ws.async_soap_client import AsyncSoapClient
+from greenter.ws.rate_limit import TokenBucket, RateLimiter, ruc_from_username
+from greenter.ws.soap_client import SoapClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_paces_after_burst():
+    """Agotada la ráfaga, cada petición espera 1/rate más que la anterior."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+    
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0, 0]
+    assert abs(waits[2] - 0.1) < 1e-9 and abs(waits[3] - 0.2) < 1e-9
+    
+    # El tiempo repone tokens hasta la capacidad, no más
+    clock.now += 10
+    assert bucket.tokens == 2
+
+
+def test_ruc_from_username():
+    """El RUC son los 11 primeros caracteres del usuario SOL."""
+    assert ruc_from_username("20000000001MODDATOS") == "20000000001"
+    assert ruc_from_username(None) is None
+
+
+def test_limiter_buckets_per_ruc_and_endpoint():
+    """Cada RUC tiene su propio cupo; el del endpoint es compartido."""
+    limiter = RateLimiter(per_ruc=10, per_endpoint=15, ruc_rates={"20000000002": 1})
+    
+    assert limiter.reserve("20000000001", "https://a") == 0
+    assert limiter.reserve("20000000002", "https://b") == 0
+    # Segundo envío del mismo RUC: espera por su cupo de 10/s
+    assert 0.09 < limiter.reserve("20000000001", "https://c") <= 0.1
+    # RUC con tasa propia de 1/s
+    assert 0.99 < limiter.reserve("20000000002", "https://d") <= 1
+    # Otro RUC en un endpoint ya usado: espera por el cupo del endpoint
+    assert 0.06 < limiter.reserve("20000000003", "https://a") <= 1 / 15
+    
+    stats = limiter.get_stats()
+    assert stats["ruc:20000000002"]["rate"] == 1
+    assert stats["endpoint:https://a"]["tokens"] < 0
+
+
+def test_sync_client_is_paced():
+    """SoapClient espacia las llamadas de un mismo RUC."""
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_rate_limiter(RateLimiter(per_ruc=20))
+    
+    start = time.perf_counter()
+    for _ in range(5):
+        assert client._invoke(lambda: "ok") == "ok"
+    assert time.perf_counter() - start >= 0.19
+
+
+def test_async_client_is_paced():
+    """AsyncSoapClient reparte las llamadas concurrentes en el tiempo."""
+    sent = []
+    
+    def handler(request):
+        sent.append(time.perf_counter())
+        return httpx.Response(200, headers={"Content-Type": "text/xml"}, content=(
+            '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/"><soap:Body>'
+            '<br:getStatusResponse xmlns:br="http://service.sunat.gob.pe">'
+            '<status><statusCode>98</statusCode></status>'
+            '</br:getStatusResponse></soap:Body></soap:Envelope>'
+        ).encode())
+    
+    client = AsyncSoapClient(http_transport=httpx.MockTransport(handler))
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_rate_limiter(RateLimiter(per_endpoint=20))
+    
+    async def main():
+        return await asyncio.gather(*(client.get_status_async(str(n)) for n in range(5)))
+    
+    results = asyncio.run(main())
+    
+    assert all(result["status_code"] == "98" for result in results)
+    assert sent[-1] - sent[0] >= 0.19
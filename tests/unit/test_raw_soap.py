@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests del transporte SOAP directo de sendBill.
+"""
+
+import base64
+import io
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import lxml.etree as etree
+import pytest
+import requests
+
+from greenter.ws import raw_soap
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.soap_client import SoapClient
+
+
+CDR_XML = "<ApplicationResponse>0</ApplicationResponse>"
+
+FAULT = (
+    '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body>'
+    '<soap-env:Fault><faultcode>soap-env:Client.0151</faultcode>'
+    '<faultstring>El nombre del archivo ZIP es incorrecto</faultstring></soap-env:Fault>'
+    '</soap-env:Body></soap-env:Envelope>'
+)
+
+
+def cdr_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("R-20000000001-01-F001-1.xml", CDR_XML)
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def bill_service():
+    """billService local: responde CDR o Fault según el nombre del archivo."""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if b"<fileName>ERROR" in body:
+                status, payload = 500, FAULT.encode()
+            else:
+                status, payload = 200, (
+                    '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/"><soap-env:Body>'
+                    '<br:sendBillResponse xmlns:br="http://service.sunat.gob.pe">'
+                    f'<applicationResponse>{base64.b64encode(cdr_zip()).decode()}</applicationResponse>'
+                    '</br:sendBillResponse></soap-env:Body></soap-env:Envelope>'
+                ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/billService"
+    server.shutdown()
+    server.server_close()
+
+
+def create_client(url, fast_path):
+    client = SoapClient()
+    client.set_session_pool(HttpSessionPool())
+    client.set_credentials("20000000001MODDATOS", "mod<datos&")
+    client.set_service(url)
+    client.set_fast_path(fast_path)
+    return client
+
+
+def test_envelope_matches_zeep():
+    """El sobre pre-serializado equivale al que genera zeep."""
+    client = create_client("https://e-beta.sunat.gob.pe/ol-ti-itcpfegem-beta/billService", False)
+    client.connect()
+    
+    expected = client.client.create_message(
+        client.service, "sendBill", fileName="20000000001-01-F001-1&.zip", contentFile=b"PK\x03\x04"
+    )
+    raw = raw_soap.build_send_bill_envelope(
+        "20000000001MODDATOS", "mod<datos&", "20000000001-01-F001-1&.zip", b"PK\x03\x04"
+    )
+    
+    assert etree.tostring(etree.fromstring(raw), method="c14n") == etree.tostring(expected, method="c14n")
+
+
+def test_fast_path_matches_zeep_result(bill_service):
+    """Ambos caminos devuelven el mismo resultado."""
+    zeep_result = create_client(bill_service, False).send("20000000001-01-F001-1", "<Invoice/>")
+    raw_result = create_client(bill_service, True).send("20000000001-01-F001-1", "<Invoice/>")
+    
+    assert raw_result == zeep_result
+    assert raw_result["success"]
+    assert raw_result["cdr_zip"] == cdr_zip()
+    assert raw_result["cdr_response"] == CDR_XML
+
+
+def test_fast_path_fault(bill_service):
+    """Un Fault de SUNAT se reporta igual que en zeep."""
+    zeep_result = create_client(bill_service, False).send("ERROR-01-F001-1", "<Invoice/>")
+    raw_result = create_client(bill_service, True).send("ERROR-01-F001-1", "<Invoice/>")
+    
+    assert not raw_result["success"]
+    for key in ("error", "code", "description"):
+        assert raw_result[key] == zeep_result[key]
+    assert raw_result["code"] == "soap-env:Client.0151"
+
+
+def test_parse_invalid_response():
+    """Una respuesta que no es SOAP no lanza excepción."""
+    result = raw_soap.parse_send_bill_response(b"<html>Service Unavailable</html>")
+    assert not result["success"]
+    assert result["error"] == "Respuesta SOAP sin Body"
+    assert "inválida" in raw_soap.parse_send_bill_response(b"not xml")["error"]
+
+
+def test_environment_settings_cache():
+    """La configuración del entorno se guarda por sesión hasta limpiarla."""
+    address = "https://e-beta.sunat.gob.pe/ol-ti-itcpfegem-beta/billService"
+    session = requests.Session()
+    session.trust_env = False
+    assert raw_soap._get_environment_settings(session, address)["proxies"] == {}
+    
+    session.proxies = {"https": "http://proxy.local:3128"}
+    assert raw_soap._get_environment_settings(session, address)["proxies"] == {}
+    
+    raw_soap.clear_environment_settings(session)
+    assert raw_soap._get_environment_settings(session, address)["proxies"] == {"https": "http://proxy.local:3128"}
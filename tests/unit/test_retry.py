@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Tests de la política de reintentos y el circuit breaker.
+"""
+
+import asyncio
+import base64
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from zeep.exceptions import Fault
+
+from greenter.ws.http_pool import HttpSessionPool
+from greenter.ws.retry import RetryPolicy, CircuitBreaker, CircuitOpenError
+from greenter.ws.soap_client import SoapClient
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_classification():
+    """Se reintentan errores de red, 5xx y faults transitorios de SUNAT."""
+    policy = RetryPolicy()
+    
+    assert policy.is_retryable(requests.ConnectionError())
+    assert policy.is_retryable(requests.Timeout())
+    assert policy.is_retryable(TimeoutError())
+    assert policy.is_retryable(http_error(503))
+    assert policy.is_retryable(Fault("El sistema no puede responder su solicitud", code="soap-env:Server.0130"))
+    assert policy.is_retryable(Fault("0100", code="soap-env:Server"))
+    
+    assert not policy.is_retryable(http_error(404))
+    assert not policy.is_retryable(Fault("El comprobante fue registrado previamente", code="soap-env:Client.1033"))
+    assert not policy.is_retryable(ValueError())
+    assert not policy.is_retryable(CircuitOpenError("https://sunat", 1))
+    
+    assert policy.is_retryable_result({'success': False, 'code': 'soap-env:Client.0109'})
+    assert not policy.is_retryable_result({'success': False, 'code': 'soap-env:Client.0151'})
+
+
+def test_backoff():
+    """El backoff crece exponencialmente hasta max_delay; el jitter no lo supera."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=3, jitter=False)
+    assert [policy.get_delay(attempt) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+    
+    policy.jitter = True
+    assert all(0 <= policy.get_delay(4) <= 3 for _ in range(100))
+
+
+def test_retries_transient_then_succeeds():
+    """Un error transitorio se reintenta; uno terminal no."""
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    calls = []
+    
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise requests.ConnectionError("reset")
+        return "ok"
+    
+    assert policy.call(flaky, "https://sunat/billService") == "ok"
+    assert len(calls) == 3
+    
+    def terminal():
+        calls.append(1)
+        raise Fault("Error", code="soap-env:Client.0151")
+    
+    calls.clear()
+    with pytest.raises(Fault):
+        policy.call(terminal, "https://sunat/billService")
+    assert len(calls) == 1
+
+
+def test_circuit_breaker():
+    """Tras varios fallos el circuito se abre, y se cierra tras una prueba exitosa."""
+    policy = RetryPolicy(max_attempts=1, failure_threshold=2, recovery_timeout=0.1)
+    endpoint = "https://sunat/billService"
+    
+    def down():
+        raise requests.ConnectionError("refused")
+    
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            policy.call(down, endpoint)
+    assert policy.get_breaker(endpoint).state == CircuitBreaker.OPEN
+    
+    with pytest.raises(CircuitOpenError):
+        policy.call(lambda: pytest.fail("called with open circuit"), endpoint)
+    assert policy.get_stats()[endpoint] == {'state': 'open', 'failures': 2}
+    
+    # Otro endpoint no se ve afectado
+    assert policy.call(lambda: "ok", "https://other/billService") == "ok"
+    
+    time.sleep(0.15)
+    assert policy.call(lambda: "ok", endpoint) == "ok"
+    assert policy.get_breaker(endpoint).state == CircuitBreaker.CLOSED
+
+
+def test_call_async():
+    """La versión asíncrona reintenta timeouts."""
+    policy = RetryPolicy(base_delay=0)
+    calls = []
+    
+    async def slow_then_ok():
+        calls.append(1)
+        if len(calls) == 1:
+            raise asyncio.TimeoutError()
+        return "ok"
+    
+    assert asyncio.run(policy.call_async(slow_then_ok, "https://sunat/billService")) == "ok"
+    assert len(calls) == 2
+
+
+def test_timeouts_of_sends_not_retried():
+    """Un timeout de un envío no se reintenta salvo que se permita."""
+    endpoint = "https://sunat/billService"
+    calls = []
+    
+    def timeout():
+        calls.append(1)
+        raise requests.ReadTimeout("read timed out")
+    
+    def connect_timeout():
+        calls.append(1)
+        raise requests.ConnectTimeout("connect timed out")
+    
+    policy = RetryPolicy(max_attempts=3, base_delay=0)
+    with pytest.raises(requests.ReadTimeout):
+        policy.call(timeout, endpoint, idempotent=False)
+    assert len(calls) == 1
+    assert policy.get_breaker(endpoint).failures == 1
+    
+    # La conexión no llegó a establecerse: se puede reintentar
+    calls.clear()
+    with pytest.raises(requests.ConnectTimeout):
+        policy.call(connect_timeout, endpoint, idempotent=False)
+    assert len(calls) == 3
+    
+    calls.clear()
+    policy = RetryPolicy(max_attempts=3, base_delay=0, retry_unsafe_timeouts=True)
+    with pytest.raises(requests.ReadTimeout):
+        policy.call(timeout, endpoint, idempotent=False)
+    assert len(calls) == 3
+
+
+def test_breaker_ignores_local_errors():
+    """Solo las respuestas de SUNAT cuentan como éxito del endpoint."""
+    policy = RetryPolicy(max_attempts=1, failure_threshold=2, recovery_timeout=0.1)
+    endpoint = "https://sunat/billService"
+    breaker = policy.get_breaker(endpoint)
+    
+    def down():
+        raise requests.ConnectionError("refused")
+    
+    def raise_error(error):
+        def call():
+            raise error
+        return call
+    
+    with pytest.raises(requests.ConnectionError):
+        policy.call(down, endpoint)
+    for error in (ValueError("bug"), http_error(404)):
+        with pytest.raises(type(error)):
+            policy.call(raise_error(error), endpoint)
+    assert breaker.failures == 1
+    
+    with pytest.raises(requests.ConnectionError):
+        policy.call(down, endpoint)
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    # Un error local en la llamada de prueba no cierra el circuito ni lo bloquea
+    time.sleep(0.15)
+    with pytest.raises(ValueError):
+        policy.call(raise_error(ValueError("bug")), endpoint)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    
+    # Un fault terminal de SUNAT sí prueba que el endpoint responde
+    with pytest.raises(Fault):
+        policy.call(raise_error(Fault("Error", code="soap-env:Client.0151")), endpoint)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_trial_releases_circuit():
+    """Cancelar la llamada de prueba no deja el circuito bloqueado."""
+    policy = RetryPolicy(max_attempts=1, failure_threshold=1, recovery_timeout=0.1)
+    endpoint = "https://sunat/billService"
+    breaker = policy.get_breaker(endpoint)
+    
+    async def down():
+        raise asyncio.TimeoutError()
+    
+    async def hang():
+        await asyncio.sleep(10)
+    
+    async def ok():
+        return "ok"
+    
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.call_async(down, endpoint)
+        assert breaker.state == CircuitBreaker.OPEN
+        
+        await asyncio.sleep(0.15)
+        trial = asyncio.create_task(policy.call_async(hang, endpoint))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        
+        return await policy.call_async(ok, endpoint)
+    
+    assert asyncio.run(scenario()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    # Igual con una interrupción en la versión síncrona
+    def refused():
+        raise requests.ConnectionError("refused")
+    
+    def interrupted():
+        raise KeyboardInterrupt()
+    
+    with pytest.raises(requests.ConnectionError):
+        policy.call(refused, endpoint)
+    time.sleep(0.15)
+    with pytest.raises(KeyboardInterrupt):
+        policy.call(interrupted, endpoint)
+    assert policy.call(lambda: "ok", endpoint) == "ok"
+
+
+@pytest.fixture
+def flaky_bill_service():
+    """billService que responde el fault 0130 a las primeras peticiones."""
+    state = {"failures": 2, "requests": 0}
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            state["requests"] += 1
+            if state["requests"] <= state["failures"]:
+                status, body = 500, (
+                    '<soap-env:Fault><faultcode>soap-env:Server.0130</faultcode>'
+                    '<faultstring>El sistema no puede responder su solicitud</faultstring></soap-env:Fault>'
+                )
+            else:
+                status, body = 200, (
+                    '<br:sendBillResponse xmlns:br="http://service.sunat.gob.pe">'
+                    f'<applicationResponse>{base64.b64encode(b"PK").decode()}</applicationResponse>'
+                    '</br:sendBillResponse>'
+                )
+            payload = (
+                '<soap-env:Envelope xmlns:soap-env="http://schemas.xmlsoap.org/soap/envelope/">'
+                f'<soap-env:Body>{body}</soap-env:Body></soap-env:Envelope>'
+            ).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/xml; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/billService", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("fast_path", [False, True])
+def test_soap_client_retries(flaky_bill_service, fast_path):
+    """SoapClient reintenta faults transitorios en ambos caminos de envío."""
+    url, state = flaky_bill_service
+    client = SoapClient()
+    client.set_session_pool(HttpSessionPool())
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.set_service(url)
+    client.set_fast_path(fast_path)
+    client.set_retry_policy(RetryPolicy(max_attempts=3, base_delay=0))
+    
+    result = client.send("20000000001-01-F001-1", "<Invoice/>")
+    
+    assert result["success"]
+    assert state["requests"] == 3
+    
+    # Sin política se hace un solo intento
+    state.update(requests=0, failures=1)
+    client.set_retry_policy(None)
+    assert not client.send("20000000001-01-F001-1", "<Invoice/>")["success"]
+    assert state["requests"] == 1
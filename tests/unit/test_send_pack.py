@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests del envío por lotes (sendPack).
+"""
+
+import io
+import zipfile
+from datetime import datetime
+
+from greenter.see import See
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.ws.soap_client import SoapClient
+from greenter.ws.ticket_scheduler import TicketScheduler
+
+
+class PackService:
+    """billService simulado que registra los lotes recibidos."""
+    
+    def __init__(self):
+        self.packs = []
+    
+    def sendPack(self, fileName, contentFile):
+        self.packs.append((fileName, contentFile))
+        return "1700000000002"
+
+
+def create_boletas(ruc="20000000001", count=3):
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    return [
+        Invoice(
+            serie="B001", correlativo=f"{n:08d}", tipo_doc="03", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc=ruc, razon_social="EMPRESA", address=Address()),
+        )
+        for n in range(1, count + 1)
+    ]
+
+
+def create_see(pkcs12_certificate, service):
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.set_credentials("20000000001", "MODDATOS", "moddatos")
+    see.soap_client.connect()
+    see.soap_client.service = service
+    return see
+
+
+def test_soap_client_send_pack():
+    """SoapClient.send_pack arma un ZIP con todos los documentos y devuelve el ticket."""
+    service = PackService()
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    client.connect()
+    client.service = service
+    
+    result = client.send_pack("20000000001-LT-20240115-1", [("A", "<Invoice/>"), ("B", "<Invoice/>")])
+    
+    assert result == {'success': True, 'ticket': "1700000000002", 'error': None}
+    file_name, content = service.packs[0]
+    assert file_name == "20000000001-LT-20240115-1.zip"
+    with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+        assert zip_file.namelist() == ["A.xml", "B.xml"]
+
+
+def test_see_send_pack(pkcs12_certificate):
+    """See.send_pack firma en paralelo, nombra el lote y registra el ticket."""
+    service = PackService()
+    see = create_see(pkcs12_certificate, service)
+    scheduler = TicketScheduler(see.soap_client)
+    see.set_ticket_scheduler(scheduler)
+    boletas = create_boletas()
+    
+    response = see.send_pack(boletas, correlativo=7, max_workers=3)
+    
+    assert response.success and response.ticket == "1700000000002"
+    file_name, content = service.packs[0]
+    assert file_name == f"20000000001-LT-{datetime.now():%Y%m%d}-7.zip"
+    with zipfile.ZipFile(io.BytesIO(content)) as zip_file:
+        names = [boleta.get_name() for boleta in boletas]
+        assert zip_file.namelist() == [f"{name}.xml" for name in names]
+        assert all(b"<ds:SignatureValue>" in zip_file.read(f"{name}.xml") for name in names)
+    assert scheduler.pending == ["1700000000002"]
+
+
+def test_see_send_pack_rejects_mixed_issuers(pkcs12_certificate):
+    """Un lote no puede mezclar emisores."""
+    service = PackService()
+    see = create_see(pkcs12_certificate, service)
+    
+    response = see.send_pack(create_boletas() + create_boletas(ruc="20000000002", count=1))
+    
+    assert not response.success
+    assert not service.packs
+    assert not see.send_pack([]).success
+    
+    # Un RUC explícito distinto del emisor de los documentos
+    response = see.send_pack(create_boletas(), ruc="20000000002")
+    assert not response.success
+    assert "20000000002" in response.error
+    assert not service.packs
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests de la instrumentación por fases de la firma.
+"""
+
+import pytest
+
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.sign_metrics import SignMetrics, PhaseTimer
+
+
+def test_metrics_disabled_by_default(pkcs12_certificate, invoice_xml):
+    """Sin activar métricas no se registra nada."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    assert signer.metrics is None
+    assert signer.sign(invoice_xml)
+
+
+@pytest.mark.parametrize("signer_class, phases", [
+    (CryptoXmlSigner, ['parse', 'xpath', 'template', 'c14n', 'digest', 'rsa', 'serialize', 'total']),
+    pytest.param(
+        XmlSigner, ['parse', 'xpath', 'template', 'xmlsec', 'serialize', 'total'],
+        marks=pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")
+    ),
+])
+def test_phase_timers_and_counters(pkcs12_certificate, invoice_xml, signer_class, phases):
+    """Cada fase de la firma queda registrada una vez por documento."""
+    signer = signer_class()
+    signer.set_certificate(*pkcs12_certificate)
+    metrics = signer.enable_metrics()
+    
+    for _ in range(3):
+        assert signer.sign(invoice_xml)
+    
+    snapshot = metrics.snapshot()
+    assert list(snapshot['phases']) == phases
+    assert all(timer['count'] == 3 for timer in snapshot['phases'].values())
+    assert snapshot['counters']['signed'] == 3
+    assert snapshot['counters']['bytes_out'] > snapshot['counters']['bytes_in']
+    
+    histogram = metrics.get_histogram('parse')
+    assert histogram['buckets']['+Inf'] == 3
+    
+    signer.disable_metrics()
+    signer.sign(invoice_xml)
+    assert metrics.snapshot()['counters']['signed'] == 3
+
+
+def test_errors_are_counted(pkcs12_certificate):
+    """Los documentos sin placeholder de firma cuentan como error."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    metrics = signer.enable_metrics()
+    
+    assert signer.sign("<Invoice/>") is None
+    assert metrics.snapshot()['counters'] == {'errors': 1}
+
+
+def test_phase_timer_buckets():
+    """Los buckets del histograma son acumulativos."""
+    timer = PhaseTimer(buckets_ms=(1.0, 10.0))
+    for seconds in (0.0005, 0.005, 0.005, 1.0):
+        timer.observe(seconds)
+    
+    result = timer.to_dict()
+    assert result['buckets'] == {1.0: 1, 10.0: 3, '+Inf': 4}
+    assert result['count'] == 4
+    assert result['max_ms'] == pytest.approx(1000.0)
+    
+    metrics = SignMetrics()
+    metrics.increment('signed')
+    metrics.reset()
+    assert metrics.snapshot() == {'phases': {}, 'counters': {}}
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests del resultado de firma (DigestValue sin volver a parsear el XML).
+"""
+
+from datetime import datetime
+
+import lxml.etree as etree
+
+from greenter.see import See
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.sign_result import SignResult
+
+DS = '{http://www.w3.org/2000/09/xmldsig#}'
+
+
+def test_sign_with_result_values(pkcs12_certificate, invoice_xml):
+    """Los valores capturados coinciden con los del XML firmado."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    result = signer.sign_with_result(invoice_xml)
+    assert isinstance(result, SignResult)
+    
+    doc = etree.fromstring(result.xml_bytes)
+    assert result.digest_value == doc.findtext(f'.//{DS}DigestValue')
+    assert result.signature_value == ''.join(doc.findtext(f'.//{DS}SignatureValue').split())
+    assert result.get_hash() == result.digest_value
+    assert result.certificate_serial > 0
+    assert result.xml == signer.sign(invoice_xml)
+
+
+def test_see_get_xml_signed_result(pkcs12_certificate):
+    """See expone el resultado de firma de un documento."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    invoice = Invoice(
+        serie="F001",
+        correlativo="00000001",
+        fecha_emision=datetime(2024, 1, 15),
+        tipo_moneda="PEN",
+        company=Company(ruc="20000000001", razon_social="EMPRESA DE PRUEBA S.A.C.", address=Address()),
+    )
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    
+    result = see.get_xml_signed_result(invoice)
+    
+    assert result is not None
+    assert result.digest_value
+    assert b'F001-00000001' in result.xml_bytes
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests del calentamiento y chequeo de disponibilidad del firmador.
+"""
+
+import os
+
+import pytest
+
+from conftest import create_pkcs12
+from greenter.see import See
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE, WARMUP_XML
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.certificate_store import CertificateStore
+
+
+@pytest.mark.parametrize("signer_class", [
+    CryptoXmlSigner,
+    pytest.param(XmlSigner, marks=pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")),
+])
+def test_warm_up_ready(pkcs12_certificate, signer_class):
+    """El calentamiento reporta clave, vencimiento y latencia."""
+    signer = signer_class()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    report = signer.warm_up(iterations=3)
+    
+    assert report.is_ready(), report.error
+    assert report.key_algorithm == "RSA"
+    assert report.key_size == 2048
+    assert report.serial_number == signer.sign_with_result(WARMUP_XML).certificate_serial
+    assert 360 <= report.get_days_to_expiry() <= 365
+    assert len(report.latencies_ms) == 3
+    assert report.to_dict()['ready'] is True
+
+
+def test_warm_up_wrong_password(pkcs12_certificate):
+    """Una contraseña incorrecta se reporta en el arranque."""
+    path, _ = pkcs12_certificate
+    signer = CryptoXmlSigner()
+    signer.set_certificate(path, "incorrecta")
+    
+    report = signer.warm_up()
+    
+    assert not report.ready
+    assert "PKCS12" in report.error
+    assert report.latencies_ms == []
+    
+    # El firmador nunca borra el certificado del usuario
+    del signer
+    assert os.path.exists(path)
+
+
+def test_warm_up_without_certificate():
+    """Sin certificado el firmador no está listo."""
+    report = CryptoXmlSigner().warm_up()
+    assert not report.ready
+    assert report.error
+
+
+def test_warm_up_expired_certificate(tmp_path):
+    """Un certificado vencido no está listo aunque firme."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(create_pkcs12(tmp_path / "vencido.pfx", days=-1), "123456")
+    
+    report = signer.warm_up(iterations=1)
+    
+    assert not report.ready
+    assert "expired" in report.error
+    assert report.get_days_to_expiry() < 0
+
+
+def test_see_warm_up_per_tenant(tmp_path, pkcs12_certificate):
+    """See calienta el certificado por defecto o el de un RUC."""
+    store = CertificateStore()
+    store.add("20000000001", create_pkcs12(tmp_path / "tenant.pfx", key_size=3072), "123456")
+    store.add("20000000002", create_pkcs12(tmp_path / "otro.pfx"), "incorrecta")
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.set_certificate_store(store)
+    
+    assert see.warm_up().key_size == 2048
+    assert see.warm_up(ruc="20000000001").key_size == 3072
+    assert not see.warm_up(ruc="20000000002").ready
+
+
+def test_see_warm_up_unknown_tenant(tmp_path, pkcs12_certificate):
+    """Un RUC sin certificado propio no está listo aunque haya certificado por defecto."""
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    
+    report = see.warm_up(ruc="20999999999")
+    assert not report.ready and "20999999999" in report.error
+    
+    store = CertificateStore()
+    store.add("20000000001", create_pkcs12(tmp_path / "tenant.pfx"), "123456")
+    see.set_certificate_store(store)
+    
+    report = see.warm_up(ruc="20999999999")
+    assert not report.ready and "20999999999" in report.error
+    assert see.warm_up().ready
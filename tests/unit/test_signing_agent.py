@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests del agente de firma por socket Unix.
+"""
+
+import asyncio
+import io
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from conftest import create_pkcs12
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.agent_signer import AgentXmlSigner
+from greenter.signer.signing_agent import SigningAgent, read_frame, main
+from greenter.signer.certificate_store import CertificateStore
+from greenter.signer.xml_verifier import XmlVerifier
+from greenter.see import See
+
+
+@pytest.fixture
+def agent(tmp_path, pkcs12_certificate):
+    """Agente con certificado por defecto y un RUC adicional."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    store = CertificateStore()
+    store.add("20000000002", create_pkcs12(tmp_path / "tenant.pfx", common_name="20000000002"), "123456")
+    
+    with SigningAgent(str(tmp_path / "agent.sock"), signer, store, workers=4) as agent:
+        yield agent
+
+
+def test_agent_signs_like_in_process(agent, pkcs12_certificate, invoice_xml):
+    """La firma del agente es idéntica a la firma local."""
+    local = CryptoXmlSigner()
+    local.set_certificate(*pkcs12_certificate)
+    
+    client = AgentXmlSigner(agent.socket_path)
+    assert client.is_available()
+    assert client.ping()
+    
+    result = client.sign_with_result(invoice_xml)
+    assert result.xml == local.sign(invoice_xml)
+    assert result.digest_value == local.sign_with_result(invoice_xml).digest_value
+    assert result.certificate_serial == local.sign_with_result(invoice_xml).certificate_serial
+    client.close()
+
+
+def test_agent_per_ruc_and_errors(agent, invoice_xml):
+    """El agente firma con el certificado del RUC y reporta errores."""
+    client = AgentXmlSigner(agent.socket_path, ruc="20000000002")
+    
+    result = client.sign_with_result(invoice_xml)
+    fingerprint = agent.certificate_store.get("20000000002").fingerprint
+    verification = XmlVerifier(trusted_fingerprints=[fingerprint]).verify(result.xml_bytes)
+    assert verification.is_valid()
+    assert verification.certificate_fingerprint == fingerprint
+    
+    assert client.sign("<Invoice/>") is None
+    # La conexión sigue disponible después de un error
+    assert client.sign(invoice_xml) is not None
+    client.close()
+
+
+def test_agent_rejects_unknown_ruc(agent, invoice_xml):
+    """Un RUC no registrado nunca se firma con el certificado por defecto."""
+    client = AgentXmlSigner(agent.socket_path, ruc="20999999999")
+    
+    assert client.sign_with_result(invoice_xml) is None
+    assert AgentXmlSigner(agent.socket_path).sign_with_result(invoice_xml) is not None
+    client.close()
+
+
+def test_agent_down_never_returns_unsigned(tmp_path, invoice_xml):
+    """Si el agente no responde, sign no devuelve el XML sin firmar."""
+    assert AgentXmlSigner(str(tmp_path / "nonexistent.sock")).sign(invoice_xml) is None
+    
+    # El socket existe pero nadie escucha
+    socket_path = str(tmp_path / "agent.sock")
+    with SigningAgent(socket_path, CryptoXmlSigner()):
+        pass
+    open(socket_path, 'w').close()
+    client = AgentXmlSigner(socket_path)
+    assert client.is_available()
+    assert client.sign(invoice_xml) is None
+
+
+def test_see_signs_per_ruc_through_agent(agent, pkcs12_certificate):
+    """See pasa al agente el RUC emisor de cada documento."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    
+    def invoice(ruc):
+        return Invoice(
+            serie="F001", correlativo="00000001", fecha_emision=datetime(2024, 1, 15),
+            company=Company(ruc=ruc, razon_social="EMPRESA", address=Address()),
+        )
+    
+    client = AgentXmlSigner(agent.socket_path)
+    see = See()
+    see.set_signer(client)
+    
+    tenant = agent.certificate_store.get("20000000002")
+    result = see.get_xml_signed_result(invoice("20000000002"))
+    assert result.certificate_serial == tenant.serial_number
+    verification = XmlVerifier(trusted_fingerprints=[tenant.fingerprint]).verify(see.get_xml_signed(invoice("20000000002")))
+    assert verification.is_valid(), verification.error
+    
+    signed = asyncio.run(see.get_xml_signed_result_async(invoice("20000000002")))
+    assert signed.certificate_serial == tenant.serial_number
+    
+    # Un RUC sin certificado en el agente no se firma con el certificado por defecto
+    assert see.get_xml_signed(invoice("20999999999")) is None
+    assert see.get_xml_signed_result(invoice("20999999999")) is None
+    assert asyncio.run(see.get_xml_signed_async(invoice("20999999999"))) is None
+    client.close()
+
+
+def test_read_frame_rejects_malformed_fields():
+    """Los tamaños de campo se validan contra el payload."""
+    payload = struct.pack("!I", 1000) + b"abc"
+    frame = struct.pack("!IBI", 1, 1, len(payload)) + payload
+    
+    with pytest.raises(ValueError):
+        read_frame(io.BytesIO(frame))
+    
+    frame = struct.pack("!IBI", 1, 1, 2) + b"ab"
+    with pytest.raises(ValueError):
+        read_frame(io.BytesIO(frame))
+
+
+def test_agent_bounds_requests_in_flight(tmp_path, pkcs12_certificate, invoice_xml):
+    """Con max_pending peticiones en vuelo el agente deja de leer (backpressure)."""
+    signer = CryptoXmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    with SigningAgent(str(tmp_path / "agent.sock"), signer, workers=1, max_pending=2) as agent:
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+        submit = agent.pool.submit
+        handle_sign = agent.handle_sign
+        
+        def counted_submit(fn, *args):
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            return submit(fn, *args)
+        
+        def slow_handle_sign(*args):
+            time.sleep(0.02)
+            handle_sign(*args)
+            with lock:
+                state["current"] -= 1
+        
+        agent.pool.submit = counted_submit
+        agent.handle_sign = slow_handle_sign
+        
+        client = AgentXmlSigner(agent.socket_path)
+        results = client.sign_many([invoice_xml] * 10)
+        client.close()
+    
+    assert all(results)
+    assert state["peak"] == 2
+
+
+def test_agent_cli_has_no_password_option(tmp_path):
+    """La contraseña no se acepta por línea de comandos (visible en ps)."""
+    with pytest.raises(SystemExit):
+        main(["--socket", str(tmp_path / "agent.sock"), "--password", "123456"])
+
+
+def test_pipelining_and_shared_connection(agent, invoice_xml):
+    """Varias peticiones en vuelo por una sola conexión y desde varios hilos."""
+    client = AgentXmlSigner(agent.socket_path)
+    
+    results = client.sign_many([invoice_xml] * 20)
+    assert all(result is not None for result in results)
+    
+    signed = []
+    threads = [threading.Thread(target=lambda: signed.append(client.sign(invoice_xml))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(signed) == 8 and all(signed)
+    client.close()
+
+
+def test_agent_socket_permissions_and_shutdown(tmp_path, invoice_xml):
+    """El socket solo es accesible por el usuario del agente y se elimina al cerrar."""
+    socket_path = str(tmp_path / "agent.sock")
+    agent = SigningAgent(socket_path, CryptoXmlSigner())
+    agent.start()
+    
+    assert os.stat(socket_path).st_mode & 0o077 == 0
+    
+    client = AgentXmlSigner(socket_path)
+    # Sin certificado el agente responde con error
+    assert client.sign_with_result(invoice_xml) is None
+    
+    agent.close()
+    assert not os.path.exists(socket_path)
+    assert not client.is_available()
+    assert client.sign_with_result(invoice_xml) is None
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Tests del cliente SOAP (sin red).
+"""
+
+import lxml.etree as etree
+import pytest
+import requests
+
+from greenter.ws.soap_client import SoapClient, SunatEndpoints
+from greenter.ws.wsdl import get_wsdl_document
+
+
+@pytest.fixture
+def no_network(monkeypatch):
+    """Falla cualquier petición HTTP."""
+    def blocked(*args, **kwargs):
+        raise AssertionError("network access during client setup")
+    monkeypatch.setattr(requests.Session, "request", blocked)
+
+
+def test_client_uses_bundled_wsdl(no_network):
+    """El cliente se construye con el WSDL incluido, sin descargarlo."""
+    first = SoapClient()
+    first.set_credentials("20000000001MODDATOS", "moddatos")
+    second = SoapClient()
+    second.set_credentials("20000000002MODDATOS", "moddatos")
+    
+    assert first.client is not None
+    assert first.client.wsdl is second.client.wsdl is get_wsdl_document()
+    assert sorted(first.service._binding._operations) == ['getStatus', 'sendBill', 'sendPack', 'sendSummary']
+
+
+def test_service_address(no_network):
+    """Las operaciones apuntan al endpoint configurado."""
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert client.connect()
+    assert client.service._binding_options['address'] == SunatEndpoints.FE_BETA
+    
+    client.set_service(SunatEndpoints.GUIA_BETA)
+    assert client.service._binding_options['address'] == SunatEndpoints.GUIA_BETA
+
+
+def test_deferred_setup(no_network, monkeypatch):
+    """El cliente zeep se construye una sola vez, al usarse."""
+    import greenter.ws.soap_client as soap_client
+    
+    built = []
+    original = soap_client.Client
+    monkeypatch.setattr(soap_client, "Client", lambda *args, **kwargs: built.append(1) or original(*args, **kwargs))
+    
+    client = SoapClient()
+    client.set_service(SunatEndpoints.FE_HOMOLOGACION)
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert built == []
+    
+    assert client.connect()
+    zeep_client = client.client
+    assert client.service._binding_options['address'] == SunatEndpoints.FE_HOMOLOGACION
+    
+    # Reconfigurar solo cambia la dirección y las credenciales
+    client.set_service(SunatEndpoints.FE_BETA)
+    client.set_credentials("20000000001OTROUSER", "otra")
+    assert client.client is zeep_client
+    assert client.service._binding_options['address'] == SunatEndpoints.FE_BETA
+    assert zeep_client.wsse.username == "20000000001OTROUSER"
+    assert built == [1]
+
+
+def test_client_published_after_service(no_network, monkeypatch):
+    """El cliente se publica cuando el servicio ya está enlazado."""
+    seen = []
+    original = SoapClient._bind_service
+    
+    def bind_service(self, client=None):
+        seen.append(self._client)
+        original(self, client)
+    monkeypatch.setattr(SoapClient, "_bind_service", bind_service)
+    
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert client.connect()
+    assert seen == [None]
+    assert client.service is not None
+
+
+def test_connect_without_credentials():
+    """Sin credenciales no hay cliente."""
+    client = SoapClient()
+    assert not client.connect()
+    assert client.client is None
+
+
+def test_send_bill_message(no_network):
+    """El mensaje sendBill sigue el contrato de SUNAT."""
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    
+    envelope = client.client.create_message(client.service, 'sendBill', fileName='a.zip', contentFile=b'zip')
+    body = etree.tostring(envelope).decode()
+    
+    assert '<ns0:sendBill xmlns:ns0="http://service.sunat.gob.pe">' in body
+    assert '<fileName>a.zip</fileName>' in body
+    assert 'wsse:Username>20000000001MODDATOS<' in body
+
+
+@pytest.fixture
+def keepalive_server():
+    """Servidor HTTP/1.1 local con keep-alive."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_clients_share_endpoint_session(no_network):
+    """Los clientes del mismo endpoint comparten sesión y pool."""
+    from greenter.ws.http_pool import HttpSessionPool
+    
+    pool = HttpSessionPool(pool_maxsize=4)
+    first = SoapClient()
+    first.set_session_pool(pool)
+    first.set_credentials("20000000001MODDATOS", "moddatos")
+    second = SoapClient()
+    second.set_session_pool(pool)
+    second.set_credentials("20000000002MODDATOS", "moddatos")
+    
+    session = first.client.transport.session
+    assert second.client.transport.session is session
+    assert session.get_adapter(SunatEndpoints.FE_BETA)._pool_maxsize == 4
+    
+    first.set_service(SunatEndpoints.GUIA_BETA)
+    assert first.client.transport.session is session  # mismo host
+    first.set_service(SunatEndpoints.FE_HOMOLOGACION)
+    assert first.client.transport.session is not session
+
+
+def test_pool_reuses_connections(keepalive_server):
+    """Las peticiones reutilizan la conexión abierta y se reflejan en las estadísticas."""
+    from greenter.ws.http_pool import HttpSessionPool
+    
+    pool = HttpSessionPool(pool_maxsize=2)
+    session = pool.get_session(keepalive_server + "/billService")
+    for _ in range(5):
+        assert session.get(keepalive_server + "/billService").content == b"ok"
+    
+    stats = pool.get_stats(keepalive_server)
+    assert stats == {'maxsize': 2, 'in_use': 0, 'idle': 1, 'connections': 1, 'requests': 5}
+    pool.close()
+
+
+def test_process_unwrapped_responses():
+    """Las respuestas de un solo elemento que zeep desenvuelve se interpretan."""
+    import io
+    import zipfile
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("R-20000000001-01-F001-1.xml", "<ApplicationResponse/>")
+    
+    client = SoapClient()
+    result = client._process_send_response(buffer.getvalue())
+    assert result["success"] and result["cdr_response"] == "<ApplicationResponse/>"
+    
+    # Con applicationResponse el CDR se lee igual del zip
+    class Response:
+        applicationResponse = buffer.getvalue()
+    result = client._process_send_response(Response())
+    assert result["success"] and result["cdr_response"] == "<ApplicationResponse/>"
+    assert client._process_summary_response("1700000000001")["ticket"] == "1700000000001"
+
+
+def test_send_is_quiet(no_network, capsys, caplog):
+    """El envío no escribe en stdout; el diagnóstico es un evento DEBUG con campos estructurados."""
+    import io
+    import logging
+    import zipfile
+    
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        zip_file.writestr("R-20000000001-01-F001-1.xml", "<ApplicationResponse/>")
+    
+    class Service:
+        def sendBill(self, fileName, contentFile):
+            return buffer.getvalue()
+    
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert client.connect()
+    client.service = Service()
+    
+    with caplog.at_level(logging.INFO, logger="greenter.ws.soap_client"):
+        assert client.send("20000000001-01-F001-1", "<Invoice/>")["success"]
+    assert capsys.readouterr().out == ""
+    assert not caplog.records
+    
+    with caplog.at_level(logging.DEBUG, logger="greenter.ws.soap_client"):
+        client.send("20000000001-01-F001-1", "<Invoice/>")
+    record = caplog.records[-1]
+    assert record.sunat_file == "20000000001-01-F001-1.zip"
+    assert record.sunat_success is True
+
+
+def test_errors_logged_lazily(no_network, caplog):
+    """Los errores se registran con argumentos %, sin formatear antes de tiempo."""
+    import logging
+    
+    class Service:
+        def getStatus(self, ticket):
+            raise RuntimeError("connection reset")
+    
+    client = SoapClient()
+    client.set_credentials("20000000001MODDATOS", "moddatos")
+    assert client.connect()
+    client.service = Service()
+    
+    with caplog.at_level(logging.ERROR, logger="greenter.ws.soap_client"):
+        assert client.get_status("1700000000001") is None
+    record = caplog.records[-1]
+    assert record.msg == "Error getting status: %s"
+    assert str(record.args[0]) == "connection reset"
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests del registro de envíos aceptados (filtro de Bloom + CdrStore).
+"""
+
+import io
+import logging
+import zipfile
+from datetime import datetime
+
+from greenter.ws.cdr_store import CdrStore
+from greenter.ws.submission_registry import BloomFilter, SubmissionRegistry, get_response_code
+from greenter.ws.zip_payload import read_cdr
+
+
+def cdr_zip(code="0"):
+    xml = (
+        '<ar:ApplicationResponse xmlns:ar="urn:oasis:names:specification:ubl:schema:xsd:ApplicationResponse-2"'
+        ' xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"'
+        ' xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">'
+        f'<cac:DocumentResponse><cac:Response><cbc:ResponseCode>{code}</cbc:ResponseCode>'
+        '</cac:Response></cac:DocumentResponse></ar:ApplicationResponse>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zip_file:
+        # Fixed timestamp: the same CDR always gives the same bytes
+        zip_file.writestr(zipfile.ZipInfo("R-20000000001-01-F001-1.xml", date_time=(2024, 1, 15, 0, 0, 0)), xml)
+    return buffer.getvalue()
+
+
+def test_bloom_filter():
+    """Sin falsos negativos y con falsos positivos cerca de la tasa configurada."""
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for n in range(10000):
+        bloom.add(f"20000000001-01-F001-{n}")
+    
+    assert len(bloom) == 10000
+    assert all(f"20000000001-01-F001-{n}" in bloom for n in range(10000))
+    false_positives = sum(f"20000000001-01-F002-{n}" in bloom for n in range(10000))
+    assert false_positives < 300
+
+
+def test_records_only_accepted():
+    """Se registran los aceptados (también con observaciones), no los rechazados."""
+    registry = SubmissionRegistry()
+    
+    assert registry.get_accepted("20000000001", "01", "F001", "1") is None
+    assert registry.record("20000000001", "01", "F001", "1", cdr_zip("0"))
+    assert registry.record("20000000001", "01", "F001", "2", cdr_zip("4287"))
+    assert not registry.record("20000000001", "01", "F001", "3", cdr_zip("2017"))
+    assert not registry.record("20000000001", "01", "F001", "4", None)
+    
+    entry = registry.get_accepted("20000000001", "01", "F001", "00000001")
+    assert entry["response_code"] == "0" and get_response_code(entry["cdr_response"]) == "0"
+    assert registry.get_accepted("20000000001", "01", "F001", 2)["response_code"] == "4287"
+    assert registry.get_accepted("20000000001", "01", "F001", 3) is None
+    assert registry.get_stats()["recorded"] == 2
+
+
+def test_reload_from_store(tmp_path):
+    """El filtro se reconstruye desde el índice en disco al reabrir."""
+    path = str(tmp_path / "cdrs.db")
+    registry = SubmissionRegistry(CdrStore(path))
+    registry.record("20000000001", "01", "F001", "1", cdr_zip())
+    registry.close()
+    
+    registry = SubmissionRegistry(CdrStore(path))
+    assert registry.get_accepted("20000000001", "01", "F001", "1")["cdr_zip"] == cdr_zip()
+    assert registry.get_accepted("20000000001", "01", "F001", "2") is None
+    stats = registry.get_stats()
+    assert stats["lookups"] == 2 and stats["hits"] == 1
+    registry.close()
+
+
+def test_bloom_filter_capacity_warning(caplog):
+    """Se avisa una sola vez al pasar la capacidad del filtro."""
+    bloom = BloomFilter(capacity=10)
+    with caplog.at_level(logging.WARNING, logger="greenter.ws.submission_registry"):
+        for n in range(30):
+            bloom.add(str(n))
+    
+    assert len(caplog.records) == 1
+    assert "capacity of 10" in caplog.records[0].getMessage()
+
+
+def test_serves_reconciled_cdrs():
+    """Los CDR guardados por la conciliación se leen por su ResponseCode."""
+    store = CdrStore()
+    # Como ConsultCdrClient.reconcile: estado 0004 de getStatusCdr, CDR de rechazo o aceptado
+    store.save("20000000001", "01", "F001", 1, "0004", "La constancia existe", cdr_zip("2017"),
+               response_code=get_response_code(read_cdr(cdr_zip("2017"))))
+    store.save("20000000001", "01", "F001", 2, "0004", "La constancia existe", cdr_zip("0"),
+               response_code=get_response_code(read_cdr(cdr_zip("0"))))
+    registry = SubmissionRegistry(store)
+    
+    assert registry.get_accepted("20000000001", "01", "F001", 1) is None
+    assert registry.get_accepted("20000000001", "01", "F001", 2)["response_code"] == "0"
+
+
+def test_see_send_skips_accepted(pkcs12_certificate):
+    """See.send devuelve el CDR guardado sin volver a enviar a SUNAT."""
+    from greenter.core.models.company import Company, Address
+    from greenter.core.models.sale import Invoice
+    from greenter.see import See
+    from greenter.signer.crypto_signer import CryptoXmlSigner
+    
+    class Client:
+        calls = 0
+        
+        def connect(self):
+            return True
+        
+        def send(self, filename, xml_content):
+            Client.calls += 1
+            return {"success": True, "cdr_zip": cdr_zip(), "cdr_response": None, "code": None, "error": None}
+    
+    see = See()
+    see.set_signer(CryptoXmlSigner())
+    see.set_certificate(*pkcs12_certificate)
+    see.soap_client = Client()
+    see.set_submission_registry(SubmissionRegistry())
+    invoice = Invoice(
+        serie="F001", correlativo="1", tipo_doc="01", fecha_emision=datetime(2024, 1, 15),
+        company=Company(ruc="20000000001", razon_social="EMPRESA", address=Address()),
+    )
+    
+    assert see.send(invoice).is_success()
+    response = see.send(invoice)
+    
+    assert response.is_success() and response.code == "0"
+    assert get_response_code(response.cdr_response) == "0"
+    assert Client.calls == 1
+    assert see.submission_registry.get_stats()["hits"] == 1
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Tests del planificador de consulta de tickets.
+"""
+
+import asyncio
+import time
+
+from greenter.ws.ticket_scheduler import TicketScheduler
+
+
+class FakeStatusClient:
+    """getStatus simulado: cada ticket devuelve una secuencia de códigos."""
+    
+    def __init__(self, sequences, delay=0.0):
+        self.sequences = {ticket: list(codes) for ticket, codes in sequences.items()}
+        self.delay = delay
+        self.calls = []
+        self.active = set()
+        self.overlaps = 0
+    
+    async def get_status_async(self, ticket):
+        if ticket in self.active:
+            self.overlaps += 1
+        self.active.add(ticket)
+        self.calls.append((ticket, time.monotonic()))
+        try:
+            await asyncio.sleep(self.delay)
+            codes = self.sequences[ticket]
+            code = codes.pop(0) if len(codes) > 1 else codes[0]
+            if code is None:
+                return None
+            if code.startswith('soap-env:'):
+                return {'success': False, 'error': f"SUNAT Fault {code}", 'code': code, 'description': None}
+            return {'success': True, 'status_code': code, 'content': b'PK', 'cdr_response': '<CDR/>', 'error': None}
+        finally:
+            self.active.discard(ticket)
+
+
+class SyncStatusClient:
+    """Cliente síncrono, como SoapClient."""
+    
+    def get_status(self, ticket):
+        return {'success': True, 'status_code': '0', 'content': None, 'cdr_response': None, 'error': None}
+
+
+def test_polls_with_backoff_until_resolved():
+    """Los tickets en proceso (98) se reconsultan con espera creciente."""
+    client = FakeStatusClient({'T1': ['98', '98', '0'], 'T2': ['99']})
+    scheduler = TicketScheduler(client, initial_delay=0.02, backoff=2)
+    results, own = [], []
+    scheduler.on_result(results.append)
+    
+    scheduler.add('T1', {'serie': 'RC-20240115-1'}, callback=own.append)
+    scheduler.add('T2')
+    asyncio.run(scheduler.run(stop_when_idle=True))
+    
+    by_ticket = {result.ticket: result for result in results}
+    assert by_ticket['T1'].is_success() and by_ticket['T1'].attempts == 3
+    assert by_ticket['T1'].metadata == {'serie': 'RC-20240115-1'}
+    assert by_ticket['T2'].status_code == '99' and not by_ticket['T2'].is_success()
+    assert [result.ticket for result in own] == ['T1']
+    
+    times = [at for ticket, at in client.calls if ticket == 'T1']
+    assert times[2] - times[1] > (times[1] - times[0]) * 1.4
+    assert scheduler.pending == []
+
+
+def test_deduplicates_tickets():
+    """Un ticket ya registrado no se duplica ni se consulta en paralelo."""
+    client = FakeStatusClient({'T1': ['98', '98', '0']}, delay=0.03)
+    scheduler = TicketScheduler(client, initial_delay=0.0, backoff=1)
+    
+    assert scheduler.add('T1')
+    assert not scheduler.add('T1')
+    
+    async def main():
+        runner = asyncio.ensure_future(scheduler.run(stop_when_idle=True))
+        await asyncio.sleep(0.01)
+        assert not scheduler.add('T1')  # con consulta en curso
+        await runner
+    
+    asyncio.run(main())
+    assert client.overlaps == 0
+    assert len(client.calls) == 3
+
+
+def test_async_iterator():
+    """Los resultados también se consumen como iterador asíncrono."""
+    client = FakeStatusClient({'A': ['98', '0'], 'B': ['0'], 'C': ['99']})
+    scheduler = TicketScheduler(client, initial_delay=0.01)
+    
+    async def main():
+        runner = asyncio.ensure_future(scheduler.run())
+        for ticket in 'ABC':
+            scheduler.add(ticket)
+        received = []
+        async for result in scheduler.results():
+            received.append(result.ticket)
+            if len(received) == 3:
+                scheduler.stop()
+        await runner
+        return received
+    
+    assert sorted(asyncio.run(main())) == ['A', 'B', 'C']
+
+
+def test_gives_up_after_max_attempts():
+    """Con max_attempts se reporta error si SUNAT no termina de procesar."""
+    client = FakeStatusClient({'T1': ['98'], 'T2': [None]})
+    scheduler = TicketScheduler(client, initial_delay=0.0, max_attempts=2)
+    results = []
+    scheduler.on_result(results.append)
+    scheduler.add('T1')
+    scheduler.add('T2')
+    
+    asyncio.run(scheduler.run(stop_when_idle=True))
+    
+    assert all(result.error and result.attempts == 2 for result in results)
+    assert len(results) == 2
+
+
+def test_gives_up_when_status_call_raises():
+    """Una consulta que siempre lanza excepción también cuenta para max_attempts."""
+    class FailingClient:
+        calls = 0
+        
+        async def get_status_async(self, ticket):
+            FailingClient.calls += 1
+            raise ConnectionError("refused")
+    
+    scheduler = TicketScheduler(FailingClient(), initial_delay=0.0, max_attempts=3)
+    results = []
+    scheduler.on_result(results.append)
+    scheduler.add('T1')
+    
+    asyncio.run(asyncio.wait_for(scheduler.run(stop_when_idle=True), 5))
+    
+    assert len(results) == 1
+    assert results[0].attempts == 3 and "refused" in results[0].error
+    assert FailingClient.calls == 3
+
+
+def test_fault_resolves_ticket():
+    """Un fault terminal de getStatus cierra el ticket; uno transitorio se reintenta."""
+    client = FakeStatusClient({
+        'T1': ['soap-env:Client.0127'],
+        'T2': ['soap-env:Server.0130', None, '0'],
+    })
+    scheduler = TicketScheduler(client, initial_delay=0.0, backoff=1)
+    results = []
+    scheduler.on_result(results.append)
+    
+    scheduler.add('T1')
+    scheduler.add('T2')
+    asyncio.run(scheduler.run(stop_when_idle=True))
+    
+    by_ticket = {result.ticket: result for result in results}
+    assert by_ticket['T1'].attempts == 1
+    assert "0127" in by_ticket['T1'].error
+    assert by_ticket['T2'].is_success() and by_ticket['T2'].attempts == 3
+    assert TicketScheduler(client).max_attempts is not None
+
+
+def test_resumes_pending_tickets(tmp_path):
+    """Los tickets pendientes sobreviven a un reinicio."""
+    store = str(tmp_path / 'tickets.db')
+    first = TicketScheduler(SyncStatusClient(), store_path=store, initial_delay=60)
+    first.add('T1', {'ruc': '20000000001'})
+    first.add('T2')
+    first.close()
+    
+    second = TicketScheduler(SyncStatusClient(), store_path=store, initial_delay=60)
+    assert sorted(second.pending) == ['T1', 'T2']
+    
+    # Reanudar sin esperar el plazo original
+    for ticket in second.pending:
+        second._tickets[ticket].next_poll = 0
+    results = []
+    second.on_result(results.append)
+    asyncio.run(second.run(stop_when_idle=True))
+    second.close()
+    
+    assert {result.ticket: result.metadata for result in results} == {'T1': {'ruc': '20000000001'}, 'T2': {}}
+    assert TicketScheduler(SyncStatusClient(), store_path=store).pending == []
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Tests del verificador de firmas XML (documentos firmados y CDR).
+"""
+
+import base64
+import hashlib
+import io
+import zipfile
+
+import lxml.etree as etree
+import pytest
+
+from greenter.signer.xml_signer import XmlSigner, XMLSEC_AVAILABLE
+from greenter.signer.crypto_signer import CryptoXmlSigner
+from greenter.signer.xml_verifier import XmlVerifier, DS_NS
+
+
+@pytest.fixture
+def signed_xml(pkcs12_certificate, invoice_xml):
+    path, password = pkcs12_certificate
+    signer = CryptoXmlSigner()
+    signer.set_certificate(path, password)
+    return signer.sign(invoice_xml)
+
+
+@pytest.fixture
+def verifier(certificate_fingerprint):
+    return XmlVerifier(trusted_fingerprints=[certificate_fingerprint])
+
+
+def sign_reference(pkcs12_certificate, xml, uri):
+    """Firmar a mano una referencia URI arbitraria (firma matemáticamente correcta)."""
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    
+    path, password = pkcs12_certificate
+    with open(path, "rb") as f:
+        key, certificate, _ = pkcs12.load_key_and_certificates(f.read(), password.encode("utf-8"))
+    
+    doc = etree.fromstring(xml.encode("utf-8"))
+    target = doc.xpath(f"//*[@Id='{uri[1:]}']")[0]
+    digest = base64.b64encode(hashlib.sha256(etree.tostring(target, method="c14n")).digest()).decode()
+    signature = etree.fromstring(
+        f'<ds:Signature xmlns:ds="{DS_NS}"><ds:SignedInfo>'
+        '<ds:CanonicalizationMethod Algorithm="http://www.w3.org/TR/2001/REC-xml-c14n-20010315"/>'
+        '<ds:SignatureMethod Algorithm="http://www.w3.org/2001/04/xmldsig-more#rsa-sha256"/>'
+        f'<ds:Reference URI="{uri}"><ds:DigestMethod Algorithm="http://www.w3.org/2001/04/xmlenc#sha256"/>'
+        f'<ds:DigestValue>{digest}</ds:DigestValue></ds:Reference></ds:SignedInfo>'
+        '<ds:SignatureValue/><ds:KeyInfo><ds:X509Data><ds:X509Certificate>'
+        f'{base64.b64encode(certificate.public_bytes(serialization.Encoding.DER)).decode()}'
+        '</ds:X509Certificate></ds:X509Data></ds:KeyInfo></ds:Signature>'
+    )
+    doc.find(".//{urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2}ExtensionContent").append(signature)
+    signed_info = signature.find(f"{{{DS_NS}}}SignedInfo")
+    signature.find(f"{{{DS_NS}}}SignatureValue").text = base64.b64encode(
+        key.sign(etree.tostring(signed_info, method="c14n"), padding.PKCS1v15(), hashes.SHA256())
+    ).decode()
+    return etree.tostring(doc)
+
+
+def test_verify_valid_signature(signed_xml, verifier):
+    """Una firma recién generada es válida."""
+    result = verifier.verify(signed_xml, "F001-00000001")
+    
+    assert result.is_valid(), result.error
+    assert result.trusted and result.is_intact()
+    assert result.digest_valid and result.signature_valid
+    assert result.document_id == "F001-00000001"
+    assert len(result.certificate_fingerprint) == 64
+
+
+@pytest.mark.skipif(not XMLSEC_AVAILABLE, reason="xmlsec no disponible")
+def test_verify_xmlsec_signature(pkcs12_certificate, invoice_xml):
+    """Las firmas del backend xmlsec también se verifican."""
+    signer = XmlSigner()
+    signer.set_certificate(*pkcs12_certificate)
+    
+    assert XmlVerifier().verify(signer.sign(invoice_xml)).is_intact()
+
+
+def test_verify_tampered_document(signed_xml, verifier):
+    """Modificar el contenido invalida el digest."""
+    tampered = signed_xml.replace("118.00", "1.00")
+    result = verifier.verify(tampered)
+    
+    assert not result.is_valid()
+    assert result.signature_valid
+    assert not result.digest_valid
+    assert "DigestValue" in result.error
+
+
+def test_verify_unsigned_document(invoice_xml):
+    """Un documento sin firma se reporta como inválido."""
+    result = XmlVerifier().verify(invoice_xml)
+    
+    assert not result.is_valid()
+    assert result.error == "No Signature element found"
+
+
+def test_trusted_fingerprints(signed_xml, certificate_fingerprint):
+    """Solo se aceptan certificados de confianza; sin anclas de confianza nada es válido."""
+    assert XmlVerifier(trusted_fingerprints=[certificate_fingerprint.upper()]).verify(signed_xml).is_valid()
+    
+    for verifier in (XmlVerifier(), XmlVerifier(trusted_fingerprints=["00" * 32])):
+        result = verifier.verify(signed_xml)
+        assert not result.is_valid()
+        assert result.is_intact() and result.trusted is False
+        assert result.error == "Untrusted certificate"
+        assert result.certificate_fingerprint == certificate_fingerprint
+
+
+def test_signature_outside_ubl_extensions_is_ignored(signed_xml, verifier):
+    """Solo cuenta la firma dentro de /*/ext:UBLExtensions."""
+    doc = etree.fromstring(signed_xml.encode("utf-8"))
+    signature = doc.find(f".//{{{DS_NS}}}Signature")
+    doc.append(signature)
+    
+    result = verifier.verify(etree.tostring(doc))
+    assert not result.is_valid()
+    assert result.error == "No Signature element found"
+
+
+def test_reference_must_cover_root(pkcs12_certificate, invoice_xml, verifier):
+    """Una referencia #id a un nodo que no es la raíz se rechaza (signature wrapping)."""
+    partial = invoice_xml.replace("<cbc:ID>", '<cbc:ID Id="doc">')
+    result = verifier.verify(sign_reference(pkcs12_certificate, partial, "#doc"))
+    assert result.signature_valid and not result.digest_valid
+    assert "does not cover the document root" in result.error
+
+
+def test_verify_cdr_zip(signed_xml, verifier):
+    """El CDR se verifica directamente desde el zip."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("dummy/", b"")
+        zip_file.writestr("R-20000000001-01-F001-00000001.xml", signed_xml.encode('utf-8'))
+    
+    result = verifier.verify_cdr(buffer.getvalue())
+    
+    assert result.is_valid(), result.error
+    assert result.document_id == "R-20000000001-01-F001-00000001.xml"
+
+
+def test_verify_many_with_process_pool(signed_xml, certificate_fingerprint):
+    """Verificación en lote con pool de procesos, en orden de entrada."""
+    documents = [signed_xml] * 6 + [("alterado", signed_xml.replace("118.00", "1.00"))]
+    
+    with XmlVerifier(trusted_fingerprints=[certificate_fingerprint]) as verifier:
+        results = verifier.verify_many(documents, workers=2, chunksize=2)
+    
+    assert [r.is_valid() for r in results] == [True] * 6 + [False]
+    assert results[0].document_id == "0"
+    assert results[-1].document_id == "alterado"
+
+
+def test_certificate_cache_is_bounded(signed_xml):
+    """La caché de certificados respeta su tamaño máximo."""
+    verifier = XmlVerifier(cache_size=1)
+    verifier.verify(signed_xml)
+    verifier.verify(signed_xml)
+    
+    assert len(verifier._certificates) == 1
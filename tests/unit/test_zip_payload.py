@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests del ZIP enviado como contentFile.
+"""
+
+import base64
+import io
+import zipfile
+
+import lxml.etree as etree
+
+from greenter.ws import raw_soap
+from greenter.ws.soap_client import SoapClient
+from greenter.ws.zip_payload import ZipPayloadBuilder
+
+
+XML = '<?xml version="1.0" encoding="UTF-8"?>\n<Invoice><cbc:Note>Años</cbc:Note></Invoice>'
+DATE = (2024, 1, 15, 10, 30, 0)
+
+
+def test_zip_format():
+    """Un único {archivo}.xml comprimido con deflate, contenido UTF-8 intacto."""
+    payload = ZipPayloadBuilder().build('20000000001-01-F001-1', XML, DATE)
+    
+    assert payload[:4] == b'PK\x03\x04'
+    with zipfile.ZipFile(io.BytesIO(payload)) as zip_file:
+        [info] = zip_file.infolist()
+        assert info.filename == '20000000001-01-F001-1.xml'
+        assert info.compress_type == zipfile.ZIP_DEFLATED
+        assert info.date_time == DATE
+        assert zip_file.read(info) == XML.encode('utf-8')
+
+
+def test_matches_legacy_writer():
+    """Los bytes coinciden con el ZIP que generaba ZipFile.writestr."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('20000000001-01-F001-1.xml', XML.encode('utf-8'))
+        date_time = zip_file.infolist()[0].date_time
+    legacy = buffer.getvalue()
+    
+    payload = ZipPayloadBuilder().build('20000000001-01-F001-1', XML.encode('utf-8'), date_time)
+    assert payload == legacy
+    assert ZipPayloadBuilder().build('20000000001-01-F001-1', XML, date_time) == payload
+
+
+def test_compression_level():
+    """El nivel y el método de compresión son configurables."""
+    xml = XML * 200
+    stored = ZipPayloadBuilder(zipfile.ZIP_STORED).build('a', xml, DATE)
+    fast = ZipPayloadBuilder(compresslevel=1).build('a', xml, DATE)
+    best = ZipPayloadBuilder(compresslevel=9).build('a', xml, DATE)
+    
+    assert len(best) <= len(fast) < len(stored)
+    for payload in (stored, fast, best):
+        with zipfile.ZipFile(io.BytesIO(payload)) as zip_file:
+            assert zip_file.read('a.xml') == xml.encode('utf-8')
+
+
+def test_content_encoded_once():
+    """contentFile viaja en base64 una sola vez, igual en zeep y en el transporte directo."""
+    client = SoapClient()
+    client.set_credentials('20000000001MODDATOS', 'moddatos')
+    client.connect()
+    payload = client._compress_xml('20000000001-01-F001-1', XML)
+    
+    envelopes = [
+        client.client.create_message(client.service, 'sendBill', fileName='a.zip', contentFile=payload),
+        etree.fromstring(raw_soap.build_send_bill_envelope('20000000001MODDATOS', 'moddatos', 'a.zip', payload)),
+    ]
+    for envelope in envelopes:
+        content = envelope.find('.//contentFile').text
+        assert base64.b64decode(content, validate=True) == payload
+    
+    captured = {}
+    
+    class Service:
+        def sendBill(self, fileName, contentFile):
+            captured['content'] = contentFile
+            return None
+    
+    client.service = Service()
+    client.send('20000000001-01-F001-1', XML)
+    assert captured['content'][:4] == b'PK\x03\x04'
+
+
+def test_pack():
+    """El ZIP de sendPack contiene un miembro por documento, en orden."""
+    documents = ((f'20000000001-03-B001-{n}', f'<Invoice>{n}</Invoice>') for n in range(1, 4))
+    payload = ZipPayloadBuilder().build_pack(documents, DATE)
+    
+    with zipfile.ZipFile(io.BytesIO(payload)) as zip_file:
+        assert zip_file.namelist() == [f'20000000001-03-B001-{n}.xml' for n in range(1, 4)]
+        assert zip_file.read('20000000001-03-B001-2.xml') == b'<Invoice>2</Invoice>'